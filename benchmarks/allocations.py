@@ -0,0 +1,66 @@
+import argparse
+import gc
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet.runner import Runner, ENGINES
+
+# Allocations made for Violet values, measured in this process. Values that
+# are dropped straight away are freed by reference counting and never show up
+# in a peak, so the program keeps them alive: every level of a deep recursion
+# holds a few small Integers and Booleans. Reported are the peak memory traced
+# by tracemalloc and the young generation collections the garbage collector
+# made (one every gc.get_threshold()[0] net allocations of container objects,
+# which violet objects are).
+
+PROGRAM = """\
+import {{ print }} from std;
+
+fun down(n: Integer): Integer {{
+	if (n == 0) {{
+		return 0;
+	}}
+	let digit = n % 10;
+	let even = n % 2 == 0;
+	let small = digit < 5;
+	let next = n - 1;
+	return down(next) + digit;
+}}
+
+fun main() {{
+	print(down({depth})->String);
+}}
+"""
+
+parse = argparse.ArgumentParser(description='Measure allocations of Violet values.')
+parse.add_argument('-d', '--depth', type=int, default=2000, help='Depth of the recursion')
+parse.add_argument('-e', '--engine', action='append', choices=ENGINES, help='Engine to run (repeatable, defaults to all)')
+
+def measure(file, engine):
+	runner = Runner.open(file, engine=engine)
+	gc.collect()
+	collections = gc.get_stats()[0]['collections']
+	tracemalloc.start()
+	with redirect_stdout(io.StringIO()):
+		runner.interpret().run()
+	peak = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return gc.get_stats()[0]['collections'] - collections, peak
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	with tempfile.NamedTemporaryFile('w', suffix='.vi', delete=False) as f:
+		f.write(PROGRAM.format(depth=args.depth))
+	try:
+		for engine in args.engine or ENGINES:
+			collections, peak = measure(f.name, engine)
+			print(f"{engine:<10}{peak / 2**20:>9.1f} MiB peak{collections:>8} gen0 collections")
+	finally:
+		os.unlink(f.name)
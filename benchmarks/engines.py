@@ -0,0 +1,46 @@
+import argparse
+import glob
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet.runner import ENGINES
+
+parse = argparse.ArgumentParser(description='Time Violet programs under each execution engine.')
+parse.add_argument('files', nargs='*', help='The programs to run (defaults to benchmarks/*.vi)')
+parse.add_argument('-e', '--engine', action='append', choices=ENGINES, help='Engine to time (repeatable, defaults to all)')
+parse.add_argument('-r', '--repeat', type=int, default=1, help='Runs per engine, the best time is reported')
+
+def run(file, engine):
+	start = time.perf_counter()
+	proc = subprocess.run(
+		[sys.executable, '-m', 'violet', '--engine', engine, file],
+		cwd=ROOT, capture_output=True, text=True
+	)
+	return time.perf_counter() - start, proc.returncode, proc.stdout + proc.stderr
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	files = args.files or sorted(glob.glob(os.path.join(ROOT, 'benchmarks', '*.vi')))
+	engines = args.engine or ENGINES
+	failed = False
+	for file in files:
+		print(os.path.relpath(file, ROOT))
+		reference = None
+		baseline = None
+		for engine in engines:
+			best = None
+			for _ in range(args.repeat):
+				elapsed, code, output = run(file, engine)
+				best = elapsed if best is None else min(best, elapsed)
+			if reference is None:
+				reference = (code, output)
+				baseline = best
+			note = '' if (code, output) == reference else '  OUTPUT DIFFERS'
+			failed = failed or bool(note)
+			print(f"  {engine:<10}{best:>9.3f}s{baseline / best:>8.2f}x{note}")
+	sys.exit(1 if failed else 0)
@@ -0,0 +1,87 @@
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet import objects
+from violet import runner as runner_module
+from violet import vm
+from violet.hooks import EVENTS
+from violet.runner import Runner, ENGINES
+
+# The cost of violet.hooks. Each program's main is timed under every engine in
+# a runner that never had hooks, one that had a hook added and removed again
+# before running (which should cost nothing either), and one with a no-op hook
+# on every event. Before timing, the runners without hooks are checked to run
+# the code they would without violet.hooks: no execution path of the runner
+# is shadowed, and no function was compiled with hook calls.
+
+parse = argparse.ArgumentParser(description='Time running programs without hooks, after removing them and with no-op hooks.')
+parse.add_argument('files', nargs='*', help='The programs to run (defaults to benchmarks/suite/*.vi)')
+parse.add_argument('-e', '--engine', action='append', choices=ENGINES, help='Engine to run (repeatable, defaults to all)')
+parse.add_argument('-r', '--repeat', type=int, default=5, help='Runs per program, the best time is reported')
+
+def noop(*args):
+	pass
+
+def vm_codes(code):
+	yield code
+	for const in code.consts:
+		if isinstance(const, vm.Code):
+			yield from vm_codes(const)
+
+def instrumented(runner):
+	# what runs hooks in a runner, which should be nothing without them
+	found = [name for name in runner_module._HOOKED if name in vars(runner)]
+	for value in runner.global_scope.vars.values():
+		if not isinstance(value, objects.Function) or value.code is None:
+			continue
+		if isinstance(value.code, vm.Code):
+			for code in vm_codes(value.code):
+				ops = code.ops[::2]
+				if vm.STATEMENT in ops or vm.ENTER in ops or vm.LEAVE in ops:
+					found.append(f'{code.name} (vm)')
+		elif value.code.__name__ == 'hooked':
+			found.append(f'{value.name.name} (closure)')
+	return found
+
+def run(file, engine, mode):
+	# returns the time main took
+	runner_module.MODULES.clear()
+	runner = Runner.open(file, engine=engine, cache=False)
+	if mode != 'none':
+		for event in EVENTS:
+			runner.add_hook(event, noop)
+	if mode == 'removed':
+		for event in EVENTS:
+			runner.remove_hook(event, noop)
+	with redirect_stdout(io.StringIO()):
+		runner.interpret()
+		if mode != 'noop':
+			found = instrumented(runner)
+			if found:
+				raise SystemExit(f"{file}: {engine} runner without hooks runs instrumented {', '.join(found)}")
+		start = time.perf_counter()
+		runner.run()
+		return time.perf_counter() - start
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	files = [os.path.abspath(file) for file in args.files] or sorted(glob.glob(os.path.join(ROOT, 'benchmarks', 'suite', '[!_]*.vi')))
+	modes = ('none', 'removed', 'noop')
+	print(f"{'':<22}" + ''.join(f'{mode:>10}' for mode in modes) + f"{'overhead':>10}")
+	for engine in args.engine or ENGINES:
+		print(engine)
+		for file in files:
+			# local imports are found relative to the working directory
+			os.chdir(os.path.dirname(file))
+			best = {mode: min(run(file, engine, mode) for _ in range(args.repeat)) for mode in modes}
+			program = os.path.splitext(os.path.basename(file))[0]
+			overhead = best['noop'] / best['none']
+			print(f"  {program:<20}" + ''.join(f"{best[mode] * 1e3:>8.1f}ms" for mode in modes) + f"{overhead:>9.2f}x")
@@ -0,0 +1,80 @@
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet import bench
+from violet.runner import Runner, ENGINES
+
+# A diamond of imports: main imports from every one of the middle modules, and
+# each of those imports from the same base module. Reported are the modules
+# parsed (Runner.parse calls) and the time to run main.
+
+BASE = """\
+let greeting = "hello";
+
+fun twice(n: Integer): Integer {
+	return n * 2;
+}
+"""
+
+MIDDLE = """\
+import {{ * }} from base;
+
+fun {name}(): Integer {{
+	return twice({index});
+}}
+"""
+
+MAIN = """\
+import {{ print }} from std;
+{imports}
+
+fun main() {{
+	print({first}()->String);
+}}
+"""
+
+parse = argparse.ArgumentParser(description='Time a diamond-shaped import graph.')
+parse.add_argument('-m', '--modules', type=int, default=100, help='Modules in the graph, main and base included')
+parse.add_argument('-e', '--engine', choices=ENGINES, default='tree', help='The execution engine to use')
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	middles = ['mid' + bench.name(i) for i in range(args.modules - 2)]
+	directory = tempfile.mkdtemp()
+	cwd = os.getcwd()
+	parses = 0
+	parse_module = Runner.parse
+
+	def counted(self):
+		global parses
+		parses += 1
+		return parse_module(self)
+
+	Runner.parse = counted
+	try:
+		with open(os.path.join(directory, 'base.vi'), 'w') as f:
+			f.write(BASE)
+		for i, middle in enumerate(middles):
+			with open(os.path.join(directory, middle + '.vi'), 'w') as f:
+				f.write(MIDDLE.format(name=middle, index=i))
+		with open(os.path.join(directory, 'main.vi'), 'w') as f:
+			f.write(MAIN.format(first=middles[0], imports='\n'.join(f"import {{ {middle} }} from {middle};" for middle in middles)))
+		# local imports are found relative to the working directory
+		os.chdir(directory)
+		start = time.perf_counter()
+		with redirect_stdout(io.StringIO()):
+			Runner.open('main.vi', engine=args.engine).interpret().run()
+		elapsed = time.perf_counter() - start
+		print(f"{args.modules} modules, {parses} parsed in {elapsed * 1e3:.1f}ms")
+	finally:
+		os.chdir(cwd)
+		shutil.rmtree(directory)
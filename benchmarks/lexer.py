@@ -0,0 +1,198 @@
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+from sly import Lexer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet.lexer import Tokenizer
+
+# Tokens per second on a multi-megabyte source (the example and benchmark
+# programs repeated), for the sly lexer violet.lexer.Tokenizer replaced (kept
+# here as it was) and for the Tokenizer reading the source from a string and
+# from a file. Both must produce the same tokens.
+
+class VioletLexer(Lexer):
+	tokens = {
+		CAST,
+
+		ANON_CHECK,
+
+		PLUS,
+		MINUS,
+		MULTIPLY,
+		DIVIDE,
+		MODULUS,
+
+		EQ,
+		NE,
+		GE,
+		GT,
+		LE,
+		LT,
+
+		EOS,
+		EQUALS,
+		COLON,
+		DQMARK,
+		QMARK,
+		AND,
+		OR,
+
+		BLOCK_OPEN,
+		BLOCK_CLOSE,
+		PAREN_OPEN,
+		PAREN_CLOSE,
+		BRACK_OPEN,
+		BRACK_CLOSE,
+
+		RANGE,
+		ATTR,
+		COMMA,
+
+		IDENTIFIER,
+
+		SCOPE,
+
+		IMPORT,
+		FROM,
+		CONST,
+		FUN,
+
+		RETURN,
+		BREAK,
+		CONTINUE,
+
+		TRUE,
+		FALSE,
+		NIL,
+
+		IF,
+		ELSEIF,
+		ELSE,
+		FOR,
+		IN,
+
+		DECIMAL,
+		STRING,
+	}
+	ignore_comment = r"//.*"
+
+	CAST = '->'
+
+	ANON_CHECK = r"=>"
+
+	PLUS = r'\+'
+	MINUS = r'-'
+	MULTIPLY = r'\*'
+	DIVIDE = r'/'
+	MODULUS = '%'
+
+	EQ = '=='
+	NE = '!='
+	GE = '>='
+	GT = '>'
+	LE = '<='
+	LT = '<'
+
+	EOS = ';'
+	EQUALS = '='
+	COLON = ':'
+	DQMARK = r'\?\?'
+	QMARK = r'\?'
+	AND = '&&'
+	OR = r'\|\|'
+
+	BLOCK_OPEN = '{'
+	BLOCK_CLOSE = '}'
+	PAREN_OPEN = r'\('
+	PAREN_CLOSE = r'\)'
+	BRACK_OPEN = r'\['
+	BRACK_CLOSE = r'\]'
+
+	RANGE = r'\.\.'
+	ATTR = r'\.'
+	COMMA = ','
+
+	IDENTIFIER = r'[a-zA-Z_]+'
+
+	IDENTIFIER['let'] = SCOPE
+	IDENTIFIER['put'] = SCOPE
+
+	IDENTIFIER['import'] = IMPORT
+	IDENTIFIER['from'] = FROM
+	IDENTIFIER['const'] = CONST
+	IDENTIFIER['fun'] = FUN
+
+	IDENTIFIER['return'] = RETURN
+	IDENTIFIER['break'] = BREAK
+	IDENTIFIER['continue'] = CONTINUE
+
+	IDENTIFIER['true'] = TRUE
+	IDENTIFIER['false'] = FALSE
+	IDENTIFIER['nil'] = NIL
+
+	IDENTIFIER['if'] = IF
+	IDENTIFIER['elseif'] = ELSEIF
+	IDENTIFIER['else'] = ELSE
+	IDENTIFIER['for'] = FOR
+	IDENTIFIER['in'] = IN
+
+	# BINARY = r'0b[01]+'
+	DECIMAL = r'[0-9]+'
+	# HEXADECIMAL = r'0x[0-9a-fA-F]+'
+
+	STRING = r'".*?(?<!\\)(?:\\\\)*?"'
+
+	ignore = ' \t'
+
+	ignore_newline = r'\n+'
+	def ignore_newline(self, t):
+		self.lineno += t.value.count('\n')
+
+	def error(self, t):
+		raise Exception(f"line {self.lineno}: illegal character {t.value[0]!r}")
+
+parse = argparse.ArgumentParser(description='Time the lexer on a large source.')
+parse.add_argument('-s', '--size', type=int, default=4, help='Size of the source in MiB')
+parse.add_argument('-r', '--repeat', type=int, default=3, help='Timings per lexer, the best is reported')
+
+def best(func, repeat):
+	times = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		count = func()
+		times.append(time.perf_counter() - start)
+	return count, min(times)
+
+def report(name, count, elapsed):
+	print(f"{name:<18}{count / elapsed / 1e6:>7.2f}M tokens/s{elapsed:>8.2f}s")
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	sample = ''.join(
+		open(file).read()
+		for file in sorted(glob.glob(os.path.join(ROOT, 'examples', '*.vi')) + glob.glob(os.path.join(ROOT, 'benchmarks', '*.vi')))
+	)
+	source = sample * (args.size * 2**20 // len(sample) + 1)
+	expected = [(t.type, t.value, t.lineno, t.index) for t in VioletLexer().tokenize(source)]
+	got = [(t.type, t.value, t.lineno, t.index) for t in Tokenizer().tokenize(source)]
+	if got != expected:
+		sys.exit("FATAL: Tokenizer and sly lexer disagree")
+	print(f"{len(source) / 2**20:.1f} MiB, {len(expected)} tokens")
+	report('sly', *best(lambda: sum(1 for _ in VioletLexer().tokenize(source)), args.repeat))
+	report('Tokenizer (str)', *best(lambda: sum(1 for _ in Tokenizer().tokenize(source)), args.repeat))
+	with tempfile.NamedTemporaryFile('w', suffix='.vi', delete=False) as f:
+		f.write(source)
+	try:
+		def from_file():
+			with open(f.name) as file:
+				return sum(1 for _ in Tokenizer().tokenize(file))
+		report('Tokenizer (file)', *best(from_file, args.repeat))
+	finally:
+		os.unlink(f.name)
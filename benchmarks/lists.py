@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet import objects
+
+# Memory and bulk operation cost of large Lists, boxed (a list of Integer or
+# Boolean objects, as Lists of other types are stored) against packed (the
+# objects.Array buffer Lists of Integers and Booleans get).
+
+parse = argparse.ArgumentParser(description='Measure million-element Lists.')
+parse.add_argument('-n', '--length', type=int, default=1_000_000, help='Elements per List')
+
+def measure(build):
+	tracemalloc.start()
+	value = build()
+	size = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return value, size
+
+def timed(func):
+	start = time.perf_counter()
+	func()
+	return time.perf_counter() - start
+
+def report(name, n, boxed, packed):
+	(boxed, boxed_size), (packed, packed_size) = measure(boxed), measure(packed)
+	print(name)
+	print(f"  {'memory':<12}{boxed_size / n:>10.1f} B/elem{packed_size / n:>10.1f} B/elem")
+	for op, func in (
+		('iterate', lambda l: sum(1 for _ in l)),
+		('== copy', lambda l: l == objects.List(l.value0[:])),
+		('-> String', lambda l: l.cast0(objects.String)),
+	):
+		print(f"  {op:<12}{timed(lambda: func(boxed)):>10.3f}s{'':>7}{timed(lambda: func(packed)):>10.3f}s")
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	n = args.length
+	print(f"{'':<14}{'boxed':>10}{'':>7}{'packed':>10}")
+	report(
+		'List[Integer]', n,
+		lambda: objects.List([objects.Integer(i) for i in range(n)]),
+		lambda: objects.List.from_values0(objects.Integer, [objects.Integer(i) for i in range(n)]),
+	)
+	report(
+		'List[Boolean]', n,
+		lambda: objects.List([objects.Boolean(i % 3 == 0) for i in range(n)]),
+		lambda: objects.List.from_values0(objects.Boolean, [objects.Boolean(i % 3 == 0) for i in range(n)]),
+	)
@@ -0,0 +1,61 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet.runner import ENGINES
+
+# Checks that a long loop runs in bounded memory: the peak RSS of a run with
+# the full iteration count must match that of a run a tenth as long.
+
+PROGRAM = """\
+import {{ print }} from std;
+
+fun main() {{
+	for (i in 0..{iterations}) {{
+		let x = i % 7;
+		if (x == 3) {{
+			let y = x -> String;
+		}}
+	}}
+	print("done");
+}}
+"""
+
+parse = argparse.ArgumentParser(description='Check that RSS stays flat across a long Violet loop.')
+parse.add_argument('-n', '--iterations', type=int, default=10_000_000, help='Loop iterations of the full run')
+parse.add_argument('-e', '--engine', action='append', choices=ENGINES, help='Engine to check (repeatable, defaults to all)')
+parse.add_argument('--tolerance', type=float, default=0.1, help='Allowed relative growth of the peak RSS')
+
+def peak_rss(iterations, engine):
+	with tempfile.NamedTemporaryFile('w', suffix='.vi', delete=False) as f:
+		f.write(PROGRAM.format(iterations=iterations))
+	try:
+		proc = subprocess.Popen(
+			[sys.executable, '-m', 'violet', '--engine', engine, '--no-cache', f.name],
+			cwd=ROOT, stdout=subprocess.DEVNULL
+		)
+		_, status, usage = os.wait4(proc.pid, 0)
+		proc.returncode = os.waitstatus_to_exitcode(status)
+	finally:
+		os.unlink(f.name)
+	if proc.returncode:
+		raise SystemExit(f"{engine}: exited with code {proc.returncode}")
+	rss = usage.ru_maxrss
+	return rss if sys.platform == 'darwin' else rss * 1024  # bytes on macOS, KiB elsewhere
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	failed = False
+	for engine in args.engine or ENGINES:
+		short = peak_rss(args.iterations // 10, engine)
+		full = peak_rss(args.iterations, engine)
+		grown = full > short * (1 + args.tolerance)
+		failed = failed or grown
+		note = '  GROWS' if grown else ''
+		print(f"{engine:<10}{short / 2**20:>9.1f} MiB{full / 2**20:>9.1f} MiB{note}")
+	sys.exit(1 if failed else 0)
@@ -0,0 +1,54 @@
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet import objects
+from violet import vast as ast
+from violet.runner import Runner
+
+# Bytes taken by one runtime value of each type: the object itself plus its
+# instance dict, if it has one. Values that are interned are made big enough
+# not to be.
+
+PROGRAM = """\
+fun f(a: Integer): Integer {
+	return a;
+}
+
+let g = a: Integer => a;
+"""
+
+def size(obj):
+	total = sys.getsizeof(obj)
+	if hasattr(obj, '__dict__'):
+		total += sys.getsizeof(obj.__dict__)
+	return total
+
+def per_value(make, n=100000):
+	tracemalloc.start()
+	values = [make(i) for i in range(n)]
+	used = tracemalloc.get_traced_memory()[0] - sys.getsizeof(values)
+	tracemalloc.stop()
+	return used / n
+
+if __name__ == '__main__':
+	runner = Runner(PROGRAM)
+	runner.interpret()
+	scope = runner.global_scope
+	values = {
+		'Void': objects.Void(),
+		'Boolean': objects.Boolean(True),
+		'Integer': objects.Integer(10 ** 6),
+		'String': objects.String('violet'),
+		'List': objects.List([objects.String('violet')]),
+		'Function': scope.get_var(ast.Identifier('f', -1)),
+		'Lambda': scope.get_var(ast.Identifier('g', -1)),
+		'PyObject': objects.ThinPythonObjectWrapper(object()),
+	}
+	for name, value in values.items():
+		print(f"{name:<12}{size(value):>6} B")
+	print(f"{'Integer x 100k':<16}{per_value(lambda i: objects.Integer(10 ** 6 + i)):>6.1f} B/value")
+	print(f"{'String x 100k':<16}{per_value(lambda i: objects.String(str(i))):>6.1f} B/value")
@@ -0,0 +1,38 @@
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet import vast as ast
+from violet import objects
+
+# Integer and comparison operator throughput, without parsing or running a
+# program: every operator node is evaluated on constant operands by the tree
+# engine's BiOperatorExpr.eval.
+
+OPERATORS = (
+	ast.Plus, ast.Minus, ast.Times, ast.Divide, ast.Modulus,
+	ast.EqualTo, ast.NotEqualTo, ast.GreaterThan, ast.GreaterOrEqual, ast.LessThan, ast.LessOrEqual,
+)
+
+parse = argparse.ArgumentParser(description='Time binary operators on Integers.')
+parse.add_argument('-n', '--number', type=int, default=200000, help='Evaluations per timing')
+parse.add_argument('-r', '--repeat', type=int, default=5, help='Timings per operator, the best is reported')
+
+def best(func, args):
+	return min(timeit.repeat(func, number=args.number, repeat=args.repeat)) / args.number
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	left = ast.Constant(objects.Integer(1234567))
+	right = ast.Constant(objects.Integer(89))
+	total = 0
+	for op in OPERATORS:
+		expr = ast.BiOperatorExpr(left, op(), right)
+		elapsed = best(lambda: expr.eval(None), args)
+		total += elapsed
+		print(f"{op.__name__:<16}{elapsed * 1e9:>8.0f}ns")
+	print(f"{'mean':<16}{total / len(OPERATORS) * 1e9:>8.0f}ns")
@@ -0,0 +1,45 @@
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet import bench
+from violet import cache
+from violet.runner import Runner
+
+# Time to get a checked module from a large generated program: "cold" lexes,
+# parses, resolves, optimises and typechecks the source, "warm" loads the .vic
+# file the cold parse left in __vicache__. The program is the one
+# `python -m violet bench` generates.
+
+parse = argparse.ArgumentParser(description='Time parsing with and without the AST cache.')
+parse.add_argument('-f', '--functions', type=int, default=1000, help='Functions in the generated program')
+parse.add_argument('-r', '--repeat', type=int, default=5, help='Timings per mode, the best is reported')
+
+def best(func, repeat):
+	times = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		func()
+		times.append(time.perf_counter() - start)
+	return min(times)
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	directory = tempfile.mkdtemp()
+	try:
+		file = bench.generate(directory, args.functions)
+		print(f"{args.functions} functions, {os.path.getsize(file) // 1024} KiB of source")
+		cold = best(lambda: Runner.open(file, cache=False).parse(), args.repeat)
+		Runner.open(file).parse()
+		size = os.path.getsize(cache.cache_file(file, Runner.open(file).opt_level))
+		warm = best(lambda: Runner.open(file).parse(), args.repeat)
+		print(f"{'cold':<8}{cold * 1e3:>9.1f}ms")
+		print(f"{'warm':<8}{warm * 1e3:>9.1f}ms{cold / warm:>8.1f}x  ({size // 1024} KiB cached)")
+	finally:
+		shutil.rmtree(directory)
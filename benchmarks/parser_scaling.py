@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet.lexer import lexer
+from violet.parser import parser
+
+# Parse time of generated programs as they grow: a function body of n
+# statements, a List literal of n elements and a call with n arguments. Time
+# per item should stay flat; a ratio well above 1 between a size and the one
+# before it means parsing is worse than linear.
+
+SHAPES = {
+	'statements': lambda n: "fun main() {\n" + "\tx = x + 1;\n" * n + "}\n",
+	'list elements': lambda n: "let xs = [" + ", ".join(["1"] * n) + "];\n",
+	'call arguments': lambda n: "fun main() {\n\tf(" + ", ".join(["1"] * n) + ");\n}\n",
+}
+
+parse = argparse.ArgumentParser(description='Check that parsing scales linearly.')
+parse.add_argument('sizes', nargs='*', type=int, default=[1000, 10000, 100000], help='Program sizes to parse')
+
+def timed(source):
+	start = time.perf_counter()
+	parser.parse(lexer.tokenize(source))
+	elapsed = time.perf_counter() - start
+	if parser._error_list or lexer.errors:
+		sys.exit("FATAL: generated program does not parse")
+	return elapsed
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	worst = 0
+	for shape, generate in SHAPES.items():
+		print(shape)
+		previous = None
+		for n in args.sizes:
+			per_item = timed(generate(n)) / n
+			ratio = per_item / previous if previous else 1
+			worst = max(worst, ratio)
+			print(f"  {n:>8}{per_item * 1e6:>9.2f}us/item{ratio:>8.2f}x")
+			previous = per_item
+	print(f"worst growth per item: {worst:.2f}x ({'linear' if worst < 2 else 'NOT linear'})")
@@ -0,0 +1,57 @@
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet import bench
+from violet import repl
+from violet.runner import ENGINES
+
+# A REPL session with a large generated program loaded. Reported are the time
+# to load it, the time to load it again after one function was edited (and the
+# statements parsed for that, against those of the first load), and the time
+# to evaluate a line calling one of its functions. The program is the one
+# `python -m violet bench` generates.
+
+parse = argparse.ArgumentParser(description='Time reloading a file and evaluating lines in a REPL session.')
+parse.add_argument('-f', '--functions', type=int, default=1000, help='Functions in the generated program')
+parse.add_argument('-r', '--repeat', type=int, default=20, help='Evaluations of the line, the best is reported')
+parse.add_argument('-e', '--engine', action='append', choices=ENGINES, help='Engine to run (repeatable, defaults to all)')
+
+def timed(func, *args):
+	start = time.perf_counter()
+	with redirect_stdout(io.StringIO()):
+		func(*args)
+	return time.perf_counter() - start
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	directory = tempfile.mkdtemp()
+	try:
+		file = bench.generate(directory, args.functions)
+		with open(file) as f:
+			source = f.read()
+		edited = source.replace('return total % 7;', 'return total % 5;', 1)
+		line = f'f_{bench.name(args.functions // 2)}(3, 4);'
+		print(f"{args.functions} functions, {len(source) // 1024} KiB of source")
+		for engine in args.engine or ENGINES:
+			session = repl.Session(engine=engine)
+			load = timed(session.load, file)
+			parsed = session.parses
+			with open(file, 'w') as f:
+				f.write(edited)
+			reload = timed(session.load, file)
+			reparsed = session.parses - parsed
+			evaluate = min(timed(session.execute, line) for _ in range(args.repeat))
+			with open(file, 'w') as f:
+				f.write(source)
+			print(f"{engine:<10}load{load * 1e3:>8.1f}ms  reload{reload * 1e3:>8.1f}ms ({reparsed}/{parsed} parsed)  line{evaluate * 1e3:>7.2f}ms")
+	finally:
+		shutil.rmtree(directory)
@@ -0,0 +1,39 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet.parser import TABLES_FILE
+
+# Wall-clock time of `python -m violet <file>`, each run in a new interpreter.
+# "built" removes the stored parser tables before every run, so each start has
+# to build them again (as every start did before they were stored), "stored"
+# loads the tables the previous run left.
+
+parse = argparse.ArgumentParser(description='Time interpreter startup.')
+parse.add_argument('file', nargs='?', default=os.path.join(ROOT, 'examples', 'hello_world.vi'), help='The program to run')
+parse.add_argument('-r', '--repeat', type=int, default=10, help='Runs per mode, the best and mean are reported')
+
+def run(file):
+	start = time.perf_counter()
+	subprocess.run([sys.executable, '-m', 'violet', file], cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+	return time.perf_counter() - start
+
+def remove_tables():
+	try:
+		os.unlink(TABLES_FILE)
+	except FileNotFoundError:
+		pass
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	for mode, before in (('built', remove_tables), ('stored', lambda: None)):
+		times = []
+		for _ in range(args.repeat):
+			before()
+			times.append(run(args.file))
+		print(f"{mode:<8}{min(times) * 1e3:>8.1f}ms best{sum(times) / len(times) * 1e3:>8.1f}ms mean")
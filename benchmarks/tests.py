@@ -0,0 +1,62 @@
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from violet import bench
+from violet import testing
+from violet.runner import ENGINES
+
+# `python -m violet --test` on a directory of generated test programs, each
+# with the stdout it is expected to print, run with every number of worker
+# processes given. Reported are the wall time, the tests run per second and
+# the speedup over the first number of workers.
+
+PROGRAM = """\
+import {{ print }} from std;
+
+fun main() {{
+	let total = 0;
+	for (i in 0..{n}) {{
+		total = total + i;
+	}}
+	print(total->String);
+}}
+"""
+
+parse = argparse.ArgumentParser(description='Time running a large directory of tests with different numbers of workers.')
+parse.add_argument('-n', '--tests', type=int, default=2000, help='Test programs to generate')
+parse.add_argument('-j', '--jobs', type=int, action='append', help='Worker processes (repeatable, defaults to 1 and one per CPU)')
+parse.add_argument('-e', '--engine', choices=ENGINES, default='tree', help='Engine to run the tests')
+
+if __name__ == '__main__':
+	args = parse.parse_args(sys.argv[1:])
+	jobs = args.jobs or sorted({1, os.cpu_count() or 1})
+	directory = tempfile.mkdtemp()
+	try:
+		for i in range(args.tests):
+			n = i % 100
+			# file names follow identifiers, which can't contain digits
+			with open(os.path.join(directory, f'{bench.name(i)}.vi'), 'w') as f:
+				f.write(PROGRAM.format(n=n))
+			with open(os.path.join(directory, f'{bench.name(i)}.out'), 'w') as f:
+				f.write(f'{n * (n - 1) // 2}\n')
+		print(f"{args.tests} tests, {os.cpu_count()} CPUs")
+		first = None
+		for j in jobs:
+			start = time.perf_counter()
+			with redirect_stdout(io.StringIO()):
+				failed = testing.run_tests(directory, engine=args.engine, cache=False, jobs=j)
+			elapsed = time.perf_counter() - start
+			first = first or elapsed
+			note = f'  {failed} FAILED' if failed else ''
+			print(f"  {j:>3} workers{elapsed:>9.2f}s{args.tests / elapsed:>9.0f} tests/s{first / elapsed:>7.2f}x{note}")
+	finally:
+		shutil.rmtree(directory)
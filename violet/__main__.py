@@ -1,44 +1,78 @@
-import argparse, glob, sys
-import io
-from contextlib import redirect_stdout as rout, redirect_stderr as rerr
-import traceback
+import argparse, os, sys
 
-from violet.runner import Runner
+from violet.runner import Runner, ENGINES
+from violet.optimizer import OPT_LEVELS, DEFAULT_OPT_LEVEL
+from violet import bench, optimizer, repl, testing, vm
+from violet.profiler import Profiler
 
 parse = argparse.ArgumentParser()
-parse.add_argument('file', nargs='?', help='The file to interpret.')
+parse.add_argument('file', nargs='?', help='The file to interpret (or with --test, the directory of tests, examples by default).')
 parse.add_argument('-a', '--ast', help='Write module AST to debug file', action='store_true')
+parse.add_argument('-i', '--interactive', action='store_true', help='Start a REPL after running the file (or without one)')
 parse.add_argument('-t', '--test', action='store_true', help='Run the tests')
+parse.add_argument('-j', '--jobs', type=int, help='Processes --test runs the tests in (defaults to one per CPU)')
+parse.add_argument('--timeout', type=float, default=testing.TIMEOUT, metavar='SECONDS', help='How long --test waits for a test before failing it')
+parse.add_argument('--slowest', type=int, default=10, metavar='N', help='How many of the slowest tests --test lists')
 parse.add_argument('-v', '--verbose', action='store_true', help='Use python-style errors')
+parse.add_argument('-e', '--engine', choices=ENGINES, default='tree', help='The execution engine to use')
+parse.add_argument('-O', '--opt-level', type=int, choices=OPT_LEVELS, default=DEFAULT_OPT_LEVEL, help='How much to optimise the program before running it')
+parse.add_argument('--dis', action='store_true', help='Dump the compiled bytecode instead of running the file')
+parse.add_argument('--no-cache', action='store_true', help='Parse the file again instead of using (or writing) its cached AST')
+parse.add_argument('--profile', action='store_true', help='Report the time spent in each Violet function and line after running the file')
+parse.add_argument('--profile-stacks', metavar='FILE', help='Where --profile writes collapsed stacks for flamegraph tools (defaults to <file>.collapsed)')
+parse.add_argument('--dump-optimized', action='store_true', help='Dump the optimised AST instead of running the file')
 
 if __name__ == '__main__':
+	if sys.argv[1:2] == ['bench']:
+		sys.exit(bench.main(sys.argv[2:]))
 	args = parse.parse_args(sys.argv[1:])
 	if args.test and args.ast:
 		print("FATAL: Cannot combine arguments '--ast' and '--test'", file=sys.stderr)
 		sys.exit(64)
+	if args.test and args.interactive:
+		print("FATAL: Cannot combine arguments '--interactive' and '--test'", file=sys.stderr)
+		sys.exit(64)
+	if args.test and args.dis:
+		print("FATAL: Cannot combine arguments '--dis' and '--test'", file=sys.stderr)
+		sys.exit(64)
+	if args.test and args.dump_optimized:
+		print("FATAL: Cannot combine arguments '--dump-optimized' and '--test'", file=sys.stderr)
+		sys.exit(64)
+	if args.profile and (args.test or args.interactive or not args.file):
+		print("FATAL: Argument '--profile' needs a file, and cannot be combined with '--test' or '--interactive'", file=sys.stderr)
+		sys.exit(64)
 
-	if not args.test:
-		runner = Runner.open(args.file, debug=args.verbose, write_ast=args.ast)
+	if args.interactive or not args.file and not args.test:
+		session = repl.Session(debug=args.verbose, engine=args.engine, opt_level=args.opt_level)
+		if args.file:
+			repl.report(session, session.load, args.file)
+		repl.interact(session)
+	elif args.dis:
+		runner = Runner.open(args.file, debug=args.verbose, opt_level=args.opt_level, cache=not args.no_cache)
+		vm.disassemble(vm.compile_module(runner.parse()))
+	elif args.dump_optimized:
+		runner = Runner.open(args.file, debug=args.verbose, opt_level=args.opt_level, cache=not args.no_cache)
+		optimizer.dump(runner.parse())
+	elif args.profile:
+		runner = Runner.open(args.file, debug=args.verbose, engine=args.engine, opt_level=args.opt_level, cache=not args.no_cache)
+		profiler = Profiler().attach(runner)
+		try:
+			runner.interpret()
+			runner.run()
+		finally:
+			# reported even if the program failed, for what did run
+			print(file=sys.stderr)
+			profiler.report()
+			stacks = args.profile_stacks or os.path.splitext(os.path.basename(args.file))[0] + '.collapsed'
+			profiler.write_stacks(stacks)
+			print(f"\ncollapsed stacks written to {stacks}", file=sys.stderr)
+	elif not args.test:
+		runner = Runner.open(args.file, debug=args.verbose, write_ast=args.ast, engine=args.engine, opt_level=args.opt_level, cache=not args.no_cache)
 		runner.interpret()
 		runner.run()
 	else:
-		failed = 0
-		total = 0
-		for file in glob.glob("examples/*.vi"):
-			total += 1
-			print("\nTEST:", file)
-			try:
-				Runner.open(file, debug=args.verbose).interpret().run()
-			except SystemExit:
-				failed += 1
-			except BaseException:
-				traceback.print_exc(file=sys.stderr)
-				failed += 1
-			# print(out.getvalue())
-		if failed:
-			print(f"\n\n-- {failed}/{total} TESTS FAILED --")
-		else:
-			print(f"\n\n-- {total}/{total} TESTS PASSED --")
+		failed = testing.run_tests(args.file or testing.TESTS, debug=args.verbose, engine=args.engine, opt_level=args.opt_level, cache=not args.no_cache, jobs=args.jobs, slowest=args.slowest, timeout=args.timeout)
+		sys.exit(1 if failed else 0)
 	"""
 	with open(args.file) as f:
 		mod = Module([])
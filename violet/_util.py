@@ -1,3 +1,5 @@
+import os
+
 class IndexableNamespace:
 	def __init__(self, **attrs):
 		# print(attrs)
@@ -16,3 +18,20 @@ def identify_as_violet():
 		func._0_identifies_as_violet = 1
 		return func
 	return outer
+
+def write_atomic(file, data):
+	# written beside the real file and renamed over it, so that another
+	# interpreter never reads half of it; failing to write is not an error,
+	# the callers only write caches
+	temp = f"{file}.{os.getpid()}"
+	try:
+		with open(temp, 'wb') as f:
+			f.write(data)
+		os.replace(temp, file)
+	except OSError:
+		try:
+			os.unlink(temp)
+		except OSError:
+			pass
+		return False
+	return True
@@ -0,0 +1,223 @@
+import argparse
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from violet import runner as runner_module
+from violet import vast as ast
+from violet.lexer import lexer
+from violet.optimizer import OPT_LEVELS, DEFAULT_OPT_LEVEL
+from violet.parser import parser
+from violet.runner import Runner, ENGINES
+
+# `python -m violet bench`: runs the programs in benchmarks/suite (and a large
+# generated one, which is mostly parsed) and times each phase of running them
+# separately: lexing, parsing, checking (resolving, optimising and
+# typechecking), executing the module's top level and calling main. The best
+# time of --repeat runs is kept for each phase; the peak memory traced by
+# tracemalloc comes from one more run, as tracing slows everything down.
+#
+# Results are written as JSON and compared with a baseline written by an
+# earlier run with --save-baseline: a phase that got slower (or a peak that
+# got bigger) by more than --threshold percent is a regression, and makes the
+# command exit with status 1. Phases faster than MIN_TIME and peaks smaller
+# than MIN_PEAK are too noisy to compare and are left out.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUITE = os.path.join(ROOT, 'benchmarks', 'suite')
+RESULTS_FILE = os.path.join(ROOT, 'benchmarks', 'results.json')
+BASELINE_FILE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+
+RESULTS_VERSION = 1
+
+PHASES = ('lex', 'parse', 'check', 'exec', 'main')
+
+# seconds
+MIN_TIME = 0.001
+# bytes
+MIN_PEAK = 1 << 16
+
+GENERATED = 'generated'
+
+FUNCTION = """\
+fun f_{name}(a: Integer, b: Integer): Integer {{
+	let total = a + b * 2;
+	let flag = total > 10 && a != b;
+	if (flag) {{
+		total = total - 1;
+	}} elseif (total == 0) {{
+		return 0;
+	}}
+	for (i in 0..b) {{
+		total = total + i;
+	}}
+	let label = total -> String;
+	return total % 7;
+}}
+"""
+
+parse = argparse.ArgumentParser(prog='python -m violet bench', description='Time the benchmark suite phase by phase and compare it with a baseline.')
+parse.add_argument('files', nargs='*', help='The programs to run (defaults to benchmarks/suite/*.vi)')
+parse.add_argument('-e', '--engine', action='append', choices=ENGINES, help='Engine to run (repeatable, defaults to all)')
+parse.add_argument('-O', '--opt-level', type=int, choices=OPT_LEVELS, default=DEFAULT_OPT_LEVEL, help='How much to optimise the programs before running them')
+parse.add_argument('-r', '--repeat', type=int, default=3, help='Runs per program, the best time of each phase is kept')
+parse.add_argument('-g', '--generated', type=int, default=500, metavar='FUNCTIONS', help='Functions in the generated program (0 to leave it out)')
+parse.add_argument('-o', '--output', default=RESULTS_FILE, help='Where to write the results')
+parse.add_argument('-b', '--baseline', default=BASELINE_FILE, help='The results to compare with, if the file exists')
+parse.add_argument('-t', '--threshold', type=float, default=20.0, help='Percent slower than the baseline that counts as a regression')
+parse.add_argument('--save-baseline', action='store_true', help='Write the results to the baseline as well')
+
+# the generated program is also what the scripts in benchmarks/ parse, load
+# and run when they need a large one
+
+def name(i):
+	# identifiers can't contain digits
+	return ''.join(chr(ord('a') + int(d)) for d in str(i))
+
+def generate(directory, functions):
+	# writes a program of `functions` copies of FUNCTION and a main calling
+	# f_a, returning its path
+	file = os.path.join(directory, GENERATED + '.vi')
+	with open(file, 'w') as f:
+		f.write('import { print } from std;\n\n')
+		f.write(''.join(FUNCTION.format(name=name(i)) for i in range(functions)))
+		f.write(f'fun main() {{\n\tprint(f_{name(0)}(3, 4)->String);\n}}\n')
+	return file
+
+def run_once(file, engine, opt_level):
+	# returns the time each phase took
+	with open(file) as f:
+		code = f.read()
+	runner = Runner(code, filename=file, engine=engine, opt_level=opt_level, cache=False)
+	# each run imports its modules again
+	runner_module.MODULES.clear()
+	times = {}
+	start = time.perf_counter()
+	tokens = list(lexer.tokenize(code))
+	times['lex'] = time.perf_counter() - start
+	if lexer.errors:
+		raise Exception(f'{file}:{lexer.errors[0][0]}: {lexer.errors[0][1]}')
+
+	start = time.perf_counter()
+	body = parser.parse(iter(tokens))
+	times['parse'] = time.perf_counter() - start
+	if parser._error_list:
+		error = parser._error_list[0]
+		parser._error_list.clear()
+		raise Exception(f'{file}:{error.lineno}: unexpected {error.value!r}')
+
+	start = time.perf_counter()
+	module = runner.check_module(ast.Module(body or []))
+	times['check'] = time.perf_counter() - start
+
+	start = time.perf_counter()
+	runner.exec_module(module)
+	times['exec'] = time.perf_counter() - start
+
+	start = time.perf_counter()
+	runner.run()
+	times['main'] = time.perf_counter() - start
+	return times
+
+def measure(file, engine, opt_level, repeat):
+	# local imports are found relative to the working directory
+	cwd = os.getcwd()
+	os.chdir(os.path.dirname(file))
+	try:
+		with redirect_stdout(io.StringIO()):
+			best = run_once(file, engine, opt_level)
+			for _ in range(repeat - 1):
+				times = run_once(file, engine, opt_level)
+				best = {phase: min(best[phase], times[phase]) for phase in PHASES}
+			tracemalloc.start()
+			try:
+				run_once(file, engine, opt_level)
+				best['peak'] = tracemalloc.get_traced_memory()[1]
+			finally:
+				tracemalloc.stop()
+	finally:
+		os.chdir(cwd)
+	return best
+
+def compare(results, baseline, threshold):
+	# returns (engine, program, phase, baseline, result) for every regression
+	regressions = []
+	limit = 1 + threshold / 100
+	for engine, programs in results['engines'].items():
+		for program, phases in programs.items():
+			before = baseline.get('engines', {}).get(engine, {}).get(program)
+			if before is None:
+				continue
+			for phase, value in phases.items():
+				old = before.get(phase)
+				if old is None or max(old, value) < (MIN_TIME if phase in PHASES else MIN_PEAK):
+					continue
+				if value > old * limit:
+					regressions.append((engine, program, phase, old, value))
+	return regressions
+
+def show(phase, value):
+	if phase == 'peak':
+		return f'{value / 1024:.0f} KiB'
+	return f'{value * 1e3:.1f}ms'
+
+def main(argv):
+	args = parse.parse_args(argv)
+	files = [os.path.abspath(file) for file in args.files] or sorted(glob.glob(os.path.join(SUITE, '[!_]*.vi')))
+	engines = args.engine or ENGINES
+	directory = tempfile.mkdtemp()
+	try:
+		if args.generated > 0:
+			files.append(generate(directory, args.generated))
+		results = {
+			'version': RESULTS_VERSION,
+			'python': platform.python_version(),
+			'opt_level': args.opt_level,
+			'repeat': args.repeat,
+			'engines': {},
+		}
+		print(f"{'':<14}" + ''.join(f'{phase:>10}' for phase in PHASES) + f"{'peak':>12}")
+		for engine in engines:
+			print(engine)
+			programs = results['engines'][engine] = {}
+			for file in files:
+				program = os.path.splitext(os.path.basename(file))[0]
+				try:
+					phases = measure(file, engine, args.opt_level, args.repeat)
+				except SystemExit:
+					print(f"  {program:<12}FAILED")  # the error is printed already
+					return 1
+				programs[program] = phases
+				print(f"  {program:<12}" + ''.join(f'{show(phase, phases[phase]):>10}' for phase in PHASES) + f"{show('peak', phases['peak']):>12}")
+	finally:
+		shutil.rmtree(directory)
+
+	with open(args.output, 'w') as f:
+		json.dump(results, f, indent='\t')
+	if args.save_baseline:
+		shutil.copyfile(args.output, args.baseline)
+		print(f"\nbaseline written to {os.path.relpath(args.baseline)}")
+		return 0
+	if not os.path.exists(args.baseline):
+		return 0
+	with open(args.baseline) as f:
+		baseline = json.load(f)
+	if baseline.get('version') != RESULTS_VERSION or baseline.get('opt_level') != args.opt_level:
+		print(f"\nbaseline {os.path.relpath(args.baseline)} is not comparable with these results", file=sys.stderr)
+		return 1
+	regressions = compare(results, baseline, args.threshold)
+	if not regressions:
+		print(f"\nno regressions against {os.path.relpath(args.baseline)} (threshold {args.threshold:g}%)")
+		return 0
+	print(f"\n{len(regressions)} regressions against {os.path.relpath(args.baseline)} (threshold {args.threshold:g}%):")
+	for engine, program, phase, old, new in regressions:
+		print(f"  {engine}/{program} {phase}: {show(phase, old)} -> {show(phase, new)} (+{(new / old - 1) * 100:.0f}%)")
+	return 1
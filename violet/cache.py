@@ -0,0 +1,55 @@
+import functools
+import glob
+import hashlib
+import os
+import pickle
+import sys
+
+from violet._util import write_atomic
+
+# Parsed modules are kept in a __vicache__ directory beside their source, one
+# file per source file and optimisation level, like __pycache__. A cache file
+# starts with MAGIC and a key made from the source and the interpreter that
+# parsed it, and holds the checked module with the resolver's warnings. It is
+# only used when the key matches; a stale or unreadable file is parsed again
+# and overwritten.
+
+CACHE_DIR = '__vicache__'
+MAGIC = b'VIC\x01'
+KEY_SIZE = hashlib.sha256().digest_size
+
+@functools.lru_cache(maxsize=None)
+def interpreter_version():
+	# the interpreter's own source: any change to it may change the AST
+	digest = hashlib.sha256(sys.version.encode())
+	for file in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+		with open(file, 'rb') as f:
+			digest.update(f.read())
+	return digest.digest()
+
+def cache_key(code):
+	return hashlib.sha256(interpreter_version() + code.encode()).digest()
+
+def cache_file(filename, opt_level):
+	head, tail = os.path.split(filename)
+	return os.path.join(head, CACHE_DIR, f"{os.path.splitext(tail)[0]}.O{opt_level}.vic")
+
+def load(file, key):
+	try:
+		with open(file, 'rb') as f:
+			if f.read(len(MAGIC)) != MAGIC or f.read(KEY_SIZE) != key:
+				return None
+			return pickle.load(f)
+	except Exception:
+		return None
+
+def save(file, key, warnings, module):
+	try:
+		data = pickle.dumps((warnings, module), pickle.HIGHEST_PROTOCOL)
+	except (pickle.PicklingError, RecursionError):
+		return False
+	try:
+		os.makedirs(os.path.dirname(file) or '.', exist_ok=True)
+	except OSError:
+		return False
+	return write_atomic(file, MAGIC + key + data)
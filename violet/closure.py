@@ -0,0 +1,542 @@
+import ast as pyast
+
+from violet import vast as ast
+from violet import objects
+from violet.errors import *
+from violet.resolver import Frame, GLOBAL, BUILTIN
+
+# Compiles vast function bodies once into trees of pre-bound closures. Every
+# node type is dispatched a single time, at compile time; the closures that
+# come out of it only ever call each other.
+#
+# Every closure takes the resolver.Frame it runs in. Variables are read from
+# and written to the frame slots chosen by the resolver.
+#
+# Given the violet.hooks.Hooks of the runner, functions, their frames and
+# statements are compiled wrapped in closures calling them; without, nothing
+# is wrapped.
+
+class ClosureCompiler:
+	def __init__(self, hooks=None):
+		self.hooks = hooks
+		self._exprs = {
+			ast.Primitive: self._compile_primitive,
+			ast.Constant: self._compile_constant,
+			ast.Identifier: self._compile_load,
+			ast.TernaryQMark: self._compile_ternary,
+			ast.FunctionCall: self._compile_call,
+			ast.Cast: self._compile_cast,
+			ast.TypeId: self._compile_type,
+			ast.BiOperatorExpr: self._compile_binary,
+			ast.NilOrElse: self._compile_nil_or_else,
+			ast.LogicalAnd: self._compile_logical,
+			ast.LogicalOr: self._compile_logical,
+			ast.Lambda: self._compile_lambda,
+		}
+		self._stmts = {
+			ast.Assignment: self._compile_assignment,
+			ast.Reassignment: self._compile_reassignment,
+			ast.Return: self._compile_return,
+			ast.Break: self._compile_break,
+			ast.Continue: self._compile_continue,
+			ast.FunctionCall: self._compile_call_stmt,
+			ast.IfControl: self._compile_if,
+			ast.ForControl: self._compile_for,
+		}
+		self._module_stmts = {
+			ast.Import: self._compile_import,
+			ast.Assignment: self._compile_assignment,
+			ast.Reassignment: self._compile_reassignment,
+			ast.Function: self._compile_function_def,
+		}
+
+	def compile_module(self, module):
+		return self.compile_body(module.body, self._module_stmts)
+
+	def compile_function(self, params, body, size):
+		if body and not isinstance(body[-1], ast.Return):
+			# objects.Function appends the same implicit `return nil`
+			body = [*body, ast.Return(None, body[-1].lineno, implicit=True)]
+		run = self.compile_body(body)
+		hooks = self.hooks
+		if hooks is not None:
+			run = self._hook_frame(run)
+		params = [(param.name.slot, self._compile_type_check(param.type)) for param in params]
+
+		def call(function, args, checked=False):
+			closure = function.closure
+			frame = Frame(closure.runner, function, closure, size)
+			slots = frame.slots
+			if checked:
+				for (slot, check), value in zip(params, args):
+					slots[slot] = value
+			else:
+				if len(args) < len(params):
+					raise Exception("not enough arguments for function call")
+				for i, value in enumerate(args):
+					if i == len(params):
+						raise Exception("too many arguments for function call")
+					slot, check = params[i]
+					check(value, frame)
+					slots[slot] = value
+			signal = run(frame)
+			if signal is BREAK:
+				raise Exception("unexpected \"break\" statement at this time")
+			elif signal is CONTINUE:
+				raise Exception("unexpected \"continue\" statement at this time")
+			return signal
+
+		if hooks is None:
+			return call
+
+		def hooked(function, args, checked=False):
+			runner = function.closure.runner
+			for hook in hooks.on_call:
+				hook(runner, function, args)
+			value = call(function, args, checked)
+			for hook in hooks.on_return:
+				hook(runner, function, value)
+			return value
+
+		return hooked
+
+	def _hook_frame(self, run):
+		hooks = self.hooks
+
+		def hooked(frame):
+			for hook in hooks.on_scope_enter:
+				hook(frame.runner, frame)
+			try:
+				return run(frame)
+			finally:
+				for hook in hooks.on_scope_exit:
+					hook(frame.runner, frame)
+
+		return hooked
+
+	def compile_body(self, body, compilers=None):
+		steps = [(stmt, self.compile_stmt(stmt, compilers)) for stmt in body]
+		if self.hooks is not None:
+			steps = [(stmt, self._hook_stmt(stmt, step)) for stmt, step in steps]
+
+		def run(frame):
+			# returns the completion signal of the body, like
+			# Runner.exec_function_body
+			try:
+				for stmt, step in steps:
+					signal = step(frame)
+					if signal is not None:
+						return signal
+			except StatementError:
+				raise
+			except Exception as e:
+				raise StatementError(stmt, str(e))
+
+		return run
+
+	def _hook_stmt(self, stmt, step):
+		if stmt.__class__ is ast.Return and stmt.implicit:
+			return step
+		hooks = self.hooks.on_statement
+
+		def run(frame):
+			for hook in hooks:
+				hook(frame.runner, stmt)
+			return step(frame)
+
+		return run
+
+	def compile_stmt(self, stmt, compilers=None):
+		compiler = (compilers or self._stmts).get(stmt.__class__)
+		if compiler is None:
+			return self._compile_unexpected(stmt)
+		return compiler(stmt)
+
+	def compile_expr(self, expr):
+		compiler = self._exprs.get(expr.__class__)
+		if compiler is None:
+			# rarely evaluated nodes (attributes, subscripts) keep their
+			# tree-walking implementation
+			return lambda frame: expr.eval(frame.runner)
+		return compiler(expr)
+
+	# variables
+
+	def _compile_load(self, identifier):
+		name = identifier.name
+		depth = identifier.depth
+		if depth == BUILTIN:
+			value = objects.STD_TYPES[name]
+			return lambda frame: value
+		elif depth == GLOBAL:
+			def load(frame):
+				runner = frame.runner
+				value = runner.global_scope.vars.get(name)
+				if value is None:
+					value = runner.get_import(name)
+					if value is None:
+						raise VarNotFound(identifier)
+				return value
+			return load
+
+		slot = identifier.slot
+		if depth == 0:
+			return lambda frame: frame.slots[slot]
+		elif depth == 1:
+			return lambda frame: frame.parent.slots[slot]
+
+		def load(frame):
+			for _ in range(depth):
+				frame = frame.parent
+			return frame.slots[slot]
+		return load
+
+	def _compile_type(self, typ):
+		name = typ.name
+		if isinstance(name, ast.Subscript):
+			name = name.name
+		return self.compile_expr(name)
+
+	def _compile_type_check(self, typ):
+		load = self._compile_type(typ)
+
+		def check(value, frame):
+			expected = load(frame)
+			if not isinstance(value, expected):
+				raise Exception(f"invalid type {value.__class__.__name__!r} for function call (expected {expected.__name__!r})")
+
+		return check
+
+	# statements
+
+	def _compile_unexpected(self, stmt):
+		def run(frame):
+			raise StatementError(stmt, f'unexpected {stmt.__class__.__name__!r} statement')
+		return run
+
+	def _compile_import(self, stmt):
+		def run(frame):
+			frame.runner._exec_import(stmt)
+		return run
+
+	def _compile_function_def(self, stmt):
+		call = self.compile_function(stmt.params, stmt.body, stmt.frame_size)
+		identifier = stmt.name
+
+		def run(frame):
+			func = objects.Function(stmt, call, frame)
+			frame.runner.get_current_scope().set_var(identifier, func)
+
+		return run
+
+	def _compile_assignment(self, stmt):
+		expression = self.compile_expr(stmt.expression)
+		check = self._compile_type_check(stmt.type) if stmt.type is not None and not stmt.checked else None
+		identifier = stmt.identifier
+		const = stmt.constant
+
+		if identifier.depth == GLOBAL:
+			def run(frame):
+				value = expression(frame)
+				if check is not None:
+					check(value, frame)
+				frame.runner.global_scope.set_var(identifier, value, const=const)
+			return run
+
+		slot = identifier.slot
+
+		def run(frame):
+			value = expression(frame)
+			if check is not None:
+				check(value, frame)
+			frame.slots[slot] = value
+
+		return run
+
+	def _compile_reassignment(self, stmt):
+		expression = self.compile_expr(stmt.expression)
+		identifier = stmt.identifier
+		checked = stmt.checked
+
+		if identifier.depth == GLOBAL:
+			def run(frame):
+				scope = frame.runner.global_scope
+				value = expression(frame)
+				if not scope.is_var_assigned(identifier):
+					raise StatementError(stmt, f'variable {identifier.name!r} is not defined')
+				scope.reassign_var(identifier, value, checked=checked)
+			return run
+
+		slot = identifier.slot
+		depth = identifier.depth
+		if depth > 0:
+			# a variable of the function, from a loop frame
+			def run(frame):
+				value = expression(frame)
+				for _ in range(depth):
+					frame = frame.parent
+				slots = frame.slots
+				orig = slots[slot]
+				if not checked and not isinstance(value, orig.__class__):
+					raise Exception(f"invalid type {value.__class__.__name__!r} for function call (expected {orig.__class__.__name__!r})")
+				slots[slot] = value
+			return run
+		if checked:
+			def run(frame):
+				frame.slots[slot] = expression(frame)
+			return run
+
+		def run(frame):
+			value = expression(frame)
+			slots = frame.slots
+			orig = slots[slot]
+			if not isinstance(value, orig.__class__):
+				raise Exception(f"invalid type {value.__class__.__name__!r} for function call (expected {orig.__class__.__name__!r})")
+			slots[slot] = value
+
+		return run
+
+	def _compile_return(self, stmt):
+		expr = stmt.expr
+		if expr is None or isinstance(expr, objects.Void):
+			expression = None
+		else:
+			expression = self.compile_expr(expr)
+		if stmt.checked:
+			if expression is None:
+				return lambda frame: objects.NIL
+			return expression
+
+		def run(frame):
+			ret = objects.NIL if expression is None else expression(frame)
+			func = frame.func
+			if func.return_type is None:
+				if not isinstance(ret, objects.Object):
+					ret = frame.runner.wrap_py_type(ret)
+				func.return_type = ret.get_type()
+			func.return_type.type_check(ret, frame.runner)
+			return ret
+
+		return run
+
+	def _compile_break(self, stmt):
+		return lambda frame: BREAK
+
+	def _compile_continue(self, stmt):
+		return lambda frame: CONTINUE
+
+	def _compile_call_stmt(self, stmt):
+		call = self._compile_call(stmt)
+
+		def run(frame):
+			call(frame)
+
+		return run
+
+	def _compile_if(self, stmt):
+		branches = [(self.compile_expr(stmt.if_stmt.expr), self.compile_body(stmt.if_stmt.body))]
+		for elseif in stmt.elseif_chain or ():
+			branches.append((self.compile_expr(elseif.expr), self.compile_body(elseif.body)))
+		orelse = self.compile_body(stmt.else_stmt.body) if stmt.else_stmt else None
+
+		def run(frame):
+			for test, body in branches:
+				cond = test(frame)
+				if not isinstance(cond, objects.Boolean):
+					raise Exception(f"unexpected type {cond.__class__.__name__!r} (expected \"Boolean\")")
+				if cond:
+					return body(frame)
+			if orelse is not None:
+				return orelse(frame)
+
+		return run
+
+	def _compile_for(self, stmt):
+		iterable = self.compile_expr(stmt.expr)
+		body = self.compile_body(stmt.body)
+		slot = stmt.name.slot
+		size = stmt.frame_size
+		if size is not None:
+			return self._compile_framed_for(iterable, body, slot, size)
+
+		def run(frame):
+			it = iterable(frame)
+			try:
+				it = iter(it)
+			except TypeError:
+				raise Exception(f"cannot loop over non-iterable type {it.__class__.__name__!r}")
+			slots = frame.slots
+			for i in it:
+				slots[slot] = i
+				signal = body(frame)
+				if signal is not None:
+					if signal is BREAK:
+						break
+					if signal is not CONTINUE:
+						return signal
+
+		return run
+
+	def _compile_framed_for(self, iterable, body, slot, size):
+		# every iteration runs in a frame of its own (see violet.resolver)
+		def run(frame):
+			it = iterable(frame)
+			try:
+				it = iter(it)
+			except TypeError:
+				raise Exception(f"cannot loop over non-iterable type {it.__class__.__name__!r}")
+			runner = frame.runner
+			func = frame.func
+			for i in it:
+				inner = Frame(runner, func, frame, size)
+				inner.slots[slot] = i
+				signal = body(inner)
+				if signal is not None:
+					if signal is BREAK:
+						break
+					if signal is not CONTINUE:
+						return signal
+
+		return run
+
+	# expressions
+
+	def _compile_primitive(self, expr):
+		typ = expr.type
+		if typ is objects.Void:
+			return lambda frame: objects.NIL
+		elif typ is objects.Boolean:
+			value = expr.value == 'true'
+		elif typ is objects.Integer:
+			value = int(expr.value)
+		elif typ is objects.String:
+			value = pyast.literal_eval(expr.value)
+		elif typ is objects.List:
+			return self._compile_list(expr)
+		else:
+			raise Exception(typ)
+		return lambda frame: typ(value)
+
+	def _compile_constant(self, expr):
+		value = expr.value
+		return lambda frame: value
+
+	def _compile_list(self, expr):
+		items = [self.compile_expr(item) for item in expr.value]
+
+		def run(frame):
+			if not items:
+				raise Exception("cannot infer type of empty list")
+			initial = None
+			values = []
+			for item in items:
+				value = item(frame)
+				if initial is None:
+					initial = value.__class__
+				elif not isinstance(value, initial):
+					raise Exception(f"multi-typed lists are invalid (found {value.__class__.__name__!r}, expected {initial.__name__!r})")
+				values.append(value)
+			return objects.List.from_values0(initial, values)
+
+		return run
+
+	def _compile_ternary(self, expr):
+		test = self.compile_expr(expr.expr0)
+		left = self.compile_expr(expr.expr1)
+		right = self.compile_expr(expr.expr2)
+
+		def run(frame):
+			q = test(frame)
+			if not isinstance(q, objects.Boolean):
+				raise Exception(f"expected \"Boolean\" in ternary, found {q.__class__.__name__!r}")
+			if q.value0:
+				return left(frame)
+			return right(frame)
+
+		return run
+
+	def _compile_call(self, expr):
+		load = self._compile_load(expr.name.get_top_level_name())
+		attrs = expr.attrs
+		args = [self.compile_expr(arg) for arg in expr.args]
+		checked = expr.checked
+		cache = expr._cache
+
+		def run(frame):
+			obj = load(frame)
+			if obj is cache.target:
+				obj, kind = cache.callee, cache.kind
+			else:
+				obj, kind = cache.resolve(obj, attrs)
+
+			transformed = [arg(frame) for arg in args]
+			if kind == objects.CALL_FUNCTION:
+				if obj.code is not None:
+					return obj.code(obj, transformed, checked)
+				return obj.call0(transformed, frame.runner, checked)
+			elif kind == objects.CALL_PYTHON:
+				return obj(*transformed)
+			return obj(transformed, runner=frame.runner)
+
+		return run
+
+	def _compile_cast(self, expr):
+		value = self.compile_expr(expr.expr)
+		typ = self.compile_expr(expr.type)
+
+		def run(frame):
+			obj = value(frame)
+			t = typ(frame)
+			if isinstance(obj, type):
+				return obj.class_cast0(t)
+			return obj.cast0(t)
+
+		return run
+
+	def _compile_binary(self, expr):
+		left = self.compile_expr(expr.left)
+		right = self.compile_expr(expr.right)
+		cache = expr._cache
+
+		def run(frame):
+			l = left(frame)
+			r = right(frame)
+			if l.__class__ is cache.cls:
+				return cache.func(l, r)
+			return cache.miss(l, r)
+
+		return run
+
+	def _compile_nil_or_else(self, expr):
+		left = self.compile_expr(expr.expr0)
+		right = self.compile_expr(expr.expr1)
+
+		def run(frame):
+			l = left(frame)
+			if isinstance(l, objects.Void):
+				return right(frame)
+			return l
+
+		return run
+
+	def _compile_logical(self, expr):
+		left = self.compile_expr(expr.expr0)
+		right = self.compile_expr(expr.expr1)
+		symbol = expr.symbol
+		short = expr.__class__ is ast.LogicalOr  # the value of the left operand that short-circuits
+
+		def run(frame):
+			l = ast.check_logical(left(frame), symbol)
+			if l.value0 is short:
+				return l
+			return ast.check_logical(right(frame), symbol)
+
+		return run
+
+	def _compile_lambda(self, expr):
+		call = self.compile_function(expr.params, expr.returns(), expr.frame_size)
+
+		def run(frame):
+			return objects.Lambda(expr, call, frame)
+
+		return run
@@ -1,19 +1,33 @@
 class Panic(BaseException):
 	pass	
 
+class VarNotFound(Exception):
+	def __init__(self, var):
+		super().__init__(f"variable {var.name!r} is not defined")
+
+class CannotReassignConst(Exception):
+	def __init__(self, var):
+		super().__init__(f"constant variable {var.name!r} cannot be reassigned")
+
+class CannotReassignImport(Exception):
+	def __init__(self, var):
+		super().__init__(f"imported variable {var.name!r} cannot be reassigned")
+
 class StatementError(Exception):
 	def __init__(self, stmt, msg):
 		super().__init__(msg)
 		self.stmt = stmt
 
-class _Exit(Exception):
-	pass
+class _Signal:
+	__slots__ = 'name',
 
-class ReturnExit(_Exit):
-	pass
+	def __init__(self, name):
+		self.name = name
 
-class BreakExit(_Exit):
-	pass
+	def __repr__(self):
+		return self.name
 
-class ContinueExit(_Exit):
-	pass
+# completion signals of the statements in a function body; a statement that
+# finishes normally returns None, and `return` returns its value
+BREAK = _Signal('BREAK')
+CONTINUE = _Signal('CONTINUE')
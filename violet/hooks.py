@@ -0,0 +1,55 @@
+# Execution event hooks: callables a Runner calls as it executes, for tracers,
+# coverage collectors, debuggers and violet.profiler. Every hook is called
+# with the runner it fired in first:
+#
+#   call(runner, func, args)          a Violet function or lambda starts,
+#                                     with the arguments it was passed
+#   return(runner, func, value)       it returns value (not when it raises)
+#   statement(runner, stmt)           a statement of a function or module
+#                                     starts
+#   scope_enter(runner, scope)        a scope is entered: a module's global
+#   scope_exit(runner, scope)         scope while its top level runs, then a
+#                                     runner.Scope for every function call
+#                                     and block of the tree engine, or a
+#                                     resolver.Frame for every function call
+#                                     of the closure and vm engines
+#   import(runner, stmt, module)      an import statement bound its names;
+#                                     module is the imported module's Runner,
+#                                     or the Python module of a std import
+#
+# A runner without hooks runs exactly the code it would if this module did
+# not exist: adding the first hook switches the runner (and the closure and
+# vm code it compiles from then on) to instrumented versions of its execution
+# paths, and removing the last switches it back. Hooks have to be added before
+# a module runs to see its events under the closure and vm engines, which
+# compile the module when it starts.
+
+EVENTS = ('call', 'return', 'statement', 'scope_enter', 'scope_exit', 'import')
+
+class Hooks:
+	__slots__ = tuple('on_' + event for event in EVENTS)
+
+	def __init__(self):
+		for event in EVENTS:
+			setattr(self, 'on_' + event, [])
+
+	def __repr__(self):
+		counts = ', '.join(f'{event}={len(getattr(self, "on_" + event))}' for event in EVENTS)
+		return f'Hooks({counts})'
+
+	def __bool__(self):
+		return any(getattr(self, 'on_' + event) for event in EVENTS)
+
+	def _hooks(self, event):
+		if event not in EVENTS:
+			raise ValueError(f"unknown event {event!r} (expected one of {', '.join(EVENTS)})")
+		return getattr(self, 'on_' + event)
+
+	def add(self, event, hook):
+		self._hooks(event).append(hook)
+
+	def remove(self, event, hook):
+		hooks = self._hooks(event)
+		if hook not in hooks:
+			raise ValueError(f"{hook!r} is not a hook of event {event!r}")
+		hooks.remove(hook)
@@ -1,143 +1,148 @@
-import sys
-from sly import Lexer
-
-class VioletLexer(Lexer):
-	tokens = {
-		CAST,
-
-		ANON_CHECK,
-
-		PLUS,
-		MINUS,
-		MULTIPLY,
-		DIVIDE,
-		MODULUS,
-
-		EQ,
-		NE,
-		GE,
-		GT,
-		LE,
-		LT,
-
-		EOS,
-		EQUALS,
-		COLON,
-		DQMARK,
-		QMARK,
-
-		BLOCK_OPEN,
-		BLOCK_CLOSE,
-		PAREN_OPEN,
-		PAREN_CLOSE,
-		BRACK_OPEN,
-		BRACK_CLOSE,
-
-		RANGE,
-		ATTR,
-		COMMA,
-
-		IDENTIFIER,
-
-		SCOPE,
-
-		IMPORT,
-		FROM,
-		CONST,
-		FUN,
-
-		RETURN,
-		BREAK,
-		CONTINUE,
-
-		TRUE,
-		FALSE,
-		NIL,
-
-		IF,
-		ELSEIF,
-		ELSE,
-		FOR,
-		IN,
-
-		DECIMAL,
-		STRING,
-	}
-	ignore_comment = r"//.*"
-
-	CAST = '->'
-
-	ANON_CHECK = r"=>"
-
-	PLUS = r'\+'
-	MINUS = r'-'
-	MULTIPLY = r'\*'
-	DIVIDE = r'/'
-	MODULUS = '%'
-
-	EQ = '=='
-	NE = '!='
-	GE = '>='
-	GT = '>'
-	LE = '<='
-	LT = '<'
-
-	EOS = ';'
-	EQUALS = '='
-	COLON = ':'
-	DQMARK = r'\?\?'
-	QMARK = r'\?'
-
-	BLOCK_OPEN = '{'
-	BLOCK_CLOSE = '}'
-	PAREN_OPEN = r'\('
-	PAREN_CLOSE = r'\)'
-	BRACK_OPEN = r'\['
-	BRACK_CLOSE = r'\]'
-
-	RANGE = r'\.\.'
-	ATTR = r'\.'
-	COMMA = ','
-
-	IDENTIFIER = r'[a-zA-Z_]+'
-
-	IDENTIFIER['let'] = SCOPE
-	IDENTIFIER['put'] = SCOPE
-
-	IDENTIFIER['import'] = IMPORT
-	IDENTIFIER['from'] = FROM
-	IDENTIFIER['const'] = CONST
-	IDENTIFIER['fun'] = FUN
-
-	IDENTIFIER['return'] = RETURN
-	IDENTIFIER['break'] = BREAK
-	IDENTIFIER['continue'] = CONTINUE
-
-	IDENTIFIER['true'] = TRUE
-	IDENTIFIER['false'] = FALSE
-	IDENTIFIER['nil'] = NIL
-
-	IDENTIFIER['if'] = IF
-	IDENTIFIER['elseif'] = ELSEIF
-	IDENTIFIER['else'] = ELSE
-	IDENTIFIER['for'] = FOR
-	IDENTIFIER['in'] = IN
-
-	# BINARY = r'0b[01]+'
-	DECIMAL = r'[0-9]+'
-	# HEXADECIMAL = r'0x[0-9a-fA-F]+'
-
-	STRING = r'".*?(?<!\\)(?:\\\\)*?"'
-
-	ignore = ' \t'
-
-	ignore_newline = r'\n+'
-	def ignore_newline(self, t):
-		self.lineno += t.value.count('\n')
-
-	def error(self, t):
-		print(f"ERROR:{self.lineno}: Illegal character {t.value[0]!r}")
-		# self.errok()
-		sys.exit(1)
-
-lexer = VioletLexer()
+import re
+
+from sly.lex import Token
+
+# Tokens never span lines, so a source is scanned by a single regular
+# expression with one alternative per kind of token: a whole string at once, or
+# a file a block of lines at a time. Illegal characters are collected in
+# `errors` and skipped, so every one of them is reported after one pass.
+
+KEYWORDS = {
+	'let': 'SCOPE',
+	'put': 'SCOPE',
+
+	'import': 'IMPORT',
+	'from': 'FROM',
+	'const': 'CONST',
+	'fun': 'FUN',
+
+	'return': 'RETURN',
+	'break': 'BREAK',
+	'continue': 'CONTINUE',
+
+	'true': 'TRUE',
+	'false': 'FALSE',
+	'nil': 'NIL',
+
+	'if': 'IF',
+	'elseif': 'ELSEIF',
+	'else': 'ELSE',
+	'for': 'FOR',
+	'in': 'IN',
+}
+
+OPERATORS = {
+	'->': 'CAST',
+
+	'=>': 'ANON_CHECK',
+
+	'+': 'PLUS',
+	'-': 'MINUS',
+	'*': 'MULTIPLY',
+	'/': 'DIVIDE',
+	'%': 'MODULUS',
+
+	'==': 'EQ',
+	'!=': 'NE',
+	'>=': 'GE',
+	'>': 'GT',
+	'<=': 'LE',
+	'<': 'LT',
+
+	';': 'EOS',
+	'=': 'EQUALS',
+	':': 'COLON',
+	'??': 'DQMARK',
+	'?': 'QMARK',
+	'&&': 'AND',
+	'||': 'OR',
+
+	'{': 'BLOCK_OPEN',
+	'}': 'BLOCK_CLOSE',
+	'(': 'PAREN_OPEN',
+	')': 'PAREN_CLOSE',
+	'[': 'BRACK_OPEN',
+	']': 'BRACK_CLOSE',
+
+	'..': 'RANGE',
+	'.': 'ATTR',
+	',': 'COMMA',
+}
+
+TOKENS = {*KEYWORDS.values(), *OPERATORS.values(), 'IDENTIFIER', 'DECIMAL', 'STRING'}
+
+# the type of every name and operator that isn't an IDENTIFIER
+_TYPES = {**KEYWORDS, **OPERATORS}
+
+_TOKEN = re.compile(r'[ \t\r]*(?:{})'.format('|'.join((
+	r'(?P<COMMENT>//.*)',
+	# names and operators, longest operators first so '..' is not read as two '.'
+	'(?P<WORD>[a-zA-Z_]+|{})'.format('|'.join(map(re.escape, sorted(OPERATORS, key=len, reverse=True)))),
+	r'(?P<DECIMAL>[0-9]+)',
+	r'(?P<STRING>"(?:[^"\\\n]|\\.)*")',
+	r'(?P<NEWLINE>\n+)',
+	r'(?P<ERROR>.)',
+	# whitespace ending the input, which would otherwise be given back to ERROR
+	'$',
+))))
+
+# dispatched on by number, which is faster than by name
+_COMMENT, _WORD, _DECIMAL, _STRING, _NEWLINE, _ERROR = (
+	_TOKEN.groupindex[name] for name in ('COMMENT', 'WORD', 'DECIMAL', 'STRING', 'NEWLINE', 'ERROR')
+)
+
+# characters read from a file per scan (readlines' hint, rounded up to whole
+# lines)
+BLOCK_SIZE = 1 << 16
+
+class Tokenizer:
+	tokens = TOKENS
+
+	def __init__(self):
+		self.errors = []
+
+	def tokenize(self, source, lineno=1):
+		# source is a string or a file opened for reading text
+		self.errors.clear()
+		if isinstance(source, str):
+			yield from self._scan(source, lineno, 0)
+			return
+		index = 0
+		while True:
+			lines = source.readlines(BLOCK_SIZE)
+			if not lines:
+				break
+			block = ''.join(lines)
+			yield from self._scan(block, lineno, index)
+			lineno += len(lines)
+			index += len(block)
+
+	def _scan(self, text, lineno, offset):
+		types = _TYPES
+		for match in _TOKEN.finditer(text):
+			group = match.lastindex
+			if group == _WORD:
+				value = match[group]
+				type = types.get(value, 'IDENTIFIER')
+			elif group == _NEWLINE:
+				lineno += match.end() - match.start(group)
+				continue
+			elif group == _DECIMAL:
+				value = match[group]
+				type = 'DECIMAL'
+			elif group == _STRING:
+				value = match[group]
+				type = 'STRING'
+			elif group == _ERROR:
+				self.errors.append((lineno, f"Illegal character {match[group]!r}"))
+				continue
+			else:
+				continue
+			tok = Token()
+			tok.type = type
+			tok.value = value
+			tok.lineno = lineno
+			tok.index = offset + match.start(group)
+			yield tok
+
+lexer = Tokenizer()
@@ -1,3 +1,4 @@
+import array
 import inspect
 from violet.errors import *
 from violet._util import IndexableNamespace, identify_as_violet
@@ -21,6 +22,7 @@ _OPS = {
 	'range': '..',
 	'type_check': '=>'
 }
+_SYMBOLS = frozenset(_OPS.values())
 
 class _Meta(type):
 	def __new__(mcs, cname, bases, attrs):
@@ -32,13 +34,23 @@ class _Meta(type):
 				name = 'operator' + _OPS[op]
 				# print(cname, name)
 				new[name] = value
-		return super().__new__(mcs, cname, bases, new)
+		cls = super().__new__(mcs, cname, bases, new)
+		# per-type dispatch table, symbol -> function, so operators are found
+		# without building names or going through getattr
+		cls.operators0 = {}
+		for base in reversed(cls.__mro__):
+			for name, value in vars(base).items():
+				if name.startswith('operator') and name[8:] in _SYMBOLS:
+					cls.operators0[name[8:]] = value
+		return cls
 
 	def __repr__(cls):
 		# return cls.__module__ + '.' + cls.__name__
 		return cls.__name__
 
 class Object(metaclass=_Meta):
+	__slots__ = ()
+
 	def ensure_type(self, other):
 		return isinstance(other, self.__class__)
 
@@ -72,12 +84,7 @@ class Object(metaclass=_Meta):
 	def get_special_method(self, name):
 		# print(name)
 		# print(dir(self))
-		meth = getattr(self, 'operator'+name, None)
-		if meth is None:
-			raise Exception(f'operator{name} not available on type {self.__class__.__name__!r}')
-		if not inspect.ismethod(meth):
-			raise Panic(f"operator{name} not defined as a callable method")
-		return meth
+		return get_operator(self.__class__, name).__get__(self)
 
 	def __call__(self, args, *, runner):
 		return self.get_special_method('()')(args, runner=runner)
@@ -100,7 +107,104 @@ class Object(metaclass=_Meta):
 	def __le__(self, other):
 		return self.get_special_method('<=')(other)
 
+def get_operator(cls, name):
+	func = cls.operators0.get(name)
+	if func is None:
+		raise Exception(f'operator{name} not available on type {cls.__name__!r}')
+	if not inspect.isfunction(func):
+		raise Panic(f"operator{name} not defined as a callable method")
+	return func
+
+MAX_POLYMORPHIC = 4
+
+class OperatorCache:
+	# inline cache of a binary operator site, keyed on the class of the left
+	# operand (the one the operator is dispatched on): a single class until a
+	# second one shows up, then up to MAX_POLYMORPHIC of them
+	__slots__ = ('name', 'fallback', 'cls', 'func', 'funcs')
+
+	def __init__(self, name, fallback):
+		self.name = name
+		self.fallback = fallback  # for operands that are not violet objects
+		self.cls = None
+		self.func = None
+		self.funcs = None
+
+	def __repr__(self):
+		return f'operator{self.name}'
+
+	def __reduce__(self):
+		# pickled (into the AST cache) empty: what a site has seen is only
+		# valid for the run that saw it
+		return OperatorCache, (self.name, self.fallback)
+
+	def __call__(self, left, right):
+		if left.__class__ is self.cls:
+			return self.func(left, right)
+		return self.miss(left, right)
+
+	def miss(self, left, right):
+		cls = left.__class__
+		funcs = self.funcs
+		if funcs is not None:
+			func = funcs.get(cls)
+			if func is not None:
+				return func(left, right)
+		func = get_operator(cls, self.name) if isinstance(left, Object) else self.fallback
+		if self.cls is None:
+			self.cls = cls
+			self.func = func
+		elif funcs is None:
+			self.funcs = {cls: func}
+		elif len(funcs) < MAX_POLYMORPHIC:
+			funcs[cls] = func
+		return func(left, right)
+
+# calling conventions
+CALL_FUNCTION = 0  # Function.call0(args, runner, checked)
+CALL_VIOLET = 1    # obj(args, runner=runner), for objects and std builtins
+CALL_PYTHON = 2    # obj(*args)
+
+def call_kind(obj):
+	if isinstance(obj, Function):
+		return CALL_FUNCTION
+	viobj = getattr(obj, '__self__', None)
+	if viobj is not None:
+		viobj = issubclass(viobj, Object)
+	if viobj or hasattr(obj, '_0_identifies_as_violet'):
+		return CALL_VIOLET
+	return CALL_PYTHON
+
+class CallCache:
+	# inline cache of a call site: the callee found from the object its name
+	# was last bound to, and how to call it. Targets are compared by identity,
+	# so only rebinding the name makes the site look the callee up again
+	__slots__ = ('target', 'callee', 'kind')
+
+	def __init__(self):
+		self.target = None
+		self.callee = None
+		self.kind = None
+
+	def __reduce__(self):
+		return CallCache, ()
+
+	def resolve(self, target, attrs=()):
+		callee = target
+		for attr in attrs:
+			try:
+				callee = getattr(callee, attr)
+			except AttributeError:
+				raise HasNoAttribute(callee, attr)
+		kind = call_kind(callee)
+		self.target = target
+		self.callee = callee
+		self.kind = kind
+		return callee, kind
+
 class ThinPythonObjectWrapper:
+	__slots__ = ('obj',)
+
 	def __init__(self, obj):
 		self.obj = obj
 
@@ -119,6 +223,8 @@ class ThinPythonObjectWrapper:
 		return str(self.obj)
 
 class Module(Object):
+	__slots__ = ('module',)
+
 	def __init__(self, module):
 		self.module = module
 
@@ -135,6 +241,8 @@ class Module(Object):
 			raise HasNoAttribute(self, name)
 
 class Primitive(Object):
+	__slots__ = ('value0',)
+
 	def __init__(self, value):
 		self.value0 = value
 
@@ -166,9 +274,18 @@ class Primitive(Object):
 	def _operator_less_equal(self, other):
 		return Boolean(self.value0 <= other.value0)
 
+# Void, Boolean and small Integer values are interned: constructing one
+# returns the canonical instance, and __new__ does all of the initialising
+
 class Void(Primitive):
-	def __init__(self):
-		super().__init__(None)
+	__slots__ = ()
+	__init__ = object.__init__
+
+	def __new__(cls):
+		return NIL
+
+	def __getnewargs__(self):
+		return ()
 
 	def __eq__(self, other):
 		return isinstance(other, Void)
@@ -186,6 +303,15 @@ class Void(Primitive):
 			raise Exception(f"cannot cast {self.__class__.__name__!r} to type {type.__name__!r}")
 
 class Boolean(Primitive):
+	__slots__ = ()
+	__init__ = object.__init__
+
+	def __new__(cls, value):
+		return TRUE if value else FALSE
+
+	def __getnewargs__(self):
+		return (self.value0,)
+
 	def __bool__(self):
 		return self.value0
 
@@ -201,6 +327,8 @@ class Boolean(Primitive):
 			raise Exception(f"cannot cast {self.__class__.__name__!r} to type {type.__name__!r}")
 
 class String(Primitive):
+	__slots__ = ()
+
 	@identify_as_violet()
 	@classmethod
 	def new(cls, value, *, runner=None):
@@ -223,6 +351,19 @@ class String(Primitive):
 			raise Exception(f"cannot cast {self.__class__.__name__!r} to type {type.__name__!r}")
 
 class Integer(Primitive):
+	__slots__ = ()
+	__init__ = object.__init__
+
+	def __new__(cls, value):
+		if _SMALL_LOW <= value < _SMALL_HIGH and cls is Integer:
+			return _SMALL[value - _SMALL_LOW]
+		self = object.__new__(cls)
+		self.value0 = value
+		return self
+
+	def __getnewargs__(self):
+		return (self.value0,)
+
 	def _operator_plus(self, other):
 		if not self.ensure_type(other):
 			raise Exception(f'operator+ not applicable between types {self.__class__.__name__!r} and {other.__class__.__name__!r}')
@@ -245,7 +386,7 @@ class Integer(Primitive):
 
 	def _operator_modulus(self, other):
 		if not self.ensure_type(other):
-			raise Exception(f'operator/ not applicable between types {self.__class__.__name__!r} and {other.__class__.__name__!r}')
+			raise Exception(f'operator% not applicable between types {self.__class__.__name__!r} and {other.__class__.__name__!r}')
 		return self.__class__(self.value0 % other.value0)
 
 	def _operator_cast(self, type):
@@ -261,87 +402,321 @@ class Integer(Primitive):
 	def _operator_range(self, other):
 		if not self.ensure_type(other):
 			raise Exception(f'operator.. not applicable between types {self.__class__.__name__!r} and {other.__class__.__name__!r}')
-		l = [self.__class__(i) for i in range(self.value0, other.value0)]
-		return List(l)
+		return List(Range(self.__class__, self.value0, other.value0))
+
+class Range:
+	# the value of a `a..b` List: Integers made on demand instead of a list of
+	# all of them
+	__slots__ = ('cls', 'start', 'stop')
+
+	def __init__(self, cls, start, stop):
+		self.cls = cls
+		self.start = start
+		self.stop = stop
+
+	def __repr__(self):
+		return f'Range({self.start}, {self.stop})'
+
+	def __str__(self):
+		# as the List of its Integers would be
+		return '[' + ', '.join(map(str, range(self.start, self.stop))) + ']'
+
+	def __iter__(self):
+		# the counter is a range, so looping allocates nothing but the Integers
+		return map(self.cls, range(self.start, self.stop))
+
+	def __len__(self):
+		return max(self.stop - self.start, 0)
+
+	def __contains__(self, value):
+		return isinstance(value, self.cls) and self.start <= value.value0 < self.stop
+
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			items = range(self.start, self.stop)[idx]
+			if items.step == 1:
+				return Range(self.cls, items.start, items.stop)
+			return list(map(self.cls, items))
+		if idx < 0:
+			idx += len(self)
+		if not 0 <= idx < len(self):
+			raise IndexError('range index out of range')
+		return self.cls(self.start + idx)
+
+	# comparisons between two ranges only look at their bounds, others stop at
+	# the first Integers that differ
+
+	def _key(self):
+		# Lists are ordered by their first Integer and then their length, an
+		# empty one first
+		return (self.start, len(self)) if len(self) else ()
+
+	def _differ(self, other):
+		for value, other_value in zip(self, other):
+			if not value == other_value:
+				return value, other_value
+		return None
+
+	def __eq__(self, other):
+		if isinstance(other, Range):
+			return self._key() == other._key()
+		return len(self) == len(other) and self._differ(other) is None
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __gt__(self, other):
+		if isinstance(other, Range):
+			return self._key() > other._key()
+		pair = self._differ(other)
+		return pair[0] > pair[1] if pair else len(self) > len(other)
+
+	def __ge__(self, other):
+		if isinstance(other, Range):
+			return self._key() >= other._key()
+		pair = self._differ(other)
+		return pair[0] >= pair[1] if pair else len(self) >= len(other)
+
+	def __lt__(self, other):
+		if isinstance(other, Range):
+			return self._key() < other._key()
+		pair = self._differ(other)
+		return pair[0] < pair[1] if pair else len(self) < len(other)
+
+	def __le__(self, other):
+		if isinstance(other, Range):
+			return self._key() <= other._key()
+		pair = self._differ(other)
+		return pair[0] <= pair[1] if pair else len(self) <= len(other)
+
+class Array:
+	# the value of a List of Integers or Booleans: the raw values packed in an
+	# array.array, boxed only when they are read
+	__slots__ = ('cls', 'buffer')
+
+	def __init__(self, cls, buffer):
+		self.cls = cls
+		self.buffer = buffer
+
+	@classmethod
+	def pack(cls, initial, values):
+		typecode = _TYPECODES.get(initial)
+		if typecode is None:
+			return None
+		try:
+			return cls(initial, array.array(typecode, [value.value0 for value in values]))
+		except OverflowError:  # Integers that do not fit in 64 bits stay boxed
+			return None
+
+	def __repr__(self):
+		return f'Array({self.cls.__name__}, {self.buffer.tolist()!r})'
+
+	def __str__(self):
+		if self.cls is Boolean:
+			return '[' + ', '.join('true' if value else 'false' for value in self.buffer) + ']'
+		return '[' + ', '.join(map(str, self.buffer)) + ']'
+
+	def __iter__(self):
+		if self.cls is Boolean:
+			return map(Boolean, map(bool, self.buffer))
+		return map(self.cls, self.buffer)
+
+	def __len__(self):
+		return len(self.buffer)
+
+	def __contains__(self, value):
+		return isinstance(value, self.cls) and value.value0 in self.buffer
+
+	def __getitem__(self, idx):
+		if isinstance(idx, slice):
+			return Array(self.cls, self.buffer[idx])
+		value = self.buffer[idx]
+		return Boolean(bool(value)) if self.cls is Boolean else self.cls(value)
+
+	def _same(self, other):
+		return isinstance(other, Array) and other.cls is self.cls
+
+	# comparisons between two arrays run over the buffers
+
+	def __eq__(self, other):
+		if self._same(other):
+			return self.buffer == other.buffer
+		return list(self) == list(other)
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __gt__(self, other):
+		if self._same(other):
+			return self.buffer > other.buffer
+		return list(self) > list(other)
+
+	def __ge__(self, other):
+		if self._same(other):
+			return self.buffer >= other.buffer
+		return list(self) >= list(other)
+
+	def __lt__(self, other):
+		if self._same(other):
+			return self.buffer < other.buffer
+		return list(self) < list(other)
+
+	def __le__(self, other):
+		if self._same(other):
+			return self.buffer <= other.buffer
+		return list(self) <= list(other)
 
 class List(Primitive):
+	__slots__ = ()
+
+	@classmethod
+	def from_values0(cls, initial, values):
+		# values are already checked to all be of type initial
+		packed = Array.pack(initial, values)
+		return cls(values if packed is None else packed)
+
 	def __iter__(self):
 		return self.value0.__iter__()
 
+	def __len__(self):
+		return len(self.value0)
+
+	def __contains__(self, value):
+		return value in self.value0
+
+	def _operator_cast(self, type):
+		if type is String:
+			if isinstance(self.value0, (Range, Array)):
+				return String(str(self.value0))
+			return String('[' + ', '.join(value.cast0(String).value0 for value in self.value0) + ']')
+		elif type is Boolean:
+			return Boolean(len(self.value0) != 0)
+		elif type is List:
+			value = self.value0
+			if isinstance(value, Range):  # materialised, in one pass over the range
+				try:
+					return List(Array(value.cls, array.array(_TYPECODES[value.cls], range(value.start, value.stop))))
+				except OverflowError:
+					return List(list(value))
+			return self
+		else:
+			raise Exception(f"cannot cast {self.__class__.__name__!r} to type {type.__name__!r}")
+
 	@classmethod
 	def from_value0(cls, value, *, runner):
 		if not value:  # empty expr list?
 			raise Exception("cannot infer type of empty list")
-		initial = value[0].eval(runner).__class__
+		initial = None
 		values = []
 		for arg in value:
 			arg = arg.eval(runner)
-			if not isinstance(arg, initial):
+			if initial is None:
+				initial = arg.__class__
+			elif not isinstance(arg, initial):
 				raise Exception(f"multi-typed lists are invalid (found {arg.__class__.__name__!r}, expected {initial.__name__!r})")
 			values.append(arg)
-		return cls(values)
+		return cls.from_values0(initial, values)
 
 class Function(Object):
-	# _attrs = ('name', 'params', 'return_type', 'body')
+	# everything but the return type (inferred on the first return when not
+	# declared) and what the function closes over comes from its AST node
+	__slots__ = ('node', 'return_type', 'code', 'closure')
 
 	def __repr__(self):
 		return f"Function<{self.name}>()"
 
-	def __init__(self, name, params, return_type, body, lineno):
+	def __init__(self, node, code=None, closure=None):
 		from violet.vast import Return, Primitive
 
-		self.lineno = lineno
-		self.name = name
-		self.params = params
-		self.return_type = return_type
-		self.body = body
-		self._return = None
-		self._return_flag = False
+		self.node = node
+		self.return_type = node.ret_value
+		self.code = code
+		self.closure = closure
 
+		body = node.body
 		if body:
 			# print(body[-1])
 			if not isinstance(body[-1], Return):
-				body.append(Return(Primitive(IndexableNamespace(value='nil', lineno=body[-1].lineno), Void)))
+				lineno = body[-1].lineno
+				body.append(Return(Primitive(IndexableNamespace(value='nil', lineno=lineno), Void), lineno, implicit=True))
+
+	@property
+	def name(self):
+		return self.node.name
+
+	@property
+	def params(self):
+		return self.node.params
+
+	@property
+	def body(self):
+		return self.node.body
 
-	def reset_state(self):
-		ret = self._return
-		self._return = None
-		self._return_flag = None
-		return ret
+	@property
+	def lineno(self):
+		return self.node.lineno
 
 	def _operator_call(self, args, *, runner):
+		return self.call0(args, runner)
+
+	def call0(self, args, runner, checked=False):
+		# checked calls were proven to pass matching arguments by
+		# violet.typechecker
 		# print(self)
-		with runner.new_scope():
-			if len(args) < len(self.params):
-				raise Exception("not enough arguments for function call")
-			params = iter(self.params)
-			for value in args:
-				try:
-					param = next(params)
-				except StopIteration:
-					raise Exception("too many arguments for function call") from None
-				param.type.type_check(value, runner)
-				
-				runner.get_current_scope().set_var(param.name, value)
-			try:
-				runner.exec_function_body(self.body, self)
-			except ReturnExit:
-				pass
-			except BreakExit:
-				raise Exception("unexpected \"break\" statement at this time")
-			except ContinueExit:
-				raise Exception("unexpected \"continue\" statement at this time")
+		if self.code is not None:
+			# compiled by the closure or vm engine, which bind arguments themselves
+			return self.code(self, args, checked)
+		# run by the tree engine, which hooks can specialise (see violet.hooks)
+		return runner.call_function(self, args, checked)
 
 class Lambda(Function):
+	__slots__ = ()
+
 	def __repr__(self):
 		return "Lambda()"
 
-	def __init__(self, params, body, lineno):
-		from violet.vast import Return
+	def __init__(self, node, code=None, closure=None):
+		self.node = node
+		self.return_type = None
+		self.code = code
+		self.closure = closure
+
+	@property
+	def body(self):
+		return self.node.returns()
+
+def _make(cls, value):
+	self = object.__new__(cls)
+	self.value0 = value
+	return self
+
+NIL = _make(Void, None)
+TRUE = _make(Boolean, True)
+FALSE = _make(Boolean, False)
+
+SMALL_INTEGERS = (-5, 1025)  # the range of Integers interned by default
+_SMALL_LOW = _SMALL_HIGH = 0
+_SMALL = []
+
+def intern_integers(low, high):
+	# intern the Integers in range(low, high) from now on
+	global _SMALL_LOW, _SMALL_HIGH, _SMALL
+	cached = {value.value0: value for value in _SMALL}
+	_SMALL = [cached.get(i) or _make(Integer, i) for i in range(low, high)]
+	_SMALL_LOW, _SMALL_HIGH = low, high
+
+intern_integers(*SMALL_INTEGERS)
+
+_TYPECODES = {
+	Integer: 'q',
+	Boolean: 'b',
+}
 
-		self.params = params
-		self.body = [Return(body)]
-		self.lineno = lineno
-		self._return = None
-		self._return_flag = None
-		self.return_type = None		
\ No newline at end of file
+STD_TYPES = {
+	'nil': Void,
+	'List': List,
+	'String': String,
+	'Void': Void,
+	'Integer': Integer,
+	'Boolean': Boolean
+}
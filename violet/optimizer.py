@@ -0,0 +1,254 @@
+import sys
+
+from violet import vast as ast
+from violet import objects
+from violet.resolver import GLOBAL, BUILTIN
+
+# Optimisation pass, run on a module after violet.resolver.
+#
+#   level 0  nothing
+#   level 1  literals are converted to the runtime objects they evaluate to,
+#            once, instead of every time they are evaluated
+#   level 2  operators, casts, ternaries, `??`, `&&` and `||` whose operands
+#            are constant are folded, and reads of `let const` bindings whose
+#            initialiser is constant are replaced by the value, where they
+#            can't run before the binding
+#
+# Constant values are shared between evaluations, which is fine as long as
+# they are immutable; `..` is never folded since it creates a List. Anything
+# that raises while folding is left for the program to raise when it runs.
+
+OPT_LEVELS = (0, 1, 2)
+DEFAULT_OPT_LEVEL = 2
+
+_FOLDABLE = {op: func for op, func in ast.BINARY_OPERATORS.items() if op not in (ast.Range, ast.TypeCheck)}
+
+def _builtin_type(typ):
+	name = typ.name if isinstance(typ, ast.TypeId) else None
+	if isinstance(name, ast.Identifier) and not isinstance(name, ast.Attribute) and name.depth == BUILTIN:
+		return objects.STD_TYPES[name.name]
+	return None
+
+class Optimizer:
+	def __init__(self, level, open_globals=False):
+		self.level = level
+		self.fold = level >= 2
+		# globals can be bound again after the module has run (by a REPL
+		# session), so none is known to be constant
+		self.open_globals = open_globals
+		self.globals = {}  # name -> optimised initialiser of a global constant
+		self.frames = []  # for every function (or loop frame) being optimised: slot -> ast.Constant
+
+	# module
+
+	def optimize_module(self, module):
+		if self.fold and not self.open_globals:
+			self.collect_globals(module.body)
+		for stmt in module.body:
+			if isinstance(stmt, ast.Assignment):
+				if stmt.identifier.name not in self.globals:
+					stmt.expression = self.optimize_expr(stmt.expression)
+			elif isinstance(stmt, ast.Reassignment):
+				stmt.expression = self.optimize_expr(stmt.expression)
+			elif isinstance(stmt, ast.Function):
+				self.optimize_function(stmt)
+
+	def collect_globals(self, body):
+		# a global constant is only propagated when nothing else can bind its
+		# name: no other declaration, `put` or star import
+		bindings = {}
+		for stmt in body:
+			if isinstance(stmt, ast.Import):
+				for identifier in stmt.importing:
+					if identifier.name == '*':
+						return
+					bindings[identifier.name] = bindings.get(identifier.name, 0) + 1
+			elif isinstance(stmt, ast.Assignment):
+				bindings[stmt.identifier.name] = bindings.get(stmt.identifier.name, 0) + 1
+			elif isinstance(stmt, ast.Function):
+				bindings[stmt.name.name] = bindings.get(stmt.name.name, 0) + 1
+				self.count_puts(stmt.body, bindings)
+
+		# nor when a read of it can run before it is bound: one in a statement
+		# before it, or anywhere once a statement before it calls a function
+		read = set()
+		called = False
+		for stmt in body:
+			if not isinstance(stmt, (ast.Assignment, ast.Reassignment)):
+				continue
+			for node in ast.walk(stmt.expression):
+				if node.__class__ is ast.FunctionCall:
+					called = True
+				elif node.__class__ is ast.Identifier and node.depth == GLOBAL:
+					read.add(node.name)
+			name = stmt.identifier.name
+			if isinstance(stmt, ast.Assignment) and stmt.constant and bindings[name] == 1 and not called and name not in read:
+				stmt.expression = self.optimize_expr(stmt.expression)
+				self.globals[name] = stmt.expression
+
+	def count_puts(self, body, bindings):
+		for stmt in body:
+			if isinstance(stmt, ast.Assignment) and stmt.global_scope:
+				bindings[stmt.identifier.name] = bindings.get(stmt.identifier.name, 0) + 1
+			elif isinstance(stmt, ast.IfControl):
+				for branch in (stmt.if_stmt, *(stmt.elseif_chain or ()), stmt.else_stmt):
+					if branch is not None:
+						self.count_puts(branch.body, bindings)
+			elif isinstance(stmt, ast.ForControl):
+				self.count_puts(stmt.body, bindings)
+
+	def optimize_function(self, func):
+		self.frames.append({})
+		if isinstance(func, ast.Lambda):
+			func.body = self.optimize_expr(func.body)
+		else:
+			self.optimize_body(func.body)
+		self.frames.pop()
+
+	# statements
+
+	def optimize_body(self, body):
+		for stmt in body:
+			self.optimize_stmt(stmt)
+
+	def optimize_stmt(self, stmt):
+		if isinstance(stmt, ast.Assignment):
+			stmt.expression = self.optimize_expr(stmt.expression)
+			if self.fold and stmt.constant and not stmt.global_scope and isinstance(stmt.expression, ast.Constant):
+				self.frames[-1][stmt.identifier.slot] = stmt.expression
+		elif isinstance(stmt, ast.Reassignment):
+			stmt.expression = self.optimize_expr(stmt.expression)
+		elif isinstance(stmt, ast.Return):
+			if stmt.expr is not None and not isinstance(stmt.expr, objects.Void):
+				stmt.expr = self.optimize_expr(stmt.expr)
+		elif isinstance(stmt, ast.FunctionCall):
+			self.optimize_expr(stmt)
+		elif isinstance(stmt, ast.IfControl):
+			for branch in (stmt.if_stmt, *(stmt.elseif_chain or ())):
+				branch.expr = self.optimize_expr(branch.expr)
+				self.optimize_body(branch.body)
+			if stmt.else_stmt:
+				self.optimize_body(stmt.else_stmt.body)
+		elif isinstance(stmt, ast.ForControl):
+			stmt.expr = self.optimize_expr(stmt.expr)
+			if stmt.frame_size is None:
+				self.optimize_body(stmt.body)
+			else:  # every iteration has a frame of its own
+				self.frames.append({})
+				self.optimize_body(stmt.body)
+				self.frames.pop()
+
+	# expressions
+
+	def optimize_expr(self, expr):
+		cls = expr.__class__
+		if cls is ast.Primitive:
+			if expr.type is objects.List:
+				expr.value = [self.optimize_expr(item) for item in expr.value]
+				return expr
+			return ast.Constant(expr.eval(None), expr.lineno)
+		elif cls is ast.Identifier:
+			if self.fold:
+				return self.optimize_load(expr)
+		elif cls is ast.BiOperatorExpr:
+			expr.left = self.optimize_expr(expr.left)
+			if not isinstance(expr.right, ast.TypeId):
+				expr.right = self.optimize_expr(expr.right)
+			if self.fold:
+				return self.fold_binary(expr)
+		elif cls is ast.FunctionCall:
+			expr.args = [self.optimize_expr(arg) for arg in expr.args]
+		elif cls is ast.Cast:
+			expr.expr = self.optimize_expr(expr.expr)
+			typ = _builtin_type(expr.type)
+			if self.fold and typ is not None and isinstance(expr.expr, ast.Constant):
+				return self.fold_value(expr, expr.lineno, lambda: expr.expr.value.cast0(typ))
+		elif cls is ast.TernaryQMark:
+			expr.expr0 = self.optimize_expr(expr.expr0)
+			expr.expr1 = self.optimize_expr(expr.expr1)
+			expr.expr2 = self.optimize_expr(expr.expr2)
+			if self.fold and all(isinstance(e, ast.Constant) for e in (expr.expr0, expr.expr1, expr.expr2)):
+				q, left, right = expr.expr0.value, expr.expr1.value, expr.expr2.value
+				# the checks TernaryQMark.eval and violet.typechecker make, left for them to report
+				if isinstance(q, objects.Boolean) and isinstance(right, left.__class__):
+					return ast.Constant(left if q.value0 else right, expr.lineno)
+		elif cls is ast.NilOrElse:
+			expr.expr0 = self.optimize_expr(expr.expr0)
+			expr.expr1 = self.optimize_expr(expr.expr1)
+			if self.fold and isinstance(expr.expr0, ast.Constant):
+				# the right hand side is only evaluated when the left is nil
+				return expr.expr1 if isinstance(expr.expr0.value, objects.Void) else expr.expr0
+		elif cls is ast.LogicalAnd or cls is ast.LogicalOr:
+			expr.expr0 = self.optimize_expr(expr.expr0)
+			expr.expr1 = self.optimize_expr(expr.expr1)
+			if self.fold and isinstance(expr.expr0, ast.Constant) and isinstance(expr.expr0.value, objects.Boolean):
+				left = expr.expr0.value
+				if left.value0 is (cls is ast.LogicalOr):  # short-circuits
+					return expr.expr0
+				if isinstance(expr.expr1, ast.Constant) and isinstance(expr.expr1.value, objects.Boolean):
+					return expr.expr1
+		elif cls is ast.Lambda:
+			self.optimize_function(expr)
+		return expr
+
+	def optimize_load(self, identifier):
+		depth = identifier.depth
+		if depth == GLOBAL:
+			constant = self.globals.get(identifier.name)
+		elif depth is not None and depth >= 0 and depth < len(self.frames):
+			constant = self.frames[-1 - depth].get(identifier.slot)
+		else:
+			constant = None
+		if not isinstance(constant, ast.Constant):
+			return identifier
+		return ast.Constant(constant.value, identifier.lineno)
+
+	def fold_binary(self, expr):
+		left, right = expr.left, expr.right
+		if not isinstance(left, ast.Constant):
+			return expr
+		op = expr.op.__class__
+		if op is ast.TypeCheck:
+			typ = _builtin_type(right)
+			if typ is not None:
+				return self.fold_value(expr, left.lineno, lambda: ast.BINARY_OPERATORS[op](left.value, typ))
+		elif op in _FOLDABLE and isinstance(right, ast.Constant):
+			return self.fold_value(expr, left.lineno, lambda: _FOLDABLE[op](left.value, right.value))
+		return expr
+
+	def fold_value(self, expr, lineno, compute):
+		try:
+			value = compute()
+		except Exception:
+			return expr
+		if not isinstance(value, objects.Primitive) or isinstance(value, objects.List):
+			return expr
+		return ast.Constant(value, lineno)
+
+def optimize(module, level=DEFAULT_OPT_LEVEL, open_globals=False):
+	if level:
+		Optimizer(level, open_globals).optimize_module(module)
+	return module
+
+# --dump-optimized
+
+def _format(node, indent):
+	pad = '\t' * indent
+	if isinstance(node, list):
+		if not node:
+			return '[]'
+		items = ''.join(f'{pad}\t{_format(item, indent + 1)},\n' for item in node)
+		return f'[\n{items}{pad}]'
+	if not isinstance(node, ast.VioletASTBase) or len(repr(node)) <= 60:
+		return repr(node)
+	fields = ''.join(
+		f'{pad}\t{name}={_format(getattr(node, name), indent + 1)},\n'
+		for name in node.__slots__
+		if not name.startswith('_')
+	)
+	return f'{node.__class__.__name__}(\n{fields}{pad})'
+
+def dump(module, file=None):
+	file = file or sys.stdout
+	for stmt in module.body:
+		print(_format(stmt, 0), file=file)
@@ -1,11 +1,17 @@
 import copy
+import hashlib
+import os
+import pickle
 import typing
 
+import sly
 from sly import Parser
+from sly.yacc import LRTable
 
-from violet.lexer import VioletLexer
+from violet.lexer import Tokenizer
 from violet import vast as ast
 from violet import objects
+from violet._util import write_atomic
 
 def getanyattr(obj, *names):
 	for name in names:
@@ -13,18 +19,74 @@ def getanyattr(obj, *names):
 		if o is not ...:
 			return o
 
+# The LALR tables take most of the time it takes to start up, so they are built
+# once and kept in TABLES_FILE. The file is used only if it was written for the
+# same TABLES_VERSION, sly version and grammar; otherwise the tables are built
+# again and the file rewritten.
+TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parsetab.pickle')
+TABLES_VERSION = 1
+
+def grammar_hash(grammar):
+	spec = (
+		sly.__version__,
+		grammar.Start,
+		sorted(grammar.Precedence.items()),
+		[(p.name, p.prod, p.prec) for p in grammar.Productions],
+	)
+	return hashlib.sha256(repr(spec).encode()).hexdigest()
+
+def load_tables(grammar, file=TABLES_FILE):
+	try:
+		with open(file, 'rb') as f:
+			tables = pickle.load(f)
+	except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+		return None
+	if not isinstance(tables, dict) or tables.get('version') != TABLES_VERSION or tables.get('grammar') != grammar_hash(grammar):
+		return None
+	lrtable = LRTable.__new__(LRTable)
+	lrtable.grammar = grammar
+	lrtable.lr_productions = grammar.Productions
+	lrtable.lr_action = tables['action']
+	lrtable.lr_goto = tables['goto']
+	lrtable.defaulted_states = tables['defaulted']
+	lrtable.sr_conflicts = lrtable.rr_conflicts = ()
+	return lrtable
+
+def save_tables(lrtable, file=TABLES_FILE):
+	tables = {
+		'version': TABLES_VERSION,
+		'grammar': grammar_hash(lrtable.grammar),
+		'action': lrtable.lr_action,
+		'goto': lrtable.lr_goto,
+		'defaulted': lrtable.defaulted_states,
+	}
+	write_atomic(file, pickle.dumps(tables, pickle.HIGHEST_PROTOCOL))
+
 class VioletParser(Parser):
 	def __init__(self, *args, **kwargs):
 		super().__init__(*args, **kwargs)
 		self._error_list = []
 
 	# debugfile = 'parsetab.out'
-	tokens = VioletLexer.tokens
+	tokens = Tokenizer.tokens
 	expected_shift_reduce = 2
 
+	# called by Parser._build (under its private name) once the grammar is built
+	@classmethod
+	def _Parser__build_lrtables(cls):
+		lrtable = load_tables(cls._grammar)
+		if lrtable is not None:
+			cls._lrtable = lrtable
+			return True
+		built = super()._Parser__build_lrtables()
+		save_tables(cls._lrtable)
+		return built
+
 	precedence = (
 		('left', "tern"),
 		('left', "lambda"),
+		('left', OR),
+		('left', AND),
 		('nonassoc', "type_check"),
 		('nonassoc', EQ, NE, GT, GE, LT, LE, RANGE),
 		('left', DQMARK),
@@ -38,10 +100,11 @@ class VioletParser(Parser):
 	@_("stmt")
 	@_("stmt_list stmt")
 	def stmt_list(self, p):
-		# print("stmt_list")
-		orig = getanyattr(p, 'stmt_list')
-		if orig:
-			return orig + [p.stmt]
+		# lists are extended in place: a list rebuilt on every reduction makes
+		# parsing quadratic in its length
+		if len(p) == 2:
+			p.stmt_list.append(p.stmt)
+			return p.stmt_list
 		return [p.stmt]
 
 	@_("expr EOS")
@@ -81,7 +144,8 @@ class VioletParser(Parser):
 	@_("expr")
 	def expr_list(self, p):
 		if len(p) == 3:
-			return [*p.expr_list, p.expr]
+			p.expr_list.append(p.expr)
+			return p.expr_list
 		return [p.expr]
 
 	@_("expr QMARK expr COLON expr %prec tern")
@@ -157,6 +221,14 @@ class VioletParser(Parser):
 	def bool(self, p):
 		return ast.BiOperatorExpr(p.expr0, ast.LessOrEqual(), p.expr1)
 
+	@_("expr AND expr")
+	def bool(self, p):
+		return ast.LogicalAnd(p)
+
+	@_("expr OR expr")
+	def bool(self, p):
+		return ast.LogicalOr(p)
+
 	@_("expr ANON_CHECK typ %prec type_check")
 	def bool(self, p):
 		return ast.BiOperatorExpr(p.expr, ast.TypeCheck(), p.typ)
@@ -219,23 +291,18 @@ class VioletParser(Parser):
 	@_("identifier_list COMMA identity")
 	@_("identity")
 	def identifier_list(self, p):
-		idlist = getanyattr(p, 'identifier_list')
-		if idlist:
-			ret = [*idlist, p.identity]
-		else:
-			ret = [p.identity,]
-		# print(ret)
-		return ret
+		if len(p) == 3:
+			p.identifier_list.append(p.identity)
+			return p.identifier_list
+		return [p.identity]
 
 	@_("name_list COMMA name")
 	@_("name")
 	def name_list(self, p):
-		idlist = getanyattr(p, 'name_list')
-		if idlist:
-			ret = [*idlist, p.name]
-		else:
-			ret = [p.name,]
-		return ret
+		if len(p) == 3:
+			p.name_list.append(p.name)
+			return p.name_list
+		return [p.name]
 
 	@_("IMPORT BLOCK_OPEN name_list BLOCK_CLOSE FROM identity")
 	@_("IMPORT BLOCK_OPEN MULTIPLY BLOCK_CLOSE FROM identity")
@@ -266,11 +333,10 @@ class VioletParser(Parser):
 	@_("param_list COMMA param")
 	@_("param")
 	def param_list(self, p):
-		l = getanyattr(p, 'param_list')
-		if l is not None:
-			return l + [p.param]
-		else:
-			return [p.param]
+		if len(p) == 3:
+			p.param_list.append(p.param)
+			return p.param_list
+		return [p.param]
 
 	@_("BLOCK_OPEN stmt_list BLOCK_CLOSE")
 	@_("BLOCK_OPEN BLOCK_CLOSE")
@@ -290,7 +356,8 @@ class VioletParser(Parser):
 	@_("expr")
 	def arg_list(self, p):
 		if len(p) == 3:
-			return p.arg_list + [p.expr]
+			p.arg_list.append(p.expr)
+			return p.arg_list
 		return [p.expr]
 
 	@_("identity PAREN_OPEN PAREN_CLOSE")
@@ -303,7 +370,7 @@ class VioletParser(Parser):
 	@_("RETURN expr")
 	@_("RETURN")
 	def return_stmt(self, p):
-		return ast.Return(getanyattr(p, 'expr'))
+		return ast.Return(getanyattr(p, 'expr'), p.lineno)
 
 	@_("BREAK")
 	def break_stmt(self, p):
@@ -330,7 +397,8 @@ class VioletParser(Parser):
 	@_("elseif_stmt")
 	def elseif_chain(self, p):
 		if len(p) == 2:
-			return [*p.elseif_chain, p.elseif_stmt]
+			p.elseif_chain.append(p.elseif_stmt)
+			return p.elseif_chain
 		return [p.elseif_stmt]
 
 	@_("IF PAREN_OPEN expr PAREN_CLOSE block")
@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+
+from violet import objects
+
+# A deterministic profiler for Violet code, fed by the hooks attach() adds to
+# a runner (see violet.hooks): enter() when a Violet function (or module)
+# starts running, exit() when it returns and line() when a statement starts.
+#
+# Functions are keyed by name, file and line. Their inclusive time counts only
+# the outermost of recursive activations; exclusive time leaves out the
+# functions they call. A line is charged the time from its statement starting
+# to the next statement of the same activation starting (or the activation
+# returning), so time spent in the functions it calls counts towards it, and
+# a loop's statements are charged for their own lines but not the loop's. Like
+# functions, a line running inside a call made from the same line (by a
+# recursive function) is counted but not charged again.
+#
+# Collapsed stacks ("outer;inner exclusive-microseconds" per line) can be fed
+# to flamegraph tools. They are kept as a tree of frames, each with its
+# exclusive time, so deep recursion costs a node per frame rather than a copy
+# of the whole stack; the lines are only joined as they are written.
+
+def label(func):
+	if isinstance(func, objects.Lambda):
+		return '<lambda>'
+	return func.name.name
+
+class Node:
+	# a frame of the collapsed stacks, under the frames that called it
+	__slots__ = ('frame', 'children', 'time')
+
+	def __init__(self, frame):
+		self.frame = frame
+		self.children = {}  # frame -> Node
+		self.time = 0.0
+
+class Activation:
+	__slots__ = ('key', 'node', 'file', 'start', 'children', 'lineno', 'line_start')
+
+	def __init__(self, key, node, file, start):
+		self.key = key
+		self.node = node
+		self.file = file
+		self.start = start
+		self.children = 0.0
+		self.lineno = None
+		self.line_start = start
+
+class Profiler:
+	def __init__(self, timer=time.perf_counter):
+		self.timer = timer
+		self.functions = {}  # (name, file, lineno) -> [calls, inclusive, exclusive]
+		self.lines = {}  # (file, lineno) -> [hits, time]
+		self.stacks = Node(None)  # the root of the collapsed stacks
+		self.frames = {}  # key -> its frame in the collapsed stacks
+		self.stack = []
+		self.active = {}  # key -> activations of it on the stack
+		self.active_lines = {}  # (file, lineno) -> activations on the stack running it
+		self.modules = []  # the stack's depth under every module running
+
+	def attach(self, runner):
+		runner.add_hook('call', self._call)
+		runner.add_hook('return', self._return)
+		runner.add_hook('statement', self._statement)
+		runner.add_hook('scope_enter', self._scope_enter)
+		runner.add_hook('scope_exit', self._scope_exit)
+		return self
+
+	def _call(self, runner, func, args):
+		self.enter(label(func), func.closure.runner.filename, func.lineno)
+
+	def _return(self, runner, func, value):
+		self.exit()
+
+	def _statement(self, runner, stmt):
+		self.line(stmt.lineno)
+
+	def _scope_enter(self, runner, scope):
+		if scope is runner.global_scope:
+			self.modules.append(len(self.stack))
+			self.enter('<module>', runner.filename, 0)
+
+	def _scope_exit(self, runner, scope):
+		if scope is runner.global_scope:
+			# with the functions an error left running
+			depth = self.modules.pop()
+			while len(self.stack) > depth:
+				self.exit()
+
+	def enter(self, name, file, lineno):
+		now = self.timer()
+		key = (name, file, lineno)
+		stack = self.stack
+		parent = stack[-1].node if stack else self.stacks
+		node = parent.children.get(key)
+		if node is None:
+			frame = self.frames.get(key)
+			if frame is None:
+				frame = self.frames[key] = f'{name} ({os.path.basename(file)}:{lineno})'
+			node = parent.children[key] = Node(frame)
+		stack.append(Activation(key, node, file, now))
+		self.active[key] = self.active.get(key, 0) + 1
+
+	def line(self, lineno):
+		now = self.timer()
+		activation = self.stack[-1]
+		if activation.lineno is not None:
+			self._charge(activation, now)
+		activation.lineno = lineno
+		activation.line_start = now
+		key = (activation.file, lineno)
+		self.active_lines[key] = self.active_lines.get(key, 0) + 1
+		stats = self.lines.get(key)
+		if stats is None:
+			self.lines[key] = [1, 0.0]
+		else:
+			stats[0] += 1
+
+	def exit(self):
+		now = self.timer()
+		activation = self.stack.pop()
+		if activation.lineno is not None:
+			self._charge(activation, now)
+		elapsed = now - activation.start
+		exclusive = elapsed - activation.children
+		key = activation.key
+		stats = self.functions.get(key)
+		if stats is None:
+			stats = self.functions[key] = [0, 0.0, 0.0]
+		stats[0] += 1
+		stats[2] += exclusive
+		self.active[key] -= 1
+		if not self.active[key]:
+			stats[1] += elapsed
+		activation.node.time += exclusive
+		if self.stack:
+			self.stack[-1].children += elapsed
+
+	def _charge(self, activation, now):
+		key = (activation.file, activation.lineno)
+		self.active_lines[key] -= 1
+		if not self.active_lines[key]:
+			self.lines[key][1] += now - activation.line_start
+
+	def report(self, file=sys.stderr, limit=20):
+		# the functions by exclusive time, then the `limit` slowest lines
+		while self.stack:
+			# left running by an error
+			self.exit()
+		print(f"{'calls':>10}{'inclusive':>12}{'exclusive':>12}  function", file=file)
+		for (name, source, lineno), (calls, inclusive, exclusive) in sorted(self.functions.items(), key=lambda item: -item[1][2]):
+			print(f"{calls:>10}{inclusive:>11.4f}s{exclusive:>11.4f}s  {name} ({source}:{lineno})", file=file)
+		print(file=file)
+		print(f"{'hits':>10}{'time':>12}  line", file=file)
+		for (source, lineno), (hits, elapsed) in sorted(self.lines.items(), key=lambda item: -item[1][1])[:limit]:
+			print(f"{hits:>10}{elapsed:>11.4f}s  {source}:{lineno}", file=file)
+
+	def write_stacks(self, file):
+		# depth first without recursing, as deep as the profiled program went
+		with open(file, 'w') as f:
+			path = []
+			pending = [(0, node) for node in sorted(self.stacks.children.values(), key=lambda node: node.frame, reverse=True)]
+			while pending:
+				depth, node = pending.pop()
+				del path[depth:]
+				path.append(node.frame)
+				weight = round(node.time * 1e6)
+				if weight:
+					f.write(';'.join(path) + f' {weight}\n')
+				pending.extend((depth + 1, child) for child in sorted(node.children.values(), key=lambda node: node.frame, reverse=True))
@@ -0,0 +1,254 @@
+import re
+import sys
+
+from violet import objects
+from violet import vast as ast
+from violet.errors import *
+from violet.optimizer import DEFAULT_OPT_LEVEL
+from violet.runner import Runner
+from violet._util import IndexableNamespace
+
+# An interactive session: one Runner whose globals, imported modules and parser
+# stay alive between inputs. An input is split into its top level statements,
+# and a statement whose text has been parsed before (typed again, or unchanged
+# in a file loaded again) reuses the nodes parsed then, moved to its new line,
+# so editing one function of a loaded file only parses that function again.
+#
+# Every input is checked as a module of its own, against the globals bound so
+# far. Since any global can be bound again by a later input, none is assumed
+# constant or of a known type, so reused nodes stay valid whatever is rebound.
+# Declarations run as module statements, anything else in a function of its
+# own; the value of a final expression is printed.
+
+# strings and comments, whose braces and semicolons don't count, then words and
+# single characters
+_SPLIT = re.compile(r'"(?:[^"\\\n]|\\.)*"|//.*|[a-zA-Z_]+|\S')
+
+_BLOCKS = ('fun', 'if', 'for')
+_DECLARATIONS = (ast.Import, ast.Assignment, ast.Reassignment, ast.Function)
+_STATEMENTS = _DECLARATIONS + (ast.Return, ast.Break, ast.Continue, ast.Control)
+
+# the function statements that aren't declarations run in
+LINE_FUNCTION = '__line'
+
+PROMPT = '>>> '
+CONTINUATION = '... '
+
+def split(source):
+	# returns the (lineno, text) of every complete top level statement in
+	# source, the text after the last one and how many braces, parentheses and
+	# brackets that leaves open
+	statements = []
+	start = None
+	depth = 0
+	nesting = 0  # open parentheses and brackets
+	block = False
+	end = None  # where a block statement ends, unless `elseif` or `else` follows
+	lineno, counted = 1, 0
+	for match in _SPLIT.finditer(source):
+		token = match.group()
+		if token.startswith('//'):
+			continue
+		if end is not None:
+			if token in ('elseif', 'else'):
+				end = None
+			else:
+				lineno += source.count('\n', counted, start)
+				counted = start
+				statements.append((lineno, source[start:end]))
+				start = end = None
+		if start is None:
+			start = match.start()
+			block = token in _BLOCKS
+		if token == '{':
+			depth += 1
+		elif token == '}':
+			depth -= 1
+			if depth == 0 and block:
+				end = match.end()
+		elif token in ('(', '['):
+			nesting += 1
+		elif token in (')', ']'):
+			nesting = max(nesting - 1, 0)  # a stray one is the parser's to report
+		elif token == ';' and depth == 0 and nesting == 0:
+			lineno += source.count('\n', counted, start)
+			counted = start
+			statements.append((lineno, source[start:match.end()]))
+			start = None
+	if end is not None:
+		lineno += source.count('\n', counted, start)
+		statements.append((lineno, source[start:end]))
+		start = None
+	return statements, source[start:] if start is not None else '', depth + nesting
+
+def relocate(node, delta, seen=None):
+	# moves every node under `node` down `delta` lines
+	if seen is None:
+		seen = set()
+	if isinstance(node, (list, tuple)):
+		for item in node:
+			relocate(item, delta, seen)
+		return
+	if not isinstance(node, ast.VioletASTBase) or id(node) in seen:
+		return
+	seen.add(id(node))
+	for name in ast.slot_names(node.__class__):
+		value = getattr(node, name, None)
+		if name == 'lineno':
+			if isinstance(value, int) and value >= 0:
+				node.lineno = value + delta
+		else:
+			relocate(value, delta, seen)
+
+def show(value):
+	if isinstance(value, objects.String):
+		return '"' + value.value0.replace('\\', '\\\\').replace('"', '\\"') + '"'
+	try:
+		return value.cast0(objects.String).value0
+	except Exception:
+		return repr(value)
+
+class Session:
+	def __init__(self, *, debug=False, engine='tree', opt_level=DEFAULT_OPT_LEVEL):
+		self.runner = Runner('', filename='<stdin>', debug=debug, engine=engine, opt_level=opt_level)
+		self.parsed = {}  # statement text -> (lineno, nodes) of its last parse
+		self.parses = 0  # statements parsed rather than reused
+		self.file = None  # the file :reload loads
+
+	def parse(self, source):
+		# returns the (lineno, node) of every statement in source, some of
+		# their nodes expressions, which have no line of their own
+		statements, rest, _ = split(source)
+		if rest.strip():
+			statements.append((source.count('\n', 0, len(source) - len(rest)) + 1, rest))
+		body = []
+		used = set()
+		for lineno, text in statements:
+			found = self.parsed.get(text)
+			if found is None or text in used:
+				nodes = self.runner.parse_body(text, lineno)
+				self.parses += 1
+				if text not in used:
+					self.parsed[text] = (lineno, nodes)
+			else:
+				parsed_at, nodes = found
+				if parsed_at != lineno:
+					relocate(nodes, lineno - parsed_at)
+					self.parsed[text] = (lineno, nodes)
+			used.add(text)
+			body.extend((lineno, node) for node in nodes)
+		return body
+
+	def known(self):
+		runner = self.runner
+		scope = runner.global_scope
+		known = {name: False for name in runner.imports}
+		known.update((name, name in scope.const_vars) for name in scope.vars)
+		return known
+
+	def execute(self, source):
+		# runs the statements in source, returning the value of the final one
+		# if it is an expression (None otherwise)
+		runner = self.runner
+		groups = []
+		for lineno, stmt in self.parse(source):
+			declaration = isinstance(stmt, _DECLARATIONS)
+			if not groups or groups[-1][1] != declaration:
+				groups.append((lineno, declaration, []))
+			groups[-1][2].append(stmt)
+		if not groups:
+			return None
+
+		result = False
+		lineno, declaration, body = groups[-1]
+		if not declaration and not isinstance(body[-1], _STATEMENTS):
+			body[-1] = ast.Return(body[-1], lineno)
+			result = True
+		module = ast.Module([])
+		for lineno, declaration, stmts in groups:
+			if declaration:
+				module.body.extend(stmts)
+			else:
+				module.body.append(ast.Function(IndexableNamespace(
+					name=ast.Identifier(LINE_FUNCTION, lineno),
+					block=stmts,
+					lineno=lineno,
+				)))
+		runner.check_module(module, known=self.known())
+
+		value = None
+		for node in module.body:
+			runner.exec_module(ast.Module([node]))
+			if isinstance(node, ast.Function) and node.name.name == LINE_FUNCTION:
+				func = runner.global_scope.vars.pop(LINE_FUNCTION)
+				value = runner.call(func, [])
+		return value if result else None
+
+	def load(self, file):
+		with open(file) as f:
+			source = f.read()
+		self.file = file
+		self.runner.filename = file
+		return self.execute(source)
+
+def report(session, func, *args):
+	# runs func, reporting errors the way the runner does, without exiting
+	try:
+		return func(*args)
+	except SystemExit:
+		pass  # reported already
+	except Panic as e:
+		print("FATAL: system error occured:", e, file=sys.stderr)
+	except StatementError as e:
+		if session.runner.debug:
+			raise
+		print(f"ERROR:{e.stmt.lineno}: {e}", file=sys.stderr)
+	except OSError as e:
+		print(f"ERROR: {e}", file=sys.stderr)
+	except Exception as e:
+		if session.runner.debug:
+			raise
+		print(f"ERROR: {e}", file=sys.stderr)
+	return None
+
+def interact(session):
+	try:
+		import readline  # line editing and history for input(), where available
+	except ImportError:
+		pass
+	print("Violet REPL. :load <file>, :reload and :quit, or Ctrl-D to exit.")
+	buffer = ''
+	while True:
+		try:
+			line = input(CONTINUATION if buffer else PROMPT)
+		except EOFError:
+			print()
+			break
+		except KeyboardInterrupt:
+			print()
+			buffer = ''
+			continue
+
+		if not buffer and line.startswith(':'):
+			command, _, arg = line.partition(' ')
+			if command in (':q', ':quit'):
+				break
+			elif command == ':load' and arg.strip():
+				report(session, session.load, arg.strip())
+			elif command == ':reload' and session.file:
+				report(session, session.load, session.file)
+			else:
+				print(f"ERROR: unknown command {line!r}", file=sys.stderr)
+			continue
+
+		buffer += line + '\n'
+		_, rest, depth = split(buffer)
+		if depth > 0 and line.strip():
+			continue  # a block or brackets that aren't closed yet, or an empty line to give up on them
+		if rest.strip() and not rest.rstrip().endswith((';', '}')):
+			# the `;` of a final expression may be left out
+			buffer = buffer.rstrip() + ';\n'
+		source, buffer = buffer, ''
+		value = report(session, session.execute, source)
+		if value is not None and value is not objects.NIL:
+			print(show(value))
@@ -0,0 +1,311 @@
+from violet import vast as ast
+from violet import objects
+
+# Static name resolution, run between parsing and execution.
+#
+# Every Identifier that reads or binds a variable is annotated with where the
+# variable lives:
+#
+#   depth >= 0  slot `slot` of the frame `depth` functions up from the current
+#               one (0 being the function's own frame, 1 the frame a lambda
+#               was created in, ...)
+#   GLOBAL      the module's global table, looked up by name
+#   BUILTIN     one of objects.STD_TYPES
+#
+# Functions and lambdas are annotated with the number of slots their frame
+# needs. Block scopes do not exist at runtime; each declaration in a function
+# gets a slot of its own. The exception is the body of a loop declaring a
+# variable that a lambda in it reads: each iteration runs in a frame of its
+# own, like a function's, so every lambda keeps the variables of the
+# iteration that made it. Such loops are annotated with the size of that
+# frame, the others with None.
+
+GLOBAL = -1
+BUILTIN = -2
+
+class Frame:
+	__slots__ = ('runner', 'func', 'parent', 'slots')
+
+	def __init__(self, runner, func, parent, size):
+		self.runner = runner
+		self.func = func
+		self.parent = parent
+		self.slots = [None] * size
+
+	def __repr__(self):
+		return f"Frame({self.func!r}, {self.slots!r})"
+
+def _captures(loop):
+	# whether a lambda in the loop's body may read a variable declared in it
+	declared = {loop.name.name}
+	read = set()
+	for node in ast.walk(loop.body):
+		if node.__class__ is ast.Assignment and not node.global_scope:
+			declared.add(node.identifier.name)
+		elif node.__class__ is ast.ForControl:
+			declared.add(node.name.name)
+		elif node.__class__ is ast.Lambda:
+			read.update(name.name for name in _lambda_names(node))
+	return not declared.isdisjoint(read)
+
+def _lambda_names(func):
+	stack = [func.body]
+	while stack:
+		node = stack.pop()
+		if isinstance(node, (list, tuple)):
+			stack.extend(node)
+		elif isinstance(node, ast.VioletASTBase):
+			if isinstance(node, ast.Identifier) and isinstance(node.name, str):
+				yield node
+			for name in ast.slot_names(node.__class__):
+				stack.append(getattr(node, name, None))
+
+class _Block:
+	__slots__ = ('names', 'parent', 'function')
+
+	def __init__(self, parent, function):
+		self.names = {}  # name -> (slot, const)
+		self.parent = parent
+		self.function = function
+
+class _Function:
+	__slots__ = ('level', 'size')
+
+	def __init__(self, level):
+		self.level = level
+		self.size = 0
+
+class Resolver:
+	def __init__(self, known=None):
+		self.errors = []
+		self.warnings = []
+		self.globals = {}  # name -> const
+		# name -> const of the globals bound before the module runs (by the
+		# earlier inputs of a REPL session); declaring one again is no shadowing
+		self.known = known or {}
+		self.open_globals = False  # `import { * }` can bind any name
+		self.block = None
+		self.function = None
+
+	# diagnostics
+
+	def error(self, lineno, msg):
+		self.errors.append((lineno, msg))
+
+	def warn(self, lineno, msg):
+		self.warnings.append((lineno, msg))
+
+	# scopes
+
+	def push_block(self):
+		self.block = _Block(self.block, self.function)
+
+	def pop_block(self):
+		self.block = self.block.parent
+
+	def declare(self, identifier, const=False):
+		name = identifier.name
+		if self.function is None:
+			self.declare_global(identifier, const)
+			return
+		if name in self.block.names or name in objects.STD_TYPES:
+			self.warn(identifier.lineno, f"shadowing variable {name!r}")
+		slot = self.function.size
+		self.function.size += 1
+		self.block.names[name] = (slot, const)
+		identifier.depth = 0
+		identifier.slot = slot
+
+	def declare_global(self, identifier, const=False):
+		name = identifier.name
+		if name in self.globals or name in objects.STD_TYPES:
+			self.warn(identifier.lineno, f"shadowing variable {name!r}")
+		self.globals[name] = const
+		identifier.depth = GLOBAL
+
+	def lookup(self, identifier):
+		# returns whether the variable is constant, or None if it is undefined
+		name = identifier.name
+		if name in objects.STD_TYPES:
+			identifier.depth = BUILTIN
+			return True
+		block = self.block
+		while block is not None:
+			found = block.names.get(name)
+			if found is not None:
+				identifier.depth = self.function.level - block.function.level
+				identifier.slot = found[0]
+				return found[1]
+			block = block.parent
+		identifier.depth = GLOBAL
+		if name in self.globals:
+			return self.globals[name]
+		if name in self.known:
+			return self.known[name]
+		if self.open_globals:
+			return False
+		return None
+
+	def load(self, identifier):
+		if self.lookup(identifier) is None:
+			self.error(identifier.lineno, f"variable {identifier.name!r} is not defined")
+
+	# module
+
+	def resolve_module(self, module):
+		# globals can be used before the statement binding them has run, so
+		# collect them all before resolving any expression
+		for stmt in module.body:
+			if isinstance(stmt, ast.Import):
+				for identifier in stmt.importing:
+					if identifier.name == '*':
+						self.open_globals = True
+					else:
+						self.declare_global(identifier)
+			elif isinstance(stmt, ast.Assignment):
+				self.declare_global(stmt.identifier, stmt.constant)
+			elif isinstance(stmt, ast.Function):
+				self.declare_global(stmt.name)
+		self.collect_puts(module.body)
+
+		for stmt in module.body:
+			if isinstance(stmt, ast.Assignment):
+				self.resolve_expr(stmt.expression)
+				self.resolve_type(stmt.type)
+			elif isinstance(stmt, ast.Reassignment):
+				self.resolve_reassignment(stmt)
+			elif isinstance(stmt, ast.Function):
+				self.resolve_function(stmt)
+
+	def collect_puts(self, body):
+		for stmt in body:
+			if isinstance(stmt, ast.Assignment) and stmt.global_scope:
+				if stmt.identifier.name not in self.globals:
+					self.globals[stmt.identifier.name] = stmt.constant
+			elif isinstance(stmt, ast.Function):
+				self.collect_puts(stmt.body)
+			elif isinstance(stmt, ast.IfControl):
+				for branch in (stmt.if_stmt, *(stmt.elseif_chain or ()), stmt.else_stmt):
+					if branch is not None:
+						self.collect_puts(branch.body)
+			elif isinstance(stmt, ast.ForControl):
+				self.collect_puts(stmt.body)
+
+	def resolve_function(self, func, body=None):
+		outer_function = self.function
+		self.function = _Function(0 if outer_function is None else outer_function.level + 1)
+		self.push_block()
+		for param in func.params:
+			self.resolve_type(param.type)
+			self.declare(param.name)
+		if isinstance(func, ast.Lambda):
+			self.resolve_expr(func.body)
+		else:
+			self.resolve_type(func.ret_value)
+			self.resolve_body(func.body)
+		func.frame_size = self.function.size
+		self.pop_block()
+		self.function = outer_function
+
+	# statements
+
+	def resolve_body(self, body):
+		for stmt in body:
+			self.resolve_stmt(stmt)
+
+	def resolve_block(self, body):
+		self.push_block()
+		self.resolve_body(body)
+		self.pop_block()
+
+	def resolve_stmt(self, stmt):
+		if isinstance(stmt, ast.Assignment):
+			self.resolve_expr(stmt.expression)
+			self.resolve_type(stmt.type)
+			if stmt.global_scope:
+				stmt.identifier.depth = GLOBAL
+			else:
+				self.declare(stmt.identifier, stmt.constant)
+		elif isinstance(stmt, ast.Reassignment):
+			self.resolve_reassignment(stmt)
+		elif isinstance(stmt, ast.Return):
+			if stmt.expr is not None and not isinstance(stmt.expr, objects.Void):
+				self.resolve_expr(stmt.expr)
+		elif isinstance(stmt, ast.FunctionCall):
+			self.resolve_expr(stmt)
+		elif isinstance(stmt, ast.IfControl):
+			for branch in (stmt.if_stmt, *(stmt.elseif_chain or ())):
+				self.resolve_expr(branch.expr)
+				self.resolve_block(branch.body)
+			if stmt.else_stmt:
+				self.resolve_block(stmt.else_stmt.body)
+		elif isinstance(stmt, ast.ForControl):
+			self.resolve_expr(stmt.expr)
+			outer_function = self.function
+			if _captures(stmt):
+				self.function = _Function(outer_function.level + 1)
+			self.push_block()
+			self.declare(stmt.name, True)
+			self.resolve_body(stmt.body)
+			self.pop_block()
+			if self.function is not outer_function:
+				stmt.frame_size = self.function.size
+				self.function = outer_function
+
+	def resolve_reassignment(self, stmt):
+		self.resolve_expr(stmt.expression)
+		const = self.lookup(stmt.identifier)
+		if const is None:
+			self.error(stmt.lineno, f"variable {stmt.identifier.name!r} is not defined")
+		elif const:
+			self.error(stmt.lineno, f"constant variable {stmt.identifier.name!r} cannot be reassigned")
+
+	# expressions
+
+	def resolve_type(self, typ):
+		if typ is None:
+			return
+		name = typ.name
+		if isinstance(name, ast.Subscript):
+			name = name.name
+		self.resolve_expr(name)
+
+	def resolve_expr(self, expr):
+		cls = expr.__class__
+		if cls is ast.Identifier:
+			self.load(expr)
+		elif cls is ast.Attribute:
+			self.load(expr.get_top_level_name())
+		elif cls is ast.Primitive:
+			if expr.type is objects.List:
+				for item in expr.value:
+					self.resolve_expr(item)
+		elif cls is ast.BiOperatorExpr:
+			self.resolve_expr(expr.left)
+			if isinstance(expr.right, ast.TypeId):
+				self.resolve_type(expr.right)
+			else:
+				self.resolve_expr(expr.right)
+		elif cls is ast.FunctionCall:
+			self.load(expr.name.get_top_level_name())
+			for arg in expr.args:
+				self.resolve_expr(arg)
+		elif cls is ast.Cast:
+			self.resolve_expr(expr.expr)
+			self.resolve_type(expr.type)
+		elif cls is ast.TypeId:
+			self.resolve_type(expr)
+		elif cls is ast.TernaryQMark:
+			self.resolve_expr(expr.expr0)
+			self.resolve_expr(expr.expr1)
+			self.resolve_expr(expr.expr2)
+		elif cls is ast.NilOrElse or cls is ast.LogicalAnd or cls is ast.LogicalOr:
+			self.resolve_expr(expr.expr0)
+			self.resolve_expr(expr.expr1)
+		elif cls is ast.Lambda:
+			self.resolve_function(expr)
+
+def resolve(module, known=None):
+	resolver = Resolver(known)
+	resolver.resolve_module(module)
+	return resolver
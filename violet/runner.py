@@ -1,37 +1,36 @@
 import contextlib
-import hashlib
 import importlib
 import re
 import os
 import pprint
+import queue
 import sys
+import threading
 import types
 import contextlib
 import subprocess
 
+from violet.closure import ClosureCompiler
+from violet import cache
+from violet import optimizer
+from violet import resolver
+from violet import typechecker
+from violet import vm
+from violet.hooks import Hooks
 from violet.lexer import lexer
 from violet.objects import Void
 from violet.parser import parser
 from violet import vast as ast
 from violet.errors import *
-from violet.errors import _Exit
 from violet import objects
 from violet._util import IndexableNamespace
 
-_STD_TYPES = {
-	'nil': objects.Void,
-	'List': objects.List,
-	'String': objects.String,
-	'Void': objects.Void,
-	'Integer': objects.Integer,
-	'Boolean': objects.Boolean
-}
+_STD_TYPES = objects.STD_TYPES
 
 _PY_TYPES = {
 	int: objects.Integer,
 	str: objects.String,
-	type(None): objects.Void,
-	list: objects.List.from_value0
+	type(None): lambda value: objects.NIL,
 }
 
 _print = print
@@ -39,116 +38,273 @@ def print(*args, **kwargs):
 	kwargs['file'] = kwargs.get('file', sys.stderr)
 	_print(*args, **kwargs)
 
-class VarNotFound(Exception):
-	def __init__(self, var):
-		super().__init__(f"variable {var.name!r} is not defined")
-
-class CannotReassignConst(Exception):
-	def __init__(self, var):
-		super().__init__(f"constant variable {var.name!r} cannot be reassigned")
-
 class Scope:
-	def __init__(self, runner):
+	# variables are keyed by name; const_vars holds the names of the constant ones
+	__slots__ = ('runner', 'vars', 'const_vars', 'parent')
+
+	def __init__(self, runner, parent=None):
 		self.runner = runner
 		self.vars = {}
-		self.const_vars = {}
-		self.parent = None
-
-		self.hash = hashlib.sha1(os.urandom(16)).hexdigest()
-		# print("spawned scope", self.hash)
+		self.const_vars = set()
+		self.parent = parent
 
 	def __repr__(self):
 		return "Scope(" + repr(self.vars) + ", " + repr(self.const_vars) + ")"
 
 	def is_var_assigned(self, identifier, recurse=True):
-		return \
-			identifier in self.vars or \
-			identifier in self.const_vars or \
-			identifier.name in _STD_TYPES or \
-			(recurse and self.parent and self.parent.is_var_assigned(identifier))
+		name = identifier.name
+		if name in self.vars or name in _STD_TYPES:
+			return True
+		if self.parent is None:
+			return self.runner.find_import(name) is not None
+		return recurse and self.parent.is_var_assigned(identifier)
 
 	def get_var_noid(self, name):
 		return self.get_var(ast.Identifier(name, -1))
 
 	def get_var(self, identifier):
-		# print(self.hash, ": getting", identifier)
-		try:
-			if identifier.name in _STD_TYPES:
-				return _STD_TYPES[identifier.name]
-			var = self.vars.get(identifier)
-			if var is None:
-				var = self.const_vars.get(identifier)
-			if var is None:
-				raise VarNotFound(identifier)
-			return var
-		except VarNotFound:
-			if not self.parent:  # self.parent?.getVar(identifier) ?: throw error
-				raise
-			return self.parent.get_var(identifier)
-
-	def reassign_var(self, identifier, value, *, const=None):  # pointless const argument, just for safety
+		# print("getting", identifier)
+		name = identifier.name
+		var = _STD_TYPES.get(name)
+		scope = self
+		while var is None and scope is not None:
+			var = scope.vars.get(name)
+			if var is None and scope.parent is None:
+				var = scope.runner.get_import(name)
+			scope = scope.parent
+		if var is None:
+			raise VarNotFound(identifier)
+		return var
+
+	def reassign_var(self, identifier, value, *, const=None, checked=False):  # pointless const argument, just for safety
 		# print("reassign", identifier, value)
-		if identifier in self.const_vars:
+		name = identifier.name
+		scope = self
+		while name not in scope.vars:  # the scope the variable was declared in
+			if scope.parent is None:
+				# imported from a module, whose calls were checked against what
+				# it bound the name to
+				raise CannotReassignImport(identifier)
+			scope = scope.parent
+		if name in scope.const_vars:
 			raise CannotReassignConst(identifier)  # cannot reassign consts
-		orig = ast.TypeId(ast.Identifier(self.vars[identifier].__class__.__name__, identifier.lineno))
-		orig.type_check(value, self.runner)
-		self.vars[identifier] = value
+		if not checked:
+			orig = scope.vars[name].__class__
+			if not isinstance(value, orig):
+				raise Exception(f"invalid type {value.__class__.__name__!r} for function call (expected {orig.__name__!r})")
+		scope.vars[name] = value
 
 	def set_var(self, identifier, value, *, const=False):
-		# print(self.hash, ": assigning", identifier, value)
+		# print("assigning", identifier, value)
 		if not isinstance(value, (objects.Object, objects.ThinPythonObjectWrapper)):
 			value = objects.ThinPythonObjectWrapper(value)
 		# print("assigning", identifier, "to", value, "as const?", const)
-		if self.is_var_assigned(identifier, False):
-			print(f"WARN: shadowing variable {identifier.transform_to_string()!r}")
+		# shadowing is reported by the resolver, before anything runs
+		name = identifier.name
+		self.vars[name] = value
 		if const:
-			# print("set const var")
-			self.const_vars[identifier] = value
+			self.const_vars.add(name)
 		else:
-			# print("set var")
-			self.vars[identifier] = value
+			self.const_vars.discard(name)
+
+ENGINES = ('tree', 'closure', 'vm')
+
+# the Violet modules imported in this process, like sys.modules: each file is
+# parsed and run once per engine and optimisation level, and every module
+# importing it binds names to its global scope. A module is registered as None
+# while its body runs, so importing it again before then is an import cycle
+MODULES = {}
+
+# the methods hooks specialise, each with a `<name>_hooked` version
+_HOOKED = ('call_function', 'exec_function_body', 'exec_module_body', 'push_scope', 'pop_scope', '_exec_import')
+
+# every Violet call made by the tree and closure engines recurses in Python,
+# so they are run by a thread whose recursion limit and stack allow for about
+# MAX_DEPTH nested calls (the vm keeps its own call stack). The thread is
+# started by the first call and runs every call after it; if it can't be
+# started, calls run on the calling thread with Python's limits
+MAX_DEPTH = 200000
+# Python frames a Violet call takes, more in nested blocks
+CALL_FRAMES = 10
+RECURSION_LIMIT = MAX_DEPTH * CALL_FRAMES
+# bytes: Python calls only take C stack before 3.11
+FRAME_STACK = 0 if sys.version_info >= (3, 11) else 512
+STACK_SIZE = (8 << 20) + RECURSION_LIMIT * FRAME_STACK
+
+_deep = None  # (thread, queue of calls) once started, False if it can't be
+
+def _run_deep(calls):
+	while True:
+		fn, args, kwargs, result = calls.get()
+		try:
+			result.put((True, fn(*args, **kwargs)))
+		except BaseException as e:
+			result.put((False, e))
+		del fn, args, kwargs, result
+
+def _start_deep():
+	calls = queue.SimpleQueue()
+	try:
+		old_size = threading.stack_size(STACK_SIZE)
+	except (ValueError, RuntimeError):
+		return False
+	try:
+		thread = threading.Thread(target=_run_deep, args=(calls,), daemon=True)
+		thread.start()
+	except RuntimeError:  # can't start new thread
+		return False
+	finally:
+		threading.stack_size(old_size)
+	return thread, calls
+
+def call_deep(fn, *args, **kwargs):
+	global _deep
+	# a forked process has the thread object but not the thread
+	if _deep is None or _deep and not _deep[0].is_alive():
+		_deep = _start_deep()
+	if not _deep or threading.current_thread() is _deep[0]:
+		return fn(*args, **kwargs)
+
+	result = queue.SimpleQueue()
+	old_limit = sys.getrecursionlimit()
+	sys.setrecursionlimit(RECURSION_LIMIT)
+	try:
+		_deep[1].put((fn, args, kwargs, result))
+		ok, value = result.get()
+	finally:
+		sys.setrecursionlimit(old_limit)
+	if not ok:
+		raise value
+	return value
 
 class Runner:
-	def __init__(self, code, *, filename="<string>", debug=False, write_ast=False):
+	def __init__(self, code, *, filename="<string>", debug=False, write_ast=False, engine='tree', opt_level=optimizer.DEFAULT_OPT_LEVEL, cache=False, hooks=None):
+		if engine not in ENGINES:
+			raise ValueError(f"unknown engine {engine!r} (expected one of {', '.join(ENGINES)})")
 		self.debug = debug
-		self.global_scope = gl = Scope(self)
-		self.scopes = {gl.hash: gl}
-		self.active_scope = gl.hash
+		self.engine = engine
+		self.opt_level = opt_level
+		self.global_scope = Scope(self)
+		# the scopes currently executing, innermost last; a scope is only kept
+		# alive after it is popped if a closure captured it
+		self.scopes = [self.global_scope]
 		self.code = code
 		self.filename = filename
 		self.lineno = 0
 		self.write_ast = write_ast
-
-	@staticmethod
-	def wrap_py_type(value):
-		return _PY_TYPES[type(value)](value, runner=self)
+		# keep the parsed module in a .vic file beside `filename`
+		self.cache = cache
+		# the global scopes of the Violet modules this one imports from: by
+		# name for `import { name }`, in order for `import { * }`
+		self.imports = {}
+		self.star_imports = []
+		# the violet.hooks.Hooks called as this runner executes, if any
+		self.hooks = None
+		if hooks:
+			self.hooks = hooks
+			self._specialise()
+
+	def wrap_py_type(self, value):
+		if isinstance(value, list):
+			return objects.List.from_value0(value, runner=self)
+		return _PY_TYPES[type(value)](value)
 
 	def get_var(self, *args, **kwargs):
 		return self.get_current_scope().get_var(*args, **kwargs)
 
 	def get_current_scope(self):
-		return self.scopes[self.active_scope]
+		return self.scopes[-1]
+
+	def find_import(self, name):
+		# the global scope of the module `name` is imported from, or None
+		module = self.imports.get(name)
+		if module is not None:
+			return module if name in module.vars else module.runner.find_import(name)
+		for module in reversed(self.star_imports):  # later imports win
+			if name in module.vars:
+				if name not in module.const_vars:
+					return module
+			else:
+				found = module.runner.find_import(name)
+				if found is not None:
+					return found
+		return None
+
+	def get_import(self, name):
+		module = self.find_import(name)
+		if module is None:
+			return None
+		return module.vars[name]
 
 	@classmethod
-	def open(cls, fp, **kwargs):
+	def open(cls, fp, *, cache=True, **kwargs):
 		with open(fp) as f:
-			return cls(f.read(), filename=fp, **kwargs)
-
-	def interpret(self):
-		module = ast.Module([])
-		body = parser.parse(lexer.tokenize(self.code))
+			return cls(f.read(), filename=fp, cache=cache, **kwargs)
+
+	def parse(self):
+		if not self.cache:
+			return self.parse_source()
+		file = cache.cache_file(self.filename, self.opt_level)
+		key = cache.cache_key(self.code)
+		cached = cache.load(file, key)
+		if cached is not None:
+			warnings, module = cached
+			for lineno, warning in warnings:
+				print(f"WARN:{lineno}: {warning}")
+			return module
+		warnings = []
+		module = self.parse_source(warnings)
+		cache.save(file, key, warnings, module)
+		return module
+
+	def parse_source(self, warnings=None):
+		module = ast.Module(self.parse_body(self.code))
+		return self.check_module(module, warnings)
+
+	def parse_body(self, code, lineno=1):
+		# the statements of `code`, whose first line is line `lineno`
+		body = parser.parse(lexer.tokenize(code, lineno))
+		if lexer.errors:
+			# characters that were skipped make any syntax errors meaningless
+			for lineno, error in lexer.errors:
+				print(f"ERROR:{lineno}: {error}")
+			lexer.errors.clear()
+			parser._error_list.clear()
+			sys.exit(1)
 		if parser._error_list:
 			for error in parser._error_list:
 				print(f"ERROR:{error.lineno}: Unexpected {error.value!r}")
 			parser._error_list.clear()
 			sys.exit(1)
+		return body or []
+
+	def check_module(self, module, warnings=None, known=None):
+		# known: name -> const of the globals already bound when the module
+		# runs, which any module may bind again (see violet.repl)
+		resolved = resolver.resolve(module, known)
+		for lineno, warning in resolved.warnings:
+			print(f"WARN:{lineno}: {warning}")
+		if warnings is not None:
+			warnings.extend(resolved.warnings)
+		if resolved.errors:
+			for lineno, error in resolved.errors:
+				print(f"ERROR:{lineno}: {error}")
+			sys.exit(1)
+		optimizer.optimize(module, self.opt_level, open_globals=known is not None)
+		checked = typechecker.check(module, open_globals=known is not None)
+		if checked.errors:
+			for lineno, error in checked.errors:
+				print(f"ERROR:{lineno}: {error}")
+			sys.exit(1)
+		return module
 
-		module.body.extend(body)
+	def interpret(self):
+		module = self.parse()
 		# print(module, file=sys.stdout)
 		try:
 			# print(module.body)
 			self.exec_module(module)
-		except errors.Panic as e:
+		except Panic as e:
 			print("FATAL: system error occured:", e, file=sys.stderr)
 			sys.exit(9)
 		except StatementError as e:
@@ -178,12 +334,8 @@ class Runner:
 			sys.exit(1)
 
 		try:
-			with self.new_scope():
-				# print(main, dir(main))
-				if len(main.params) == 1:
-					main([self.argv], runner=self)	
-				else:
-					main([], runner=self)
+			# print(main, dir(main))
+			self.call(main, [self.argv] if len(main.params) == 1 else [])
 		except StatementError as e:
 			if self.debug:
 				raise
@@ -195,19 +347,125 @@ class Runner:
 			print(f"ERROR:{main.lineno}:", e)
 			sys.exit(1)
 
+	def call(self, func, args):
+		with self.new_scope():
+			if self.engine == 'vm':
+				return func(args, runner=self)
+			return call_deep(func, args, runner=self)
+
+	def call_function(self, func, args, checked=False):
+		# checked calls were proven to pass matching arguments by
+		# violet.typechecker
+		with self.new_scope(func.closure):
+			scope = self.get_current_scope()
+			if checked:
+				for param, value in zip(func.params, args):
+					scope.set_var(param.name, value)
+			else:
+				if len(args) < len(func.params):
+					raise Exception("not enough arguments for function call")
+				params = iter(func.params)
+				for value in args:
+					try:
+						param = next(params)
+					except StopIteration:
+						raise Exception("too many arguments for function call") from None
+					param.type.type_check(value, self)
+
+					scope.set_var(param.name, value)
+			signal = self.exec_function_body(func.body, func)
+			if signal is BREAK:
+				raise Exception("unexpected \"break\" statement at this time")
+			elif signal is CONTINUE:
+				raise Exception("unexpected \"continue\" statement at this time")
+			return signal
+
+	def push_scope(self, parent=None):
+		scopes = self.scopes
+		scope = Scope(self, parent or scopes[-1])
+		scopes.append(scope)
+		return scope
+
+	def pop_scope(self):
+		self.scopes.pop()
+
 	@contextlib.contextmanager
-	def new_scope(self):
-		scope = Scope(self)
-		scope.parent = self.get_current_scope()
-		self.scopes[scope.hash] = scope
-		old_scope = self.active_scope
-		# print("opening scope", scope.hash, "with parent", old_scope)
-		self.active_scope = scope.hash
+	def new_scope(self, parent=None):
+		self.push_scope(parent)
 		try:
 			yield
 		finally:
-			# print("closing scope", scope.hash, "to", old_scope)
-			self.active_scope = old_scope
+			self.pop_scope()
+
+	# hooks
+
+	def add_hook(self, event, hook):
+		if self.hooks is None:
+			self.hooks = Hooks()
+		self.hooks.add(event, hook)
+		self._specialise()
+
+	def remove_hook(self, event, hook):
+		# a ValueError for a hook that wasn't added, like Hooks.remove
+		if self.hooks is None:
+			Hooks().remove(event, hook)
+		self.hooks.remove(event, hook)
+		if not self.hooks:
+			self.hooks = None
+			self._specialise()
+
+	def _specialise(self):
+		# the tree engine's execution paths are looked up on the runner, so
+		# hooks are called by instance attributes shadowing them, and never
+		# checked for without any
+		for name in _HOOKED:
+			if self.hooks is None:
+				self.__dict__.pop(name, None)
+			else:
+				setattr(self, name, getattr(self, name + '_hooked'))
+
+	def call_function_hooked(self, func, args, checked=False):
+		for hook in self.hooks.on_call:
+			hook(self, func, args)
+		value = Runner.call_function(self, func, args, checked)
+		for hook in self.hooks.on_return:
+			hook(self, func, value)
+		return value
+
+	def exec_function_body_hooked(self, body, func):
+		hooks = self.hooks.on_statement
+		for statement in body:
+			if not (statement.__class__ is ast.Return and statement.implicit):
+				for hook in hooks:
+					hook(self, statement)
+			signal = Runner.exec_function_body(self, (statement,), func)
+			if signal is not None:
+				return signal
+
+	def exec_module_body_hooked(self, stmt_list):
+		hooks = self.hooks.on_statement
+		for statement in stmt_list:
+			for hook in hooks:
+				hook(self, statement)
+			Runner.exec_module_body(self, (statement,))
+
+	def push_scope_hooked(self, parent=None):
+		scope = Runner.push_scope(self, parent)
+		for hook in self.hooks.on_scope_enter:
+			hook(self, scope)
+		return scope
+
+	def pop_scope_hooked(self):
+		scope = self.scopes[-1]
+		Runner.pop_scope(self)
+		for hook in self.hooks.on_scope_exit:
+			hook(self, scope)
+
+	def _exec_import_hooked(self, stmt):
+		module = Runner._exec_import(self, stmt)
+		for hook in self.hooks.on_import:
+			hook(self, stmt, module)
+		return module
 
 	def exec_module_body(self, stmt_list):
 		for statement in stmt_list:
@@ -224,12 +482,14 @@ class Runner:
 					self._exec_function_spawn(statement)
 				else:
 					raise StatementError(statement, f'unexpected {statement.__class__.__name__!r} statement')
+			except StatementError:
+				raise
 			except Exception as e:
-				if isinstance(e, (StatementError, _Exit)):
-					raise
 				raise StatementError(statement, str(e))
 
 	def exec_function_body(self, body, func):
+		# returns the completion signal of the body: None, BREAK, CONTINUE or
+		# the value of a `return`
 		for statement in body:
 			# print("FUNCTION: executing", statement.__class__.__name__, getattr(statement, 'name', None))
 			try:
@@ -238,24 +498,40 @@ class Runner:
 				elif isinstance(statement, ast.Reassignment):
 					self._exec_assignment(statement, True)
 				elif isinstance(statement, ast.Return):
-					self._exec_return(statement, func)
+					return self._exec_return(statement, func)
 				elif isinstance(statement, ast.Break):
-					raise BreakExit
+					return BREAK
 				elif isinstance(statement, ast.Continue):
-					raise ContinueExit
+					return CONTINUE
 				elif isinstance(statement, ast.FunctionCall):
 					statement.eval(self)
 				elif isinstance(statement, ast.Control):
-					statement.eval(self, func)
+					signal = statement.eval(self, func)
+					if signal is not None:
+						return signal
 				else:
 					raise StatementError(statement, f'unexpected {statement.__class__.__name__!r} statement')
+			except StatementError:
+				raise
 			except Exception as e:
-				if isinstance(e, (StatementError, _Exit)):
-					raise
 				raise StatementError(statement, str(e))
 
 	def exec_module(self, module):
-		self.exec_module_body(module.body)
+		hooks = self.hooks
+		if hooks is not None:
+			for hook in hooks.on_scope_enter:
+				hook(self, self.global_scope)
+		try:
+			if self.engine == 'vm':
+				vm.execute(vm.compile_module(module, instrument=hooks is not None), resolver.Frame(self, None, None, 0))
+			elif self.engine == 'closure':
+				ClosureCompiler(hooks).compile_module(module)(resolver.Frame(self, None, None, 0))
+			else:
+				self.exec_module_body(module.body)
+		finally:
+			if hooks is not None:
+				for hook in hooks.on_scope_exit:
+					hook(self, self.global_scope)
 
 	def _exec_import(self, stmt):
 		form = stmt.from_module
@@ -277,28 +553,12 @@ class Runner:
 		is_vi_file = os.path.exists(vi_file_name)
 		if is_vi_file:
 			try:
-				module = Runner.open(vi_file_name)
-				module.interpret()
+				module = self.import_module(stmt, vi_file_name)
+			except StatementError:
+				raise
 			except Exception as e:
 				raise StatementError(stmt, f'module {stmt.from_module.name!r} does not exist')
-
-			else:
-				for identifier in stmt.importing:
-					if identifier.name == "*":
-						vars = module.get_current_scope().vars
-						scope = self.get_current_scope()
-						for ident, value in vars.items():
-							scope.set_var(ident, value)
-
-						break
-
-					else:
-						try:
-							var = module.get_current_scope().get_var(identifier)
-						except Exception as e:
-							raise StatementError(stmt, f'failed to import {identifier.name!r} from {name}')
-						else:
-							self.get_current_scope().set_var(identifier, var)
+			self._bind_imports(stmt, module, name)
 
 		else:
 			try:
@@ -324,52 +584,68 @@ class Runner:
 						raise StatementError(stmt, f'failed to import {iport.name!r} from {name!r}')
 					else:
 						self.get_current_scope().set_var(iport, getattr(module, iport.name))
+		return module
 
 	def _exec_local_import(self, stmt):
 		try:
-			new = Runner.open(stmt.from_module.name+'.vi')
-			new.interpret()
+			module = self.import_module(stmt, stmt.from_module.name+'.vi')
 		except FileNotFoundError:
 			raise StatementError(stmt, f'module {stmt.from_module.name!r} does not exist')
-
-		for name in stmt.importing:
-			if name.name == "*":
-				vars = new.get_current_scope().vars
-				scope = self.get_current_scope()
-				for ident, value in vars.items():
-					scope.set_var(ident, value)
-
+		self._bind_imports(stmt, module, stmt.from_module.name)
+		return module
+
+	def import_module(self, stmt, file):
+		key = (os.path.realpath(file), self.engine, self.opt_level)
+		if key in MODULES:
+			module = MODULES[key]
+			if module is None:
+				raise StatementError(stmt, f'circular import of module {stmt.from_module.transform_to_string()!r}')
+			return module
+		MODULES[key] = None
+		try:
+			module = Runner.open(file, engine=self.engine, opt_level=self.opt_level, cache=self.cache, hooks=self.hooks)
+			module.interpret()
+		except BaseException:
+			del MODULES[key]
+			raise
+		MODULES[key] = module
+		return module
+
+	def _bind_imports(self, stmt, module, name):
+		# names are bound to the module's global scope rather than copied, so
+		# they see what the module reassigns them to
+		imported = module.global_scope
+		for identifier in stmt.importing:
+			if identifier.name == "*":
+				self.star_imports.append(imported)
 				break
 
-			try:
-				var = new.get_current_scope().get_var(name)
-			except Exception as e:
-				raise StatementError(stmt, f'failed to import {name.name!r} from {stmt.from_module.name!r}')
-			else:
-				self.get_current_scope().set_var(name, var)
+			if imported.vars.get(identifier.name) is None and module.find_import(identifier.name) is None:
+				raise StatementError(stmt, f'failed to import {identifier.name!r} from {name!r}')
+			self.imports[identifier.name] = imported
 
 	def _exec_assignment(self, statement, reassign=False):
 		# print(statement, reassign)
 		scope = self.global_scope if not reassign and statement.global_scope else self.get_current_scope()
 		try:
 			expr = statement.expression.eval(self)
+		except StatementError:
+			raise
 		except Exception as e:
 			raise StatementError(statement, str(e))
 		# print(expr)
-		if reassign:
-			if not scope.is_var_assigned(statement.identifier):
-				raise StatementError(statement, f'variable {statement.identifier.name!r} is not defined')
-			meth = scope.reassign_var
-		else:
-			typ = statement.type
-			if typ is not None:
-				typ.type_check(expr, self)
-
-			meth = scope.set_var
-
 		try:
-			# print(meth)
-			meth(statement.identifier, expr, const=statement.constant)
+			if reassign:
+				if not scope.is_var_assigned(statement.identifier):
+					raise StatementError(statement, f'variable {statement.identifier.name!r} is not defined')
+				scope.reassign_var(statement.identifier, expr, checked=statement.checked)
+			else:
+				typ = statement.type
+				if typ is not None and not statement.checked:
+					typ.type_check(expr, self)
+				scope.set_var(statement.identifier, expr, const=statement.constant)
+		except StatementError:
+			raise
 		except Exception as e:
 			raise StatementError(statement, str(e))
 
@@ -377,16 +653,17 @@ class Runner:
 		# print(statement)
 		expr = statement.expr
 		if expr is None or isinstance(expr, Void):
-			ret = Void()
+			ret = objects.NIL
 		else:
 			ret = expr.eval(self)
+		if statement.checked:
+			return ret
 		if func.return_type is None:
 			if not isinstance(ret, objects.Object):
 				ret = self.wrap_py_type(ret)
 			func.return_type = ret.get_type()
 		func.return_type.type_check(ret, self)
-		func._return = ret
-		raise ReturnExit
+		return ret
 
 	def _exec_function_spawn(self, stmt):
 		# print("spawn function")
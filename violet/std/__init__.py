@@ -1,4 +1,4 @@
-from sys import stdout
+import sys
 from violet._util import identify_as_violet
 
 __all__ = ['typeof', 'print']
@@ -20,5 +20,5 @@ def print(args, *, runner):
 		# pyprint("PRINT TRANSFORM", arg)
 		# pyprint(repr(arg))
 		s = eval(str(arg))
-		stdout.write(s)
-	stdout.write('\n')
+		sys.stdout.write(s)
+	sys.stdout.write('\n')
@@ -0,0 +1,134 @@
+import difflib
+import functools
+import glob
+import io
+import multiprocessing
+import os
+import time
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+
+from violet import runner as runner_module
+from violet.lexer import lexer
+from violet.optimizer import DEFAULT_OPT_LEVEL
+from violet.parser import parser
+from violet.runner import Runner
+
+# `python -m violet --test [DIRECTORY]`: runs every program in examples/ (or
+# DIRECTORY) in a pool of worker processes and checks what it printed. A
+# program passes if it exits without an error and its stdout and stderr match
+# the files next to it: `<name>.out` for stdout, which isn't checked without
+# one, and `<name>.err` for stderr, which has to be empty without one. A
+# program with a `<name>.err` is expected to print an error, so it may exit
+# with one as well.
+#
+# A worker runs many programs, so the state the lexer, parser and imports keep
+# between runs is cleared before each one, and its output is captured rather
+# than printed. A program that gives no result for TIMEOUT seconds (or
+# --timeout) fails; as its worker is stuck running it, the programs after it
+# are run again by a new pool.
+
+TESTS = 'examples'
+
+# seconds
+TIMEOUT = 60.0
+
+def expected(file, suffix):
+	# the contents of the expectation file for `file`, or None
+	path = os.path.splitext(file)[0] + suffix
+	try:
+		with open(path) as f:
+			return f.read()
+	except FileNotFoundError:
+		return None
+
+def reset():
+	lexer.errors.clear()
+	parser._error_list.clear()
+	runner_module.MODULES.clear()
+
+def run_test(file, debug, engine, opt_level, cache):
+	# returns (status, stdout, stderr, seconds): status is the exit status,
+	# 1 for an exception
+	reset()
+	out, err = io.StringIO(), io.StringIO()
+	status = 0
+	start = time.perf_counter()
+	with redirect_stdout(out), redirect_stderr(err):
+		try:
+			Runner.open(file, debug=debug, engine=engine, opt_level=opt_level, cache=cache).interpret().run()
+		except SystemExit as e:
+			if isinstance(e.code, int):
+				status = e.code
+			else:
+				status = 1 if e.code is not None else 0
+		except BaseException:
+			traceback.print_exc()
+			status = 1
+	elapsed = time.perf_counter() - start
+	return status, out.getvalue(), err.getvalue(), elapsed
+
+def check(file, status, stdout, stderr):
+	# returns why the test failed, or None if it passed
+	problems = []
+	want_out = expected(file, '.out')
+	want_err = expected(file, '.err')
+	if status and want_err is None:
+		problems.append(f'exited with status {status}')
+	if want_out is not None and stdout != want_out:
+		problems.append('stdout differs:\n' + diff(want_out, stdout))
+	if stderr != (want_err or ''):
+		problems.append('stderr differs:\n' + diff(want_err or '', stderr))
+	return '\n'.join(problems) or None
+
+def diff(want, got):
+	lines = difflib.unified_diff(want.splitlines(True), got.splitlines(True), 'expected', 'actual')
+	return ''.join(line if line.endswith('\n') else line + '\n' for line in lines)
+
+def run_tests(directory=TESTS, *, debug=False, engine='tree', opt_level=DEFAULT_OPT_LEVEL, cache=True, jobs=None, slowest=10, timeout=TIMEOUT):
+	# prints a line per test, the slowest tests and a summary; returns the
+	# number of failures
+	files = sorted(glob.glob(os.path.join(directory, '*.vi')))
+	jobs = min(jobs or os.cpu_count() or 1, len(files) or 1)
+	run = functools.partial(run_test, debug=debug, engine=engine, opt_level=opt_level, cache=cache)
+	start = time.perf_counter()
+	pool = multiprocessing.Pool(jobs)
+	results = [pool.apply_async(run, (file,)) for file in files]
+	failed = 0
+	times = []
+	try:
+		for i, file in enumerate(files):
+			try:
+				status, stdout, stderr, elapsed = results[i].get(timeout)
+			except multiprocessing.TimeoutError:
+				failed += 1
+				times.append((timeout, file))
+				print(f"FAIL {timeout * 1e3:>9.1f}ms  {file}")
+				print(f"\ttimed out after {timeout:g}s")
+				pool.terminate()
+				pool = multiprocessing.Pool(jobs)
+				results[i + 1:] = [pool.apply_async(run, (file,)) for file in files[i + 1:]]
+				continue
+			times.append((elapsed, file))
+			problem = check(file, status, stdout, stderr)
+			if problem is None:
+				print(f"PASS {elapsed * 1e3:>9.1f}ms  {file}")
+			else:
+				failed += 1
+				print(f"FAIL {elapsed * 1e3:>9.1f}ms  {file}")
+				print('\t' + problem.rstrip('\n').replace('\n', '\n\t'))
+	finally:
+		pool.terminate()
+	total = len(files)
+	wall = time.perf_counter() - start
+
+	if slowest > 0 and times:
+		print(f"\nslowest {min(slowest, total)}:")
+		for elapsed, file in sorted(times, reverse=True)[:slowest]:
+			print(f"{elapsed * 1e3:>14.1f}ms  {file}")
+	print(f"\n{total} tests in {wall:.2f}s, {jobs} at a time")
+	if failed:
+		print(f"\n-- {failed}/{total} TESTS FAILED --")
+	else:
+		print(f"\n-- {total}/{total} TESTS PASSED --")
+	return failed
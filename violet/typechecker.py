@@ -0,0 +1,416 @@
+from violet import vast as ast
+from violet import objects
+from violet.resolver import GLOBAL, BUILTIN
+
+# Static type checking, run on a module after violet.optimizer.
+#
+# The checker infers the type of every expression it can: one of the builtin
+# value types below, or None when the type is only known at runtime (anything
+# coming from the standard library, attributes, functions, ...). It reports
+# the errors the program would certainly raise once it got to them, with the
+# same messages, and marks the sites it proved safe so the engines skip their
+# runtime checks there:
+#
+#   Assignment.checked   the value of a typed `let` matches its type
+#   Reassignment.checked the new value has the type of the variable
+#   Return.checked       the value matches the function's return type
+#   FunctionCall.checked the callee is known and every argument matches its
+#                        parameter type
+#   Lambda.checked       the returned value has a single known type
+
+_VALUE_TYPES = (objects.Void, objects.Boolean, objects.String, objects.Integer, objects.List)
+
+_ARITHMETIC = {
+	ast.Plus: '+',
+	ast.Minus: '-',
+	ast.Times: '*',
+	ast.Divide: '/',
+	ast.Modulus: '%',
+	ast.Range: '..',
+}
+
+_ORDERING = (ast.GreaterThan, ast.GreaterOrEqual, ast.LessThan, ast.LessOrEqual)
+
+_CASTS = {
+	objects.Void: (objects.String, objects.Boolean),
+	objects.Boolean: (objects.Boolean, objects.String),
+	objects.String: (objects.String, objects.Boolean, objects.Integer),
+	objects.Integer: (objects.String, objects.Boolean, objects.Integer),
+	objects.List: (objects.String, objects.Boolean, objects.List),
+}
+
+def _name(typ):
+	return typ.__name__
+
+def _type_of_type(typ):
+	# the builtin class a TypeId names, if it names one
+	if not isinstance(typ, ast.TypeId):
+		return None
+	name = typ.name
+	if isinstance(name, ast.Subscript):
+		name = name.name
+	if isinstance(name, ast.Identifier) and not isinstance(name, ast.Attribute) and name.depth == BUILTIN:
+		value = objects.STD_TYPES[name.name]
+		if value in _VALUE_TYPES:
+			return value
+	return None
+
+class _Frame:
+	__slots__ = ('func', 'types', 'lambdas', 'reassigned', 'returns')
+
+	def __init__(self, func):
+		self.func = func
+		self.types = {}  # slot -> type
+		self.lambdas = {}  # slot -> ast.Lambda bound to it
+		self.reassigned = set()  # slots a Reassignment stores to
+		self.returns = []  # (ast.Return, type) of every return statement
+
+class TypeChecker:
+	def __init__(self):
+		self.errors = []
+		self.stmt = None
+		self.frames = []
+		self.globals = {}  # name -> type
+		self.functions = {}  # name -> ast.Function of the globals that are only ever that function
+		self.return_types = {}  # ast.Function or ast.Lambda -> type, once checked
+		self.checking = set()  # ast.Functions being checked
+		self.bindings = {}  # name -> number of statements binding the global
+		self.open_globals = False
+
+	def error(self, msg):
+		self.errors.append((self.stmt.lineno, msg))
+
+	def invalid_type(self, found, expected):
+		self.error(f"invalid type {_name(found)!r} for function call (expected {_name(expected)!r})")
+
+	# module
+
+	def check_module(self, module):
+		reassigned = set()
+		for stmt in module.body:
+			if isinstance(stmt, ast.Import):
+				for identifier in stmt.importing:
+					if identifier.name == '*':
+						self.open_globals = True
+					self.bind(identifier.name)
+			elif isinstance(stmt, ast.Assignment):
+				self.bind(stmt.identifier.name)
+			elif isinstance(stmt, ast.Reassignment):
+				reassigned.add(stmt.identifier.name)
+			elif isinstance(stmt, ast.Function):
+				self.bind(stmt.name.name)
+				self.collect_globals(stmt.body, reassigned)
+
+		if not self.open_globals:
+			for stmt in module.body:
+				if isinstance(stmt, ast.Function):
+					name = stmt.name.name
+					if self.bindings[name] == 1 and name not in reassigned:
+						self.functions[name] = stmt
+
+		for stmt in module.body:
+			self.stmt = stmt
+			if isinstance(stmt, ast.Assignment):
+				self.check_assignment(stmt)
+			elif isinstance(stmt, ast.Reassignment):
+				self.check_reassignment(stmt)
+		for stmt in module.body:
+			if isinstance(stmt, ast.Function):
+				self.check_function(stmt)
+
+	def bind(self, name):
+		self.bindings[name] = self.bindings.get(name, 0) + 1
+
+	def collect_globals(self, body, reassigned):
+		for stmt in body:
+			if isinstance(stmt, ast.Assignment) and stmt.global_scope:
+				self.bind(stmt.identifier.name)
+			elif isinstance(stmt, ast.Reassignment) and stmt.identifier.depth == GLOBAL:
+				reassigned.add(stmt.identifier.name)
+			elif isinstance(stmt, ast.IfControl):
+				for branch in (stmt.if_stmt, *(stmt.elseif_chain or ()), stmt.else_stmt):
+					if branch is not None:
+						self.collect_globals(branch.body, reassigned)
+			elif isinstance(stmt, ast.ForControl):
+				self.collect_globals(stmt.body, reassigned)
+
+	def collect_reassigned(self, body, frame, depth=0):
+		# depth: how many loop frames `body` is in below `frame`
+		for stmt in body:
+			if isinstance(stmt, ast.Reassignment) and stmt.identifier.depth == depth:
+				frame.reassigned.add(stmt.identifier.slot)
+			elif isinstance(stmt, ast.IfControl):
+				for branch in (stmt.if_stmt, *(stmt.elseif_chain or ()), stmt.else_stmt):
+					if branch is not None:
+						self.collect_reassigned(branch.body, frame, depth)
+			elif isinstance(stmt, ast.ForControl):
+				self.collect_reassigned(stmt.body, frame, depth if stmt.frame_size is None else depth + 1)
+
+	# functions
+
+	def check_function(self, func):
+		# returns the type every call of the function returns, checking its
+		# body the first time
+		if func in self.return_types:
+			return self.return_types[func]
+		if func in self.checking:
+			return None  # recursive call, its type is not known yet
+		self.checking.add(func)
+		outer_frames, outer_stmt = self.frames, self.stmt
+		self.frames = []
+
+		frame = self.push_frame(func)
+		self.collect_reassigned(func.body, frame)
+		self.check_body(func.body)
+		declared = _type_of_type(func.ret_value)
+		if func.ret_value is not None:
+			ret = declared
+			if declared is not None:
+				for stmt, typ in frame.returns:
+					if typ is not None and issubclass(typ, declared):
+						stmt.checked = True
+		else:
+			# the first return sets the return type of an unannotated
+			# function; when every return has the same type none can fail
+			types = {typ for stmt, typ in frame.returns}
+			if func.body and not isinstance(func.body[-1], ast.Return):
+				types.add(objects.Void)  # the implicit `return nil`
+			ret = types.pop() if len(types) == 1 else None
+			if ret is not None:
+				for stmt, typ in frame.returns:
+					stmt.checked = True
+		self.frames.pop()
+
+		self.frames, self.stmt = outer_frames, outer_stmt
+		self.checking.discard(func)
+		self.return_types[func] = ret
+		return ret
+
+	def check_lambda(self, func):
+		frame = self.push_frame(func)
+		ret = self.check_expr(func.body)
+		self.frames.pop()
+		func.checked = ret is not None
+		self.return_types[func] = ret
+		return ret
+
+	def push_frame(self, func):
+		frame = _Frame(func)
+		for param in func.params:
+			frame.types[param.name.slot] = _type_of_type(param.type)
+		self.frames.append(frame)
+		return frame
+
+	# statements
+
+	def check_body(self, body):
+		for stmt in body:
+			self.stmt = stmt
+			self.check_stmt(stmt)
+
+	def check_stmt(self, stmt):
+		if isinstance(stmt, ast.Assignment):
+			self.check_assignment(stmt)
+		elif isinstance(stmt, ast.Reassignment):
+			self.check_reassignment(stmt)
+		elif isinstance(stmt, ast.Return):
+			expr = stmt.expr
+			if expr is None or isinstance(expr, objects.Void):
+				typ = objects.Void
+			else:
+				typ = self.check_expr(expr)
+			frame = self.frames[-1]
+			frame.returns.append((stmt, typ))
+			declared = _type_of_type(frame.func.ret_value)
+			if typ is not None and declared is not None and not issubclass(typ, declared):
+				self.invalid_type(typ, declared)
+		elif isinstance(stmt, ast.FunctionCall):
+			self.check_expr(stmt)
+		elif isinstance(stmt, ast.IfControl):
+			for branch in (stmt.if_stmt, *(stmt.elseif_chain or ())):
+				self.stmt = stmt
+				typ = self.check_expr(branch.expr)
+				if typ is not None and typ is not objects.Boolean:
+					self.error(f"unexpected type {_name(typ)!r} (expected \"Boolean\")")
+				self.check_body(branch.body)
+			if stmt.else_stmt:
+				self.check_body(stmt.else_stmt.body)
+		elif isinstance(stmt, ast.ForControl):
+			iterable = self.check_expr(stmt.expr)
+			if iterable is not None and iterable is not objects.List:
+				self.error(f"cannot loop over non-iterable type {_name(iterable)!r}")
+			item = None
+			if isinstance(stmt.expr, ast.BiOperatorExpr) and isinstance(stmt.expr.op, ast.Range) and iterable is objects.List:
+				item = objects.Integer
+			if stmt.frame_size is None:
+				self.frames[-1].types[stmt.name.slot] = item
+				self.check_body(stmt.body)
+				return
+			# every iteration has a frame of its own, returning from the function
+			outer = self.frames[-1]
+			frame = _Frame(outer.func)
+			frame.returns = outer.returns
+			frame.types[stmt.name.slot] = item
+			self.collect_reassigned(stmt.body, frame)
+			self.frames.append(frame)
+			self.check_body(stmt.body)
+			self.frames.pop()
+
+	def check_assignment(self, stmt):
+		typ = self.check_expr(stmt.expression)
+		declared = _type_of_type(stmt.type)
+		if typ is not None and declared is not None:
+			if issubclass(typ, declared):
+				stmt.checked = True
+			else:
+				self.invalid_type(typ, declared)
+
+		identifier = stmt.identifier
+		if identifier.depth == GLOBAL:
+			if self.bindings.get(identifier.name) == 1 and not self.open_globals:
+				self.globals[identifier.name] = typ
+		else:
+			frame = self.frames[-1]
+			frame.types[identifier.slot] = typ
+			if isinstance(stmt.expression, ast.Lambda) and identifier.slot not in frame.reassigned:
+				frame.lambdas[identifier.slot] = stmt.expression
+
+	def check_reassignment(self, stmt):
+		typ = self.check_expr(stmt.expression)
+		current = self.check_load(stmt.identifier)
+		if typ is not None and current is not None:
+			if issubclass(typ, current):
+				stmt.checked = True
+			else:
+				self.invalid_type(typ, current)
+
+	# expressions
+
+	def check_expr(self, expr):
+		cls = expr.__class__
+		if cls is ast.Constant:
+			typ = expr.value.__class__
+			return typ if typ in _VALUE_TYPES else None
+		elif cls is ast.Primitive:
+			if expr.type is objects.List:
+				for item in expr.value:
+					self.check_expr(item)
+			return expr.type
+		elif cls is ast.Identifier:
+			return self.check_load(expr)
+		elif cls is ast.BiOperatorExpr:
+			return self.check_binary(expr)
+		elif cls is ast.FunctionCall:
+			return self.check_call(expr)
+		elif cls is ast.Cast:
+			typ = self.check_expr(expr.expr)
+			target = _type_of_type(expr.type)
+			if typ is not None and target is not None:
+				if typ not in _CASTS:
+					self.error(f"operator-> not available on type {_name(typ)!r}")
+				elif target not in _CASTS[typ]:
+					self.error(f"cannot cast {_name(typ)!r} to type {_name(target)!r}")
+			return target
+		elif cls is ast.TernaryQMark:
+			q = self.check_expr(expr.expr0)
+			left = self.check_expr(expr.expr1)
+			right = self.check_expr(expr.expr2)
+			if q is not None and q is not objects.Boolean:
+				self.error(f"expected \"Boolean\" in ternary, found {_name(q)!r}")
+			if left is not None and right is not None:
+				# a static rule only: at runtime just one branch is evaluated
+				if not issubclass(right, left):
+					self.error(f"mismatched types in ternary: {_name(left)!r} and {_name(right)!r}")
+				return left if left is right else None
+		elif cls is ast.NilOrElse:
+			left = self.check_expr(expr.expr0)
+			right = self.check_expr(expr.expr1)
+			if left is objects.Void:
+				return right
+			elif left is not None and left is right:
+				return left
+		elif cls is ast.LogicalAnd or cls is ast.LogicalOr:
+			for operand in (expr.expr0, expr.expr1):
+				typ = self.check_expr(operand)
+				if typ is not None and typ is not objects.Boolean:
+					self.error(f"expected \"Boolean\" in \"{expr.symbol}\", found {_name(typ)!r}")
+			return objects.Boolean
+		elif cls is ast.Lambda:
+			self.check_lambda(expr)
+		return None
+
+	def check_load(self, identifier):
+		depth = identifier.depth
+		if depth == GLOBAL:
+			return self.globals.get(identifier.name)
+		elif depth is not None and 0 <= depth < len(self.frames):
+			return self.frames[-1 - depth].types.get(identifier.slot)
+		return None
+
+	def check_binary(self, expr):
+		left = self.check_expr(expr.left)
+		op = expr.op.__class__
+		if op is ast.TypeCheck:
+			return objects.Boolean if left is not None else None
+		right = self.check_expr(expr.right)
+		if left is None:
+			return None
+
+		symbol = _ARITHMETIC.get(op)
+		if symbol is not None:
+			if left is not objects.Integer:
+				self.error(f"operator{symbol} not available on type {_name(left)!r}")
+			elif right is not None and right is not objects.Integer:
+				self.error(f"operator{symbol} not applicable between types {_name(left)!r} and {_name(right)!r}")
+			return objects.List if op is ast.Range else objects.Integer
+		elif op in _ORDERING:
+			return objects.Boolean if left is right else None
+		return objects.Boolean  # == and !=, defined on every value type
+
+	def check_call(self, expr):
+		args = [self.check_expr(arg) for arg in expr.args]
+		callee = self.callee(expr.name)
+		if callee is None:
+			return None
+
+		params = callee.params
+		if len(args) < len(params):
+			self.error("not enough arguments for function call")
+			return None
+		elif len(args) > len(params):
+			self.error("too many arguments for function call")
+			return None
+		checked = True
+		for typ, param in zip(args, params):
+			expected = _type_of_type(param.type)
+			if typ is None or expected is None:
+				checked = False
+			elif not issubclass(typ, expected):
+				self.invalid_type(typ, expected)
+				checked = False
+		expr.checked = checked
+
+		if isinstance(callee, ast.Lambda):
+			return self.return_types.get(callee)
+		return self.check_function(callee)
+
+	def callee(self, name):
+		# the function a call certainly calls, if it is known
+		if isinstance(name, ast.Attribute):
+			return None
+		depth = name.depth
+		if depth == GLOBAL:
+			return self.functions.get(name.name)
+		elif depth is not None and 0 <= depth < len(self.frames):
+			frame = self.frames[-1 - depth]
+			if name.slot not in frame.reassigned:
+				return frame.lambdas.get(name.slot)
+		return None
+
+def check(module, open_globals=False):
+	# open_globals: the module's globals can be bound again after it has run
+	# (by a REPL session), so their types are never assumed
+	checker = TypeChecker()
+	checker.open_globals = open_globals
+	checker.check_module(module)
+	return checker
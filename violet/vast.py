@@ -1,13 +1,50 @@
 from violet.errors import *
 from violet import objects
 import ast as pyast
+import operator
 from types import BuiltinMethodType as PyMethodType
 from violet._util import IndexableNamespace
 
+_SLOT_NAMES = {}
+
+def slot_names(cls):
+	names = _SLOT_NAMES.get(cls)
+	if names is None:
+		names = []
+		for klass in reversed(cls.__mro__):
+			slots = klass.__dict__.get('__slots__', ())
+			names.extend((slots,) if isinstance(slots, str) else slots)
+		names = _SLOT_NAMES[cls] = tuple(names)
+	return names
+
+def walk(node):
+	# every node under `node` (or a list of them), not looking into lambdas,
+	# whose bodies only run when they are called
+	if isinstance(node, (list, tuple)):
+		for item in node:
+			yield from walk(item)
+	elif isinstance(node, VioletASTBase):
+		yield node
+		if node.__class__ is not Lambda:
+			for name in slot_names(node.__class__):
+				yield from walk(getattr(node, name, None))
+
+def _rebuild(cls, values):
+	node = object.__new__(cls)
+	for name, value in zip(slot_names(cls), values):
+		if value is not ...:
+			object.__setattr__(node, name, value)
+	return node
+
 class VioletASTBase:
 	__slots__ = 'lineno',
 	cls_name = "pp"
 
+	def __reduce__(self):
+		# pickled (into the AST cache) as the class and its slot values in
+		# order, with ... for the ones never set
+		return _rebuild, (self.__class__, tuple(getattr(self, name, ...) for name in slot_names(self.__class__)))
+
 	def __init__(self, prod):
 		self.lineno = prod.lineno
 
@@ -49,9 +86,9 @@ class Primitive(VioletASTBase):
 
 	def eval(self, runner):
 		if self.type is objects.Void:
-			return objects.Void()
+			return objects.NIL
 		elif self.type is objects.Boolean:
-			return self.type(self.value == 'true')
+			return objects.TRUE if self.value == 'true' else objects.FALSE
 		elif self.type is objects.Integer:
 			return self.type(int(self.value))
 		elif self.type is objects.String:
@@ -61,13 +98,27 @@ class Primitive(VioletASTBase):
 		else:
 			raise Exception(self.type)
 
+class Constant(VioletASTBase):
+	# a literal or folded expression, already converted to its runtime object
+	# by violet.optimizer
+	__slots__ = ('value',)
+
+	def __init__(self, value, lineno=-1):
+		self.lineno = lineno
+		self.value = value
+
+	def eval(self, runner):
+		return self.value
+
 class Identifier(VioletASTBase):
-	__slots__ = ('name',)
+	__slots__ = ('name', 'depth', 'slot')
 	cls_name = "identifier"
 
 	def __init__(self, name, lineno):
 		super().__init__(IndexableNamespace(lineno=lineno))
 		self.name = name
+		self.depth = None  # set by violet.resolver
+		self.slot = None
 
 	@classmethod
 	def from_production(cls, p):
@@ -155,7 +206,7 @@ class Import(VioletASTBase):
 		self.from_module = prod.identity
 
 class Assignment(VioletASTBase):
-	__slots__ = ('global_scope', 'constant', 'identifier', 'type', 'expression')
+	__slots__ = ('global_scope', 'constant', 'identifier', 'type', 'expression', 'checked')
 
 	def __init__(self, prod):
 		super().__init__(prod)
@@ -164,15 +215,17 @@ class Assignment(VioletASTBase):
 		self.identifier = prod.name
 		self.type = getattr(prod, 'typ', None)
 		self.expression = prod.expr
+		self.checked = False  # set by violet.typechecker
 
 class Reassignment(VioletASTBase):
-	__slots__ = 'identifier', 'expression', 'constant'
+	__slots__ = 'identifier', 'expression', 'constant', 'checked'
 
 	def __init__(self, prod):
 		super().__init__(prod)
 		self.identifier = prod.name
 		self.expression = prod.expr
 		self.constant = False
+		self.checked = False
 
 class Parameter(VioletASTBase):
 	__slots__ = ('name', 'type')
@@ -196,18 +249,14 @@ class TernaryQMark(VioletASTBase):
 		if not isinstance(q, objects.Boolean):
 			raise Exception(f"expected \"Boolean\" in ternary, found {q.__class__.__name__!r}")
 
-		left = self.expr1.eval(runner)
-		right = self.expr2.eval(runner)
-
-		if not isinstance(right, left.__class__):
-			raise Exception(f"mismatched types in ternary: {left.__class__.__name__!r} and {right.__class__.__name__!r}")
-
+		# only the branch taken is evaluated, mismatched branch types are
+		# reported by violet.typechecker
 		if q.value0:
-			return left
-		return right
+			return self.expr1.eval(runner)
+		return self.expr2.eval(runner)
 
 class Function(VioletASTBase):
-	__slots__ = ('name', 'params', 'ret_value', 'body')
+	__slots__ = ('name', 'params', 'ret_value', 'body', 'frame_size')
 
 	def __init__(self, prod):
 		super().__init__(prod)
@@ -222,9 +271,10 @@ class Function(VioletASTBase):
 		self.ret_value = getattr(prod, 'typ', None)
 		self.body = prod.block
 		self.lineno = prod.lineno
+		self.frame_size = 0
 
 	def eval(self, runner):
-		return objects.Function(self.name, self.params, self.ret_value, self.body, self.lineno)
+		return objects.Function(self, closure=runner.get_current_scope())
 
 class Break(VioletASTBase):
 	pass
@@ -233,63 +283,65 @@ class Continue(VioletASTBase):
 	pass
 
 class Lambda(VioletASTBase):
-	__slots__ = ("params", "body")
+	__slots__ = ("params", "body", "frame_size", "checked", "_returns")
 
 	def __init__(self, prod):
 		super().__init__(prod)
 		self.params = getattr(prod, "param_list", [])
 		self.body = prod.expr
 		self.lineno = prod.lineno
+		self.frame_size = 0
+		self.checked = False
+		self._returns = None
+
+	def returns(self):
+		# the body as the statements of a function, shared by every
+		# objects.Lambda made from this node
+		if self._returns is None:
+			ret = Return(self.body, self.lineno)
+			ret.checked = self.checked
+			self._returns = [ret]
+		return self._returns
 
 	def eval(self, runner):
-		return objects.Lambda(self.params, self.body, self.lineno)
+		return objects.Lambda(self, closure=runner.get_current_scope())
 
 class FunctionCall(VioletASTBase):
-	__slots__ = ('name', 'args')
+	__slots__ = ('name', 'args', 'checked', 'attrs', '_cache')
 
 	def __init__(self, prod):
 		super().__init__(prod)
 		name, args = prod.identity, getattr(prod, 'arg_list', [])
 		self.name = name
 		self.args = args
+		self.checked = False
+		self.attrs = tuple(name.transform_to_string().split('.')[1:])
+		self._cache = objects.CallCache()
 
 	def eval(self, runner):
-		name = self.name.get_top_level_name()
-		obj = runner.get_current_scope().get_var(name)
-		attrs = self.name.transform_to_string().split('.')[1:]
-		# print(name, obj, attrs)
-		for attr in attrs:
-			try:
-				obj = getattr(obj, attr)
-			except AttributeError:
-				raise HasNoAttribute(obj, attr)
+		obj = runner.get_current_scope().get_var(self.name.get_top_level_name())
+		cache = self._cache
+		if obj is cache.target:
+			obj, kind = cache.callee, cache.kind
+		else:
+			obj, kind = cache.resolve(obj, self.attrs)
 
-		args = self.args
 		# print(obj, args)
-		# print([o.eval(runner) for o in args])
-		transformed = [o.eval(runner) for o in args]
-		viobj = getattr(obj, '__self__', None)
-		if viobj is not None:
-			viobj = issubclass(viobj, objects.Object)
-		# print(viobj, isinstance(obj, objects.Function), hasattr(obj, '_0_identifies_as_violet'))
-		if not viobj and not isinstance(obj, objects.Function) and not hasattr(obj, '_0_identifies_as_violet'):
-			# print(transformed)
-			value = obj(*transformed)
-		else:
-			# print(transformed)
-			if isinstance(obj, objects.Function):
-				obj(transformed, runner=runner)
-				value = obj.reset_state()
-			else:
-				value = obj(transformed, runner=runner)
-		# print(value)
-		return value
+		transformed = [o.eval(runner) for o in self.args]
+		if kind == objects.CALL_FUNCTION:
+			return obj.call0(transformed, runner, self.checked)
+		elif kind == objects.CALL_PYTHON:
+			return obj(*transformed)
+		return obj(transformed, runner=runner)
 
 class Return(VioletASTBase):
-	__slots__ = 'expr',
+	__slots__ = 'expr', 'checked', 'implicit'
 
-	def __init__(self, expr):
+	def __init__(self, expr, lineno=-1, implicit=False):
+		self.lineno = lineno
 		self.expr = expr or objects.Void()
+		self.checked = False
+		self.implicit = implicit  # the `return nil` appended to function bodies
 
 class Cast(VioletASTBase):
 	__slots__ = 'expr', 'type'
@@ -321,20 +373,19 @@ class IfControl(Control):
 			setattr(self, name, attr)
 
 	def eval(self, runner, func):
-		can = self.if_stmt.eval(runner, func)
-		# print("IF ->", can)
-		if not can and self.elseif_chain:
+		if self.if_stmt.test(runner):
+			return self.if_stmt.eval(runner, func)
+		if self.elseif_chain:
 			for stmt in self.elseif_chain:
-				can = stmt.eval(runner, func)
-				if can:
-					break
-			# print("ELSEIF ->", can)
-		if not can and self.else_stmt:
-			self.else_stmt.eval(runner, func)
+				if stmt.test(runner):
+					# print("ELSEIF ->", stmt)
+					return stmt.eval(runner, func)
+		if self.else_stmt:
 			# print("ELSE")
+			return self.else_stmt.eval(runner, func)
 
 class ForControl(Control):
-	__slots__ = 'name', 'expr', 'body'
+	__slots__ = 'name', 'expr', 'body', 'frame_size'
 
 	def __init__(self, prod):
 		super().__init__(prod)
@@ -342,6 +393,7 @@ class ForControl(Control):
 		self.name = prod.name
 		self.expr = prod.expr
 		self.body = prod.block
+		self.frame_size = None  # set by violet.resolver if every iteration gets a frame
 
 	def eval(self, runner, func):
 		it = self.expr.eval(runner)
@@ -350,14 +402,16 @@ class ForControl(Control):
 		except TypeError:
 			raise Exception(f"cannot loop over non-iterable type {it.__class__.__name__!r}")
 		for i in it:
-			with runner.new_scope():
-				runner.get_current_scope().set_var(self.name, i, const=True)
-				try:
-					runner.exec_function_body(self.body, func)
-				except BreakExit:
+			runner.push_scope().set_var(self.name, i, const=True)
+			try:
+				signal = runner.exec_function_body(self.body, func)
+			finally:
+				runner.pop_scope()
+			if signal is not None:
+				if signal is BREAK:
 					break
-				except ContinueExit:
-					continue
+				if signal is not CONTINUE:
+					return signal
 
 class WhileControl(Control):
 	pass  # todo
@@ -378,13 +432,46 @@ class NilOrElse(Control):
 
 	def eval(self, runner):
 		left = runner.get_var(self.expr0) if isinstance(self.expr0, Identifier) else self.expr0.eval(runner)
-		right = runner.get_var(self.expr1) if isinstance(self.expr1, Identifier) else self.expr1.eval(runner)
 		# sprint(f"{self.expr0!r}: {left!r}")
-		# print(f"{self.expr1!r}: {right!r}")
 		if isinstance(left, objects.Void):
-			return right
+			return runner.get_var(self.expr1) if isinstance(self.expr1, Identifier) else self.expr1.eval(runner)
 		return left
 
+def check_logical(value, symbol):
+	if not isinstance(value, objects.Boolean):
+		raise Exception(f"expected \"Boolean\" in \"{symbol}\", found {value.__class__.__name__!r}")
+	return value
+
+class LogicalAnd(VioletASTBase):
+	__slots__ = ('expr0', 'expr1')
+	symbol = '&&'
+
+	def __init__(self, prod):
+		super().__init__(prod)
+		self.expr0 = prod.expr0
+		self.expr1 = prod.expr1
+
+	def eval(self, runner):
+		left = check_logical(self.expr0.eval(runner), '&&')
+		if not left.value0:
+			return left
+		return check_logical(self.expr1.eval(runner), '&&')
+
+class LogicalOr(VioletASTBase):
+	__slots__ = ('expr0', 'expr1')
+	symbol = '||'
+
+	def __init__(self, prod):
+		super().__init__(prod)
+		self.expr0 = prod.expr0
+		self.expr1 = prod.expr1
+
+	def eval(self, runner):
+		left = check_logical(self.expr0.eval(runner), '||')
+		if left.value0:
+			return left
+		return check_logical(self.expr1.eval(runner), '||')
+
 class If(Control):
 	__slots__ = 'expr', 'body'
 
@@ -393,15 +480,16 @@ class If(Control):
 		self.expr = prod.expr
 		self.body = prod.block
 
-	def eval(self, runner, func):
+	def test(self, runner):
 		expr = self.expr.eval(runner)
 		# print(self.__class__.__name__, "->", self.expr)
 		if not isinstance(expr, objects.Boolean):
 			raise Exception(f"unexpected type {expr.__class__.__name__!r} (expected \"Boolean\")")
-		if expr:
-			with runner.new_scope():
-				runner.exec_function_body(self.body, func)
-		return expr
+		return expr.value0
+
+	def eval(self, runner, func):
+		with runner.new_scope():
+			return runner.exec_function_body(self.body, func)
 
 class ElseIf(Control):
 	__slots__ = 'expr', 'body'
@@ -411,6 +499,9 @@ class ElseIf(Control):
 		self.expr = prod.expr
 		self.body = prod.block
 
+	def test(self, runner):
+		return If.test(self, runner)
+
 	def eval(self, runner, func):
 		return If.eval(self, runner, func)
 
@@ -423,7 +514,7 @@ class Else(Control):
 
 	def eval(self, runner, func):
 		with runner.new_scope():
-			runner.exec_function_body(self.body, func)
+			return runner.exec_function_body(self.body, func)
 
 class Operator:
 	__slots__ = ()
@@ -434,95 +525,82 @@ class Operator:
 # math
 
 class Plus(Operator):
-	pass
+	symbol = '+'
 
 class Minus(Operator):
-	pass
+	symbol = '-'
 
 class Times(Operator):
-	pass
+	symbol = '*'
 
 class Divide(Operator):
-	pass
+	symbol = '/'
 
 class Modulus(Operator):
-	pass
+	symbol = '%'
 
 class Range(Operator):
-	pass
+	symbol = '..'
 
 # equality
 
 class EqualTo(Operator):
-	pass
+	symbol = '=='
 
 class NotEqualTo(Operator):
-	pass
+	symbol = '!='
 
 class GreaterThan(Operator):
-	pass
+	symbol = '>'
 
 class GreaterOrEqual(Operator):
-	pass
+	symbol = '>='
 
 class LessThan(Operator):
-	pass
+	symbol = '<'
 
 class LessOrEqual(Operator):
-	pass
+	symbol = '<='
 
 class TypeCheck(Operator):
-	pass
+	symbol = '=>'
+
+def _range(l, r):
+	return l.get_special_method('..')(r)
+
+def _type_check(l, r):
+	return l.get_special_method('=>')(r)
+
+BINARY_OPERATORS = {
+	Plus: operator.add,
+	Minus: operator.sub,
+	Times: operator.mul,
+	Divide: operator.floordiv,
+	Modulus: operator.mod,
+	EqualTo: operator.eq,
+	NotEqualTo: operator.ne,
+	GreaterThan: operator.gt,
+	GreaterOrEqual: operator.ge,
+	LessThan: operator.lt,
+	LessOrEqual: operator.le,
+	Range: _range,
+	TypeCheck: _type_check,
+}
 
 class BiOperatorExpr(VioletASTBase):
-	__slots__ = ('left', 'op', 'right')
+	__slots__ = ('left', 'op', 'right', '_cache')
 
 	def __init__(self, left, op, right):
 		self.left = left
 		self.op = op
 		self.right = right
-
-	def _Plus(self, l, r):
-		return l + r
-
-	def _Minus(self, l, r):
-		return l - r
-
-	def _Times(self, l, r):
-		return l * r
-
-	def _Divide(self, l, r):
-		return l // r
-
-	def _Modulus(self, l, r):
-		return l % r
-
-	def _EqualTo(self, l, r):
-		return l == r
-
-	def _NotEqualTo(self, l, r):
-		return l != r
-
-	def _GreaterThan(self, l , r):
-		return l > r
-
-	def _GreaterOrEqual(self, l, r):
-		return l >= r
-
-	def _LessThan(self, l, r):
-		return l < r
-
-	def _LessOrEqual(self, l, r):
-		return l <= r
-
-	def _Range(self, l, r):
-		return l.get_special_method('..')(r)
-
-	def _TypeCheck(self, l, r):
-		return l.get_special_method('=>')(r)
+		self._cache = objects.OperatorCache(op.symbol, BINARY_OPERATORS[op.__class__])
 
 	def eval(self, runner):
 		left = runner.get_var(self.left) if isinstance(self.left, Identifier) else self.left.eval(runner)
 		right = runner.get_var(self.right) if isinstance(self.right, Identifier) else self.right.eval(runner)
 
-		return getattr(self, '_' + self.op.__class__.__name__)(left, right)
+		cache = self._cache
+		if left.__class__ is cache.cls:
+			return cache.func(left, right)
+		return cache.miss(left, right)
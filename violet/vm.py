@@ -0,0 +1,808 @@
+import ast as pyast
+import sys
+
+from violet import vast as ast
+from violet import objects
+from violet.errors import *
+from violet.resolver import Frame, GLOBAL, BUILTIN
+
+# Bytecode compiler and stack VM.
+#
+# Every function (and every module) compiles to a Code object holding a flat
+# list of (opcode, argument) pairs, plus the constant and name tables the
+# arguments index into. owners[i // 2] is the statement instruction i was
+# compiled from, which is what errors are reported against.
+#
+# Locals live in the slots of a resolver.Frame; globals are looked up by name
+# in the module's global scope.
+#
+# Code compiled instrumented, for a runner with violet.hooks, also calls them:
+# functions start with an ENTER instruction and leave through a LEAVE one, and
+# statements start with a STATEMENT one. Other code has none of these, so the
+# VM never checks for hooks.
+
+OPNAMES = (
+	'LOAD_CONST',
+	'LOAD_FAST',
+	'LOAD_DEREF',
+	'LOAD_GLOBAL',
+	'LOAD_ATTR',
+	'BINARY_OP',
+	'CALL',
+	'CALL_CHECKED',
+	'POP_TOP',
+	'STORE_FAST',
+	'STORE_GLOBAL',
+	'STORE_GLOBAL_CONST',
+	'REASSIGN_FAST',
+	'REASSIGN_GLOBAL',
+	'CHECK_TYPE',
+	'POP_JUMP_IF_FALSE',
+	'JUMP',
+	'FOR_ITER',
+	'GET_ITER',
+	'CAST',
+	'TERNARY',
+	'NIL_OR_ELSE',
+	'JUMP_IF_FALSE_OR_POP',
+	'JUMP_IF_TRUE_OR_POP',
+	'CHECK_BOOLEAN',
+	'BUILD_LIST',
+	'RETURN_VALUE',
+	'RETURN_NONE',
+	'MAKE_FUNCTION',
+	'MAKE_LAMBDA',
+	'IMPORT',
+	'EVAL',
+	'RAISE',
+	'STATEMENT',
+	'ENTER',
+	'LEAVE',
+	'PUSH_FRAME',
+	'POP_FRAME',
+	'STORE_DEREF',
+	'REASSIGN_DEREF',
+)
+
+(
+	LOAD_CONST,
+	LOAD_FAST,
+	LOAD_DEREF,
+	LOAD_GLOBAL,
+	LOAD_ATTR,
+	BINARY_OP,
+	CALL,
+	CALL_CHECKED,
+	POP_TOP,
+	STORE_FAST,
+	STORE_GLOBAL,
+	STORE_GLOBAL_CONST,
+	REASSIGN_FAST,
+	REASSIGN_GLOBAL,
+	CHECK_TYPE,
+	POP_JUMP_IF_FALSE,
+	JUMP,
+	FOR_ITER,
+	GET_ITER,
+	CAST,
+	TERNARY,
+	NIL_OR_ELSE,
+	JUMP_IF_FALSE_OR_POP,
+	JUMP_IF_TRUE_OR_POP,
+	CHECK_BOOLEAN,
+	BUILD_LIST,
+	RETURN_VALUE,
+	RETURN_NONE,
+	MAKE_FUNCTION,
+	MAKE_LAMBDA,
+	IMPORT,
+	EVAL,
+	RAISE,
+	STATEMENT,
+	ENTER,
+	LEAVE,
+	PUSH_FRAME,
+	POP_FRAME,
+	STORE_DEREF,
+	REASSIGN_DEREF,
+) = range(len(OPNAMES))
+
+JUMPS = {POP_JUMP_IF_FALSE, JUMP, FOR_ITER, TERNARY, NIL_OR_ELSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP}
+
+class Code:
+	__slots__ = ('name', 'node', 'params', 'size', 'ops', 'consts', 'names', 'varnames', 'owners')
+
+	def __init__(self, name, node, params=(), size=0):
+		self.name = name
+		self.node = node
+		self.params = [(param.name.slot, param.type) for param in params]
+		self.size = size
+		self.ops = []
+		self.consts = []
+		self.names = []
+		self.varnames = [None] * size
+		self.owners = []
+
+	def __repr__(self):
+		return f"<code {self.name}>"
+
+	def __call__(self, func, args, checked=False):
+		# entry point for objects.Function.call0
+		return call(func, args, checked)
+
+class Compiler:
+	def __init__(self, code, instrument=False):
+		self.code = code
+		self.instrument = instrument
+		self.owner = None
+		self.loops = []
+		self.framed = 0  # loop frames the code being compiled runs in
+		self._names = {}
+
+	# emitting
+
+	def emit(self, op, arg=0):
+		self.code.ops.append(op)
+		self.code.ops.append(arg)
+		self.code.owners.append(self.owner)
+		return len(self.code.ops) - 2
+
+	def label(self):
+		return len(self.code.ops)
+
+	def patch(self, at, target=None):
+		self.code.ops[at + 1] = self.label() if target is None else target
+
+	def const(self, value):
+		self.code.consts.append(value)
+		return len(self.code.consts) - 1
+
+	def name(self, identifier):
+		idx = self._names.get(identifier.name)
+		if idx is None:
+			idx = self._names[identifier.name] = len(self.code.names)
+			self.code.names.append(identifier)
+		return idx
+
+	def raise_(self, msg):
+		self.emit(RAISE, self.const(msg))
+
+	def load(self, identifier):
+		depth = identifier.depth
+		if depth == BUILTIN:
+			self.emit(LOAD_CONST, self.const(objects.STD_TYPES[identifier.name]))
+		elif depth == GLOBAL:
+			self.emit(LOAD_GLOBAL, self.name(identifier))
+		elif depth == 0 and not self.framed:
+			self.code.varnames[identifier.slot] = identifier.name
+			self.emit(LOAD_FAST, identifier.slot)
+		elif depth is None:  # not resolved, eg. attributes
+			self.emit(EVAL, self.const(identifier))
+		else:
+			self.emit(LOAD_DEREF, self.deref(identifier))
+
+	def store(self, identifier, const=False):
+		if identifier.depth == GLOBAL:
+			self.emit(STORE_GLOBAL_CONST if const else STORE_GLOBAL, self.name(identifier))
+		elif identifier.depth == 0 and not self.framed:
+			self.code.varnames[identifier.slot] = identifier.name
+			self.emit(STORE_FAST, identifier.slot)
+		else:
+			self.emit(STORE_DEREF, self.deref(identifier))
+
+	def deref(self, identifier):
+		return self.const((identifier.depth, identifier.slot, identifier.name))
+
+	# bodies
+
+	def compile_module(self, module):
+		for stmt in module.body:
+			self.owner = stmt
+			if self.instrument:
+				self.emit(STATEMENT, self.const(stmt))
+			if isinstance(stmt, ast.Import):
+				self.emit(IMPORT, self.const(stmt))
+			elif isinstance(stmt, ast.Assignment):
+				self.compile_assignment(stmt)
+			elif isinstance(stmt, ast.Reassignment):
+				self.compile_reassignment(stmt)
+			elif isinstance(stmt, ast.Function):
+				self.emit(MAKE_FUNCTION, self.const(compile_function(stmt, self.instrument)))
+				self.store(stmt.name)
+			else:
+				self.raise_(f'unexpected {stmt.__class__.__name__!r} statement')
+		self.emit(RETURN_NONE)
+
+	def compile_function(self, body):
+		if self.instrument:
+			self.emit(ENTER)
+		if not body:
+			self.leave(False)
+			self.emit(RETURN_NONE)
+			return
+		self.compile_body(body)
+		if not isinstance(body[-1], ast.Return):
+			# objects.Function appends the same implicit `return nil`
+			self.emit(LOAD_CONST, self.const(objects.Void()))
+			self.leave()
+			self.emit(RETURN_VALUE)
+
+	def leave(self, value=True):
+		# before a function returns (value: with the value on the stack)
+		if self.instrument:
+			self.emit(LEAVE, value)
+
+	def compile_body(self, body):
+		for stmt in body:
+			self.owner = stmt
+			if self.instrument and not (stmt.__class__ is ast.Return and stmt.implicit):
+				self.emit(STATEMENT, self.const(stmt))
+			self.compile_stmt(stmt)
+
+	# statements
+
+	def compile_stmt(self, stmt):
+		if isinstance(stmt, ast.Assignment):
+			self.compile_assignment(stmt)
+		elif isinstance(stmt, ast.Reassignment):
+			self.compile_reassignment(stmt)
+		elif isinstance(stmt, ast.Return):
+			self.compile_return(stmt)
+		elif isinstance(stmt, ast.Break):
+			self.compile_loop_exit(stmt, 'break')
+		elif isinstance(stmt, ast.Continue):
+			self.compile_loop_exit(stmt, 'continue')
+		elif isinstance(stmt, ast.FunctionCall):
+			self.compile_call(stmt)
+			self.emit(POP_TOP)
+		elif isinstance(stmt, ast.IfControl):
+			self.compile_if(stmt)
+		elif isinstance(stmt, ast.ForControl):
+			self.compile_for(stmt)
+		else:
+			self.raise_(f'unexpected {stmt.__class__.__name__!r} statement')
+
+	def compile_assignment(self, stmt):
+		self.compile_expr(stmt.expression)
+		if stmt.type is not None and not stmt.checked:
+			self.compile_expr(stmt.type)
+			self.emit(CHECK_TYPE)
+		self.store(stmt.identifier, stmt.constant)
+
+	def compile_reassignment(self, stmt):
+		self.compile_expr(stmt.expression)
+		identifier = stmt.identifier
+		if identifier.depth == GLOBAL:
+			self.emit(REASSIGN_GLOBAL, self.name(identifier))
+		elif stmt.checked:
+			self.store(identifier)
+		elif identifier.depth == 0 and not self.framed:
+			self.emit(REASSIGN_FAST, identifier.slot)
+		else:
+			self.emit(REASSIGN_DEREF, self.deref(identifier))
+
+	def compile_return(self, stmt):
+		expr = stmt.expr
+		if expr is None or isinstance(expr, objects.Void):
+			self.emit(LOAD_CONST, self.const(objects.Void()))
+		else:
+			self.compile_expr(expr)
+		self.leave()
+		self.emit(RETURN_VALUE, stmt.checked)
+
+	def compile_loop_exit(self, stmt, kind):
+		if not self.loops:
+			self.raise_(f'unexpected "{kind}" statement at this time')
+			return
+		continues, breaks, framed = self.loops[-1]
+		if kind == 'break':
+			if framed:
+				self.emit(POP_FRAME)
+			breaks.append(self.emit(JUMP))
+		else:
+			# to the loop's POP_FRAME, if it has one
+			continues.append(self.emit(JUMP))
+
+	def compile_if(self, stmt):
+		branches = [stmt.if_stmt, *(stmt.elseif_chain or ())]
+		ends = []
+		for branch in branches:
+			self.owner = stmt
+			self.compile_expr(branch.expr)
+			skip = self.emit(POP_JUMP_IF_FALSE)
+			self.compile_body(branch.body)
+			ends.append(self.emit(JUMP))
+			self.patch(skip)
+		if stmt.else_stmt:
+			self.compile_body(stmt.else_stmt.body)
+		for end in ends:
+			self.patch(end)
+
+	def compile_for(self, stmt):
+		self.compile_expr(stmt.expr)
+		self.emit(GET_ITER)
+		top = self.label()
+		exhausted = self.emit(FOR_ITER)
+		framed = stmt.frame_size is not None
+		if framed:
+			# every iteration runs in a frame of its own (see violet.resolver)
+			self.emit(PUSH_FRAME, stmt.frame_size)
+			self.framed += 1
+		self.store(stmt.name)
+		continues, breaks = [], []
+		self.loops.append((continues, breaks, framed))
+		self.compile_body(stmt.body)
+		self.loops.pop()
+		self.owner = stmt
+		for at in continues:
+			self.patch(at)
+		if framed:
+			self.framed -= 1
+			self.emit(POP_FRAME)
+		self.emit(JUMP, top)
+		for at in breaks:
+			self.patch(at)
+		self.emit(POP_TOP)
+		self.patch(exhausted)
+
+	# expressions
+
+	def compile_expr(self, expr):
+		cls = expr.__class__
+		if cls is ast.Identifier:
+			self.load(expr)
+		elif cls is ast.Constant:
+			self.emit(LOAD_CONST, self.const(expr.value))
+		elif cls is ast.Primitive:
+			self.compile_primitive(expr)
+		elif cls is ast.BiOperatorExpr:
+			self.compile_expr(expr.left)
+			self.compile_expr(expr.right)
+			self.emit(BINARY_OP, self.const(expr._cache))
+		elif cls is ast.FunctionCall:
+			self.compile_call(expr)
+		elif cls is ast.Cast:
+			self.compile_expr(expr.expr)
+			self.compile_expr(expr.type)
+			self.emit(CAST)
+		elif cls is ast.TypeId:
+			name = expr.name
+			self.compile_expr(name.name if isinstance(name, ast.Subscript) else name)
+		elif cls is ast.TernaryQMark:
+			self.compile_expr(expr.expr0)
+			otherwise = self.emit(TERNARY)
+			self.compile_expr(expr.expr1)
+			end = self.emit(JUMP)
+			self.patch(otherwise)
+			self.compile_expr(expr.expr2)
+			self.patch(end)
+		elif cls is ast.NilOrElse:
+			self.compile_expr(expr.expr0)
+			end = self.emit(NIL_OR_ELSE)
+			self.compile_expr(expr.expr1)
+			self.patch(end)
+		elif cls is ast.LogicalAnd or cls is ast.LogicalOr:
+			self.compile_expr(expr.expr0)
+			end = self.emit(JUMP_IF_FALSE_OR_POP if cls is ast.LogicalAnd else JUMP_IF_TRUE_OR_POP)
+			self.compile_expr(expr.expr1)
+			self.emit(CHECK_BOOLEAN, self.const(expr.symbol))
+			self.patch(end)
+		elif cls is ast.Lambda:
+			self.emit(MAKE_LAMBDA, self.const(compile_lambda(expr, self.instrument)))
+		else:
+			self.emit(EVAL, self.const(expr))
+
+	def compile_primitive(self, expr):
+		typ = expr.type
+		if typ is objects.List:
+			for item in expr.value:
+				self.compile_expr(item)
+			self.emit(BUILD_LIST, len(expr.value))
+			return
+		if typ is objects.Void:
+			value = objects.Void()
+		elif typ is objects.Boolean:
+			value = typ(expr.value == 'true')
+		elif typ is objects.Integer:
+			value = typ(int(expr.value))
+		elif typ is objects.String:
+			value = typ(pyast.literal_eval(expr.value))
+		else:
+			raise Exception(typ)
+		self.emit(LOAD_CONST, self.const(value))
+
+	def compile_call(self, expr):
+		self.load(expr.name.get_top_level_name())
+		for attr in expr.attrs:
+			self.emit(LOAD_ATTR, self.const(attr))
+		for arg in expr.args:
+			self.compile_expr(arg)
+		self.emit(CALL_CHECKED if expr.checked else CALL, self.const((len(expr.args), expr._cache)))
+
+def compile_module(module, instrument=False):
+	code = Code('<module>', module)
+	Compiler(code, instrument).compile_module(module)
+	return code
+
+def compile_function(func, instrument=False):
+	code = Code(func.name.name, func, func.params, func.frame_size)
+	Compiler(code, instrument).compile_function(func.body)
+	return code
+
+def compile_lambda(func, instrument=False):
+	code = Code('<lambda>', func, func.params, func.frame_size)
+	compiler = Compiler(code, instrument)
+	compiler.owner = func
+	if instrument:
+		compiler.emit(ENTER)
+		# the statement the other engines run the lambda as
+		compiler.emit(STATEMENT, compiler.const(func.returns()[0]))
+	compiler.compile_expr(func.body)
+	compiler.leave()
+	compiler.emit(RETURN_VALUE, func.checked)
+	return code
+
+def _lookup(identifier, frame):
+	depth = identifier.depth
+	if depth == BUILTIN:
+		return objects.STD_TYPES[identifier.name]
+	elif depth == GLOBAL:
+		value = frame.runner.global_scope.vars.get(identifier.name)
+		if value is None:
+			value = frame.runner.get_import(identifier.name)
+			if value is None:
+				raise VarNotFound(identifier)
+		return value
+	elif depth is None:
+		return identifier.eval(frame.runner)
+	for _ in range(depth):
+		frame = frame.parent
+	return frame.slots[identifier.slot]
+
+def _check_type(value, expected):
+	if not isinstance(value, expected):
+		raise Exception(f"invalid type {value.__class__.__name__!r} for function call (expected {expected.__name__!r})")
+
+# calls between compiled functions do not recurse in Python, so the call
+# depth is only bounded by memory
+MAX_DEPTH = 1000000
+
+def _new_frame(func, args, checked=False):
+	code = func.code
+	params = code.params
+	closure = func.closure
+	frame = Frame(closure.runner, func, closure, code.size)
+	slots = frame.slots
+	if checked:
+		for (slot, typ), value in zip(params, args):
+			slots[slot] = value
+		return frame
+	if len(args) < len(params):
+		raise Exception("not enough arguments for function call")
+	for i, value in enumerate(args):
+		if i == len(params):
+			raise Exception("too many arguments for function call")
+		slot, typ = params[i]
+		name = typ.name
+		_check_type(value, _lookup(name.name if isinstance(name, ast.Subscript) else name, frame))
+		slots[slot] = value
+	return frame
+
+def call(func, args, checked=False):
+	return execute(func.code, _new_frame(func, args, checked))
+
+def execute(code, frame):
+	runner = frame.runner
+	func = frame.func
+	slots = frame.slots
+	ops = code.ops
+	consts = code.consts
+	names = code.names
+	stack = []
+	push = stack.append
+	pop = stack.pop
+	pc = 0
+	calls = []  # (code, frame, stack, pc) of every suspended caller
+	try:
+		while True:
+			op = ops[pc]
+			arg = ops[pc + 1]
+			pc += 2
+
+			if op == LOAD_FAST:
+				push(slots[arg])
+			elif op == LOAD_CONST:
+				push(consts[arg])
+			elif op == BINARY_OP:
+				right = pop()
+				left = stack[-1]
+				cache = consts[arg]
+				if left.__class__ is cache.cls:
+					stack[-1] = cache.func(left, right)
+				else:
+					stack[-1] = cache.miss(left, right)
+			elif op == STORE_FAST:
+				slots[arg] = pop()
+			elif op == POP_JUMP_IF_FALSE:
+				cond = pop()
+				if not isinstance(cond, objects.Boolean):
+					raise Exception(f"unexpected type {cond.__class__.__name__!r} (expected \"Boolean\")")
+				if not cond:
+					pc = arg
+			elif op == JUMP:
+				pc = arg
+			elif op == FOR_ITER:
+				value = next(stack[-1], _EXHAUSTED)
+				if value is _EXHAUSTED:
+					pop()
+					pc = arg
+				else:
+					push(value)
+			elif op == LOAD_GLOBAL:
+				value = runner.global_scope.vars.get(names[arg].name)
+				if value is None:
+					value = runner.get_import(names[arg].name)
+					if value is None:
+						raise VarNotFound(names[arg])
+				push(value)
+			elif op == CALL or op == CALL_CHECKED:
+				argc, cache = consts[arg]
+				args = stack[len(stack) - argc:]
+				del stack[len(stack) - argc:]
+				obj = stack[-1]
+				if obj is cache.target:
+					kind = cache.kind
+				else:
+					kind = cache.resolve(obj)[1]
+				if kind == objects.CALL_FUNCTION and obj.code.__class__ is Code:
+					callee = _new_frame(obj, args, op == CALL_CHECKED)
+					if len(calls) == MAX_DEPTH:
+						raise Exception("maximum recursion depth exceeded")
+					pop()
+					calls.append((code, frame, stack, pc))
+					code = obj.code
+					frame = callee
+					runner = frame.runner
+					func = obj
+					slots = frame.slots
+					ops = code.ops
+					consts = code.consts
+					names = code.names
+					stack = []
+					push = stack.append
+					pop = stack.pop
+					pc = 0
+				else:
+					stack[-1] = _call(obj, kind, args, runner, op == CALL_CHECKED)
+			elif op == POP_TOP:
+				pop()
+			elif op == REASSIGN_FAST:
+				value = pop()
+				orig = slots[arg]
+				if not isinstance(value, orig.__class__):
+					raise Exception(f"invalid type {value.__class__.__name__!r} for function call (expected {orig.__class__.__name__!r})")
+				slots[arg] = value
+			elif op == CAST:
+				typ = pop()
+				obj = stack[-1]
+				if isinstance(obj, type):
+					stack[-1] = obj.class_cast0(typ)
+				else:
+					stack[-1] = obj.cast0(typ)
+			elif op == RETURN_VALUE:
+				ret = pop()
+				if not arg:  # not proven by violet.typechecker
+					if func.return_type is None:
+						if not isinstance(ret, objects.Object):
+							ret = runner.wrap_py_type(ret)
+						func.return_type = ret.get_type()
+					func.return_type.type_check(ret, runner)
+				if not calls:
+					return ret
+				code, frame, stack, pc = calls.pop()
+				runner = frame.runner
+				func = frame.func
+				slots = frame.slots
+				ops = code.ops
+				consts = code.consts
+				names = code.names
+				push = stack.append
+				pop = stack.pop
+				push(ret)
+			elif op == CHECK_TYPE:
+				_check_type(stack[-2], pop())
+			elif op == LOAD_DEREF:
+				depth, slot, _ = consts[arg]
+				outer = frame
+				for _ in range(depth):
+					outer = outer.parent
+				push(outer.slots[slot])
+			elif op == GET_ITER:
+				it = stack[-1]
+				try:
+					stack[-1] = iter(it)
+				except TypeError:
+					raise Exception(f"cannot loop over non-iterable type {it.__class__.__name__!r}")
+			elif op == LOAD_ATTR:
+				obj = stack[-1]
+				try:
+					stack[-1] = getattr(obj, consts[arg])
+				except AttributeError:
+					raise HasNoAttribute(obj, consts[arg])
+			elif op == TERNARY:
+				q = pop()
+				if not isinstance(q, objects.Boolean):
+					raise Exception(f"expected \"Boolean\" in ternary, found {q.__class__.__name__!r}")
+				if not q.value0:
+					pc = arg
+			elif op == NIL_OR_ELSE:
+				if isinstance(stack[-1], objects.Void):
+					pop()
+				else:
+					pc = arg
+			elif op == JUMP_IF_FALSE_OR_POP:
+				if ast.check_logical(stack[-1], '&&').value0:
+					pop()
+				else:
+					pc = arg
+			elif op == JUMP_IF_TRUE_OR_POP:
+				if ast.check_logical(stack[-1], '||').value0:
+					pc = arg
+				else:
+					pop()
+			elif op == CHECK_BOOLEAN:
+				ast.check_logical(stack[-1], consts[arg])
+			elif op == BUILD_LIST:
+				values = stack[len(stack) - arg:]
+				del stack[len(stack) - arg:]
+				push(_build_list(values))
+			elif op == MAKE_LAMBDA:
+				lambda_code = consts[arg]
+				push(objects.Lambda(lambda_code.node, lambda_code, frame))
+			elif op == REASSIGN_GLOBAL:
+				scope = runner.global_scope
+				identifier = names[arg]
+				if not scope.is_var_assigned(identifier):
+					raise Exception(f'variable {identifier.name!r} is not defined')
+				scope.reassign_var(identifier, pop())
+			elif op == STORE_GLOBAL:
+				runner.global_scope.set_var(names[arg], pop())
+			elif op == STORE_GLOBAL_CONST:
+				runner.global_scope.set_var(names[arg], pop(), const=True)
+			elif op == RETURN_NONE:
+				if not calls:
+					return None
+				code, frame, stack, pc = calls.pop()
+				runner = frame.runner
+				func = frame.func
+				slots = frame.slots
+				ops = code.ops
+				consts = code.consts
+				names = code.names
+				push = stack.append
+				pop = stack.pop
+				push(None)
+			elif op == MAKE_FUNCTION:
+				func_code = consts[arg]
+				push(objects.Function(func_code.node, func_code, frame))
+			elif op == IMPORT:
+				runner._exec_import(consts[arg])
+			elif op == EVAL:
+				push(consts[arg].eval(runner))
+			elif op == RAISE:
+				raise Exception(consts[arg])
+			elif op == PUSH_FRAME:
+				frame = Frame(runner, func, frame, arg)
+				slots = frame.slots
+			elif op == POP_FRAME:
+				frame = frame.parent
+				slots = frame.slots
+			elif op == STORE_DEREF:
+				depth, slot, _ = consts[arg]
+				outer = frame
+				for _ in range(depth):
+					outer = outer.parent
+				outer.slots[slot] = pop()
+			elif op == REASSIGN_DEREF:
+				depth, slot, _ = consts[arg]
+				outer = frame
+				for _ in range(depth):
+					outer = outer.parent
+				value = pop()
+				orig = outer.slots[slot]
+				if not isinstance(value, orig.__class__):
+					raise Exception(f"invalid type {value.__class__.__name__!r} for function call (expected {orig.__class__.__name__!r})")
+				outer.slots[slot] = value
+			elif op == STATEMENT:
+				# instrumented code outlives the hooks it was compiled for
+				hooks = runner.hooks
+				if hooks is not None:
+					for hook in hooks.on_statement:
+						hook(runner, consts[arg])
+			elif op == ENTER:
+				hooks = runner.hooks
+				if hooks is not None:
+					args = [slots[slot] for slot, _ in code.params]
+					for hook in hooks.on_call:
+						hook(runner, func, args)
+					for hook in hooks.on_scope_enter:
+						hook(runner, frame)
+			elif op == LEAVE:
+				hooks = runner.hooks
+				if hooks is not None:
+					# the function's frame, not a loop frame it returns from
+					outer = frame
+					while outer.parent is not None and outer.parent.func is func:
+						outer = outer.parent
+					for hook in hooks.on_scope_exit:
+						hook(runner, outer)
+					for hook in hooks.on_return:
+						hook(runner, func, stack[-1] if arg else None)
+			else:
+				raise Panic(f"unknown opcode {op}")
+	except StatementError:
+		raise
+	except Exception as e:
+		raise StatementError(code.owners[(pc - 2) // 2], str(e))
+
+_EXHAUSTED = object()
+
+def _call(obj, kind, args, runner, checked):
+	# the calling conventions understood by vast.FunctionCall
+	if kind == objects.CALL_FUNCTION:
+		return obj.call0(args, runner, checked)
+	elif kind == objects.CALL_PYTHON:
+		return obj(*args)
+	return obj(args, runner=runner)
+
+def _build_list(values):
+	if not values:
+		raise Exception("cannot infer type of empty list")
+	initial = values[0].__class__
+	for value in values:
+		if not isinstance(value, initial):
+			raise Exception(f"multi-typed lists are invalid (found {value.__class__.__name__!r}, expected {initial.__name__!r})")
+	return objects.List.from_values0(initial, values)
+
+# disassembly
+
+def _describe(code, op, arg):
+	if op in (LOAD_GLOBAL, STORE_GLOBAL, STORE_GLOBAL_CONST, REASSIGN_GLOBAL):
+		return code.names[arg].name
+	elif op in (LOAD_FAST, STORE_FAST, REASSIGN_FAST):
+		return code.varnames[arg] or ''
+	elif op in (LOAD_DEREF, STORE_DEREF, REASSIGN_DEREF):
+		depth, slot, name = code.consts[arg]
+		return f'{name}, depth {depth}, slot {slot}'
+	elif op in JUMPS:
+		return f'to {arg}'
+	elif op == BINARY_OP:
+		return code.consts[arg].name
+	elif op in (CALL, CALL_CHECKED):
+		return str(code.consts[arg][0])
+	elif op in (BUILD_LIST, PUSH_FRAME):
+		return str(arg)
+	elif op in (LOAD_CONST, LOAD_ATTR, MAKE_FUNCTION, MAKE_LAMBDA, IMPORT, EVAL, RAISE, CHECK_BOOLEAN, STATEMENT):
+		return repr(code.consts[arg])
+	return ''
+
+def disassemble(code, file=None):
+	file = file or sys.stdout
+	print(f"Disassembly of {code!r}:", file=file)
+	lineno = None
+	for i in range(0, len(code.ops), 2):
+		op, arg = code.ops[i], code.ops[i + 1]
+		owner = code.owners[i // 2]
+		line = getattr(owner, 'lineno', None) if owner is not None else None
+		if line is not None and line != lineno:
+			lineno = line
+			prefix = f'{line:>4}'
+		else:
+			prefix = '    '
+		described = _describe(code, op, arg)
+		operand = f'{arg:>4} ({described})' if described else ''
+		print(f'{prefix} {i:>6} {OPNAMES[op]:<22}{operand}', file=file)
+	for const in code.consts:
+		if isinstance(const, Code):
+			print(file=file)
+			disassemble(const, file)